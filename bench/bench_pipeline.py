@@ -0,0 +1,232 @@
+"""
+RunAllPipeline 단계별 확장성 벤치마크 (합성 git 레포 + mock LLM)
+
+실행 (레포 루트에서):
+    python -m bench.bench_pipeline                          # 기본 크기 10,100,1000,5000
+    python -m bench.bench_pipeline --sizes 10,100 --save-baseline
+    python -m bench.bench_pipeline --compare                # baseline 대비 회귀 검사 (회귀 시 exit 1)
+
+측정 항목 (단계별): wall time, git 서브프로세스 수, 전송 토큰 수, peak RSS
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = ROOT / "bench"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+RESULTS_DIR = BENCH_DIR / "results"
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+STAGES = ["extract_all_info", "mm_gen_main", "fst_mapper_main", "fx_elab_main", "gen_msg_main", "upload_main"]
+
+
+def git(args: list[str], cwd: Path):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+# 🧪 합성 레포: n개 파일 변경 (크기 다양), 로컬 bare remote 연결
+def build_synthetic_repo(base: Path, n_files: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    repo = base / f"repo_{n_files}"
+    remote = base / f"remote_{n_files}.git"
+    repo.mkdir(parents=True)
+    git(["init", "--bare", "-q", str(remote)], cwd=base)
+    git(["init", "-q", "-b", "main"], cwd=repo)
+    git(["config", "user.name", "bench"], cwd=repo)
+    git(["config", "user.email", "bench@example.com"], cwd=repo)
+    git(["remote", "add", "origin", str(remote)], cwd=repo)
+
+    shutil.copytree(ROOT / "prompt", repo / "prompt")
+    (repo / "config").mkdir()
+    user_cfg = yaml.safe_load((ROOT / "config/user_config.yml").read_text(encoding="utf-8"))
+    user_cfg.setdefault("change detection", {})["max_files"] = n_files + 1  # 변경 파일 수 제한 해제
+    (repo / "config/user_config.yml").write_text(yaml.safe_dump(user_cfg, allow_unicode=True, sort_keys=False),
+                                                 encoding="utf-8")
+    (repo / "README.md").write_text("# bench repo\n합성 벤치마크용 레포입니다.\n\n## 구조\n- pkg*/mod_*.py\n",
+                                    encoding="utf-8")
+    (repo / ".gitignore").write_text("results/\nlogs/\n", encoding="utf-8")
+
+    files = []
+    for i in range(n_files):
+        folder = repo / f"pkg{i % 20}"
+        folder.mkdir(exist_ok=True)
+        path = folder / f"mod_{i}.py"
+        n_funcs = rng.choice([1, 3, 10, 40])
+        path.write_text("\n".join(
+            f"def func_{i}_{k}(x):\n    return x + {k}\n" for k in range(n_funcs)
+        ), encoding="utf-8")
+        files.append(path)
+    git(["add", "-A"], cwd=repo)
+    git(["commit", "-q", "-m", "init"], cwd=repo)
+    git(["push", "-q", "-u", "origin", "main"], cwd=repo)
+
+    for path in files:
+        with path.open("a", encoding="utf-8") as f:
+            f.write("\n".join(f"def added_{k}(y):\n    return y * {k}\n" for k in range(rng.choice([1, 5, 20]))))
+    return repo
+
+
+# 🔧 worker: 합성 레포 안에서 각 단계 실행 + 계측 (cwd 기준 경로를 쓰므로 별도 프로세스)
+def run_worker(repo: Path, out_path: Path):
+    import resource
+
+    os.chdir(repo)
+    sys.path.insert(0, str(ROOT))
+
+    git_calls = {"count": 0}
+    real_run = subprocess.run
+
+    def counting_run(args, *a, **kw):
+        if isinstance(args, (list, tuple)) and args and args[0] == "git":
+            git_calls["count"] += 1
+        return real_run(args, *a, **kw)
+
+    subprocess.run = counting_run
+
+    from utils.cfg import cfg
+    from scripts.dataframe import load_df
+    from scripts.ext_info import extract_all_info
+    from scripts.mm_gen import mm_gen_main
+    from scripts.fst_mapper import fst_mapper_main
+    from scripts.fx_elab import fx_elab_main
+    from scripts.gen_msg import gen_msg_main
+    import scripts.upload as upload
+
+    # 알림/기록은 stub 처리
+    upload.send_notification = lambda platforms, msg, log_func: []
+    upload.notion.upload_fx_record = lambda file, text: None
+
+    paths = cfg.get_results_path(cfg.get_timestamp())
+    stage_funcs = {
+        "extract_all_info": extract_all_info, "mm_gen_main": mm_gen_main,
+        "fst_mapper_main": fst_mapper_main, "fx_elab_main": fx_elab_main,
+        "gen_msg_main": gen_msg_main, "upload_main": upload.upload_main,
+    }
+
+    def tokens_sent() -> int:
+        in_df = load_df(paths["in"], columns=["token"])
+        return int(in_df["token"].sum()) if in_df is not None and not in_df.empty else 0
+
+    results = {}
+    for name in STAGES:
+        git_before, tokens_before = git_calls["count"], tokens_sent()
+        t0 = time.perf_counter()
+        error = None
+        try:
+            stage_funcs[name]()
+        except BaseException as e:  # SystemExit 포함
+            error = f"{type(e).__name__}: {e}"
+        results[name] = {
+            "wall_s": round(time.perf_counter() - t0, 3),
+            "git_calls": git_calls["count"] - git_before,
+            "tokens_sent": tokens_sent() - tokens_before,
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "error": error,
+        }
+        if error and name in {"extract_all_info", "mm_gen_main"}:
+            break
+
+    out_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def run_size(n_files: int, mock_url: str, keep: bool) -> dict:
+    base = Path(tempfile.mkdtemp(prefix=f"git_auto_bench_{n_files}_"))
+    try:
+        repo = build_synthetic_repo(base, n_files)
+        out_path = base / "result.json"
+        py_path = os.pathsep.join(p for p in [str(ROOT), os.environ.get("PYTHONPATH", "")] if p)
+        env = {**os.environ, "LLM_MOCK_URL": mock_url, "PYTHONPATH": py_path}
+        subprocess.run(
+            [sys.executable, "-m", "bench.bench_pipeline", "--worker", str(repo), "--out", str(out_path)],
+            cwd=ROOT, env=env, check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL
+        )
+        return json.loads(out_path.read_text(encoding="utf-8"))
+    finally:
+        if not keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+# 📉 baseline 대비 회귀 판정: wall time 은 허용 비율, git/토큰은 증가 자체를 회귀로 간주
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for size, stages in current.items():
+        for stage, m in stages.items():
+            ref = baseline.get(size, {}).get(stage)
+            if not ref:
+                continue
+            if m["wall_s"] > ref["wall_s"] * (1 + tolerance) and m["wall_s"] - ref["wall_s"] > 0.2:
+                regressions.append(f"[{size}] {stage} wall {ref['wall_s']}s → {m['wall_s']}s")
+            for key in ("git_calls", "tokens_sent"):
+                if m[key] > ref[key]:
+                    regressions.append(f"[{size}] {stage} {key} {ref[key]} → {m[key]}")
+            if m["error"] and not ref["error"]:
+                regressions.append(f"[{size}] {stage} 새 오류: {m['error']}")
+    return regressions
+
+
+def print_table(results: dict):
+    print(f"{'files':>6} {'stage':<18} {'wall(s)':>9} {'git':>7} {'tokens':>10} {'rss(MB)':>9}  error")
+    for size, stages in results.items():
+        for stage, m in stages.items():
+            print(f"{size:>6} {stage:<18} {m['wall_s']:>9} {m['git_calls']:>7} {m['tokens_sent']:>10} "
+                  f"{m['peak_rss_mb']:>9}  {m['error'] or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="git_auto 파이프라인 벤치마크")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--latency", default="fixed:0.02", help="mock 서버 지연 분포")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--keep", action="store_true", help="합성 레포 삭제하지 않음")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(Path(args.worker), Path(args.out))
+
+    from scripts.mock_llm_server import start_server
+    server = start_server(port=0, latency=args.latency)
+    mock_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",") if s]:
+        print(f"▶ {size}개 파일 벤치마크 실행 중...")
+        results[str(size)] = run_size(size, mock_url, args.keep)
+    server.shutdown()
+
+    print_table(results)
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    result_path = RESULTS_DIR / f"{datetime.now().strftime('%y%m%d_%H%M')}.json"
+    result_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"💾 결과 저장: {result_path}")
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"📌 baseline 갱신: {BASELINE_PATH}")
+
+    if args.compare:
+        if not BASELINE_PATH.exists():
+            print("⚠️ baseline 없음 → --save-baseline 먼저 실행")
+            sys.exit(1)
+        regressions = compare(results, json.loads(BASELINE_PATH.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print("🚨 회귀 감지:\n" + "\n".join(regressions))
+            sys.exit(1)
+        print("✅ baseline 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+from utils.cfg import cfg
+
+# 🔑 provider 별 API 키 풀
+# - 키: {PROVIDER}_API_KEYS (쉼표 구분) + {PROVIDER}_API_KEY
+# - 키마다 동시 실행 수 / 최소 호출 간격을 따로 관리, 가장 한가한 키부터 배정
+# - 401/403 → 즉시 제외, 429 → 점점 길게 쉬게 하고 연속 MAX_RATE_LIMITED 회면 이번 실행에서 제외
+DEFAULTS = {
+    "fireworks": {"per_key_concurrency": 5, "min_interval_s": 0.0},
+    "openai": {"per_key_concurrency": 1, "min_interval_s": 2.0},
+}
+MAX_RATE_LIMITED = 3
+BASE_COOLDOWN_S = 5.0
+
+
+def _silent(message: str):
+    pass
+
+
+@dataclass
+class KeyState:
+    key: str
+    in_flight: int = 0
+    last_start: float = 0.0
+    cooldown_until: float = 0.0
+    rate_limited: int = 0
+    drained: str | None = None  # 제외 사유
+    calls: int = 0
+
+    @property
+    def label(self) -> str:
+        return f"…{self.key[-4:]}"
+
+
+class KeyPool:
+    def __init__(self, provider: str, keys: list[str], per_key_concurrency: int, min_interval_s: float):
+        self.provider = provider
+        self.keys = [KeyState(k) for k in keys]
+        self.per_key_concurrency = max(1, per_key_concurrency)
+        self.min_interval_s = min_interval_s
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        with self._cond:
+            alive = sum(1 for k in self.keys if not k.drained)
+        return max(1, alive) * self.per_key_concurrency
+
+    def pacing_sec(self) -> float:
+        """풀 전체 기준 평균 호출 간격 (견적용)"""
+        alive = max(1, sum(1 for k in self.keys if not k.drained))
+        return self.min_interval_s / alive
+
+    def _ready_wait(self, state: KeyState, now: float) -> float:
+        """이 키를 지금 쓰려면 기다려야 하는 시간 (0이면 즉시)"""
+        return max(state.cooldown_until - now, state.last_start + self.min_interval_s - now, 0.0)
+
+    @contextmanager
+    def lease(self):
+        state = self._acquire()
+        try:
+            yield state
+        finally:
+            with self._cond:
+                state.in_flight -= 1
+                self._cond.notify_all()
+
+    def _acquire(self) -> KeyState:
+        with self._cond:
+            while True:
+                alive = [k for k in self.keys if not k.drained]
+                if not alive:
+                    raise RuntimeError(f"[{self.provider.upper()}] ❌ 사용 가능한 API 키 없음")
+                now = time.monotonic()
+                free = [k for k in alive if k.in_flight < self.per_key_concurrency]
+                ready = [k for k in free if self._ready_wait(k, now) == 0]
+                if ready:
+                    state = min(ready, key=lambda k: (k.in_flight, k.last_start))
+                    state.in_flight += 1
+                    state.calls += 1
+                    state.last_start = now
+                    return state
+                # 슬롯이 비거나 쿨다운/간격이 끝날 때까지 대기
+                timeout = min((self._ready_wait(k, now) for k in free), default=None)
+                self._cond.wait(timeout)
+
+    def report(self, state: KeyState, status: int | None, log=None):
+        """호출 결과 반영: status 는 HTTP 상태 코드 (성공 시 None 또는 2xx), log 는 호출한 쪽 로그 (풀 공용 상태 아님)"""
+        log = log or _silent
+        with self._cond:
+            if status in (401, 403):
+                state.drained = f"인증 실패 {status}"
+                log(f"🔑 [{self.provider}] 키 {state.label} 제외 ({state.drained})")
+            elif status == 429:
+                state.rate_limited += 1
+                if state.rate_limited >= MAX_RATE_LIMITED:
+                    state.drained = f"429 연속 {state.rate_limited}회"
+                    log(f"🔑 [{self.provider}] 키 {state.label} 제외 ({state.drained})")
+                else:
+                    wait = BASE_COOLDOWN_S * 2 ** (state.rate_limited - 1)
+                    state.cooldown_until = time.monotonic() + wait
+                    log(f"🔑 [{self.provider}] 키 {state.label} 429 → {wait:.0f}s 휴식")
+            elif status is None or 200 <= status < 300:
+                state.rate_limited = 0
+            self._cond.notify_all()
+
+
+def http_status(exc: Exception) -> int | None:
+    """requests.HTTPError / openai.APIStatusError 에서 HTTP 상태 코드 추출"""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def load_keys(provider: str) -> list[str]:
+    load_dotenv()
+    prefix = provider.upper()
+    keys = [k.strip() for k in (os.getenv(f"{prefix}_API_KEYS") or "").split(",") if k.strip()]
+    single = os.getenv(f"{prefix}_API_KEY")
+    if single and single not in keys:
+        keys.append(single)
+    if not keys and cfg.get_mock_llm_url():
+        keys = ["mock-key"]  # mock 서버 사용 시에는 실제 키 없이도 호출 가능
+    return keys
+
+
+_pools: dict[str, KeyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(provider: str) -> KeyPool:
+    with _pools_lock:
+        if provider not in _pools:
+            conf = {**DEFAULTS.get(provider, DEFAULTS["openai"]),
+                    **((cfg.get_user_config().get("api keys") or {}).get(provider) or {})}
+            _pools[provider] = KeyPool(provider, load_keys(provider),
+                                       int(conf["per_key_concurrency"]), float(conf["min_interval_s"]))
+        return _pools[provider]
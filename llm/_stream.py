@@ -0,0 +1,25 @@
+import json
+
+
+# 🔹 SSE(text/event-stream) 응답 → chunk(dict) 순회
+def iter_sse(response):
+    # bytes 단위로 줄을 나눈 뒤 디코딩 (str.splitlines는 유니코드 구분자에서도 끊어짐)
+    for raw in response.iter_lines():
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        yield json.loads(data)
+
+
+# 🔹 OpenAI 호환 chunk → ("delta", text) / ("usage", dict) 이벤트 변환
+def iter_events(chunks):
+    for chunk in chunks:
+        for choice in chunk.get("choices") or []:
+            text = (choice.get("delta") or {}).get("content")
+            if text:
+                yield "delta", text
+        if chunk.get("usage"):
+            yield "usage", chunk["usage"]
@@ -1,25 +1,73 @@
-import os
-import openai
-from openai import OpenAI
-from dotenv import load_dotenv
+import threading
+from llm._keypool import get_pool, http_status
+from utils.cfg import cfg
 
-load_dotenv()
-API_KEY = os.getenv("OPENAI_API_KEY")
+# 키마다 클라이언트 하나씩 재사용
+_clients: dict[str, "OpenAI"] = {}
+_clients_lock = threading.Lock()
 
-client = OpenAI(api_key=API_KEY)
+def _client(api_key: str) -> "OpenAI":
+    from openai import OpenAI  # SDK import 는 첫 호출 시점에
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = OpenAI(api_key=api_key, base_url=cfg.get_llm_base_url("openai"))
+        return _clients[api_key]
 
-def call(prompt: str, llm_param: dict) -> str:
-    if not API_KEY:
+def call(prompt: str, llm_param: dict, usage: dict | None = None, log_func=None) -> str:
+    pool = get_pool("openai")
+    if not pool.keys:
         raise ValueError("OPENAI_API_KEY 없음")
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=llm_param.get("temperature", 0.7),
-        max_tokens=llm_param.get("max_tokens", 1024),
-        top_p=llm_param.get("top_p", 0.8),
-        frequency_penalty=0,
-        presence_penalty=0
-    )
+    with pool.lease() as key:
+        try:
+            response = _client(key.key).chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=llm_param.get("temperature", 0.7),
+                max_tokens=llm_param.get("max_tokens", 1024),
+                top_p=llm_param.get("top_p", 0.8),
+                frequency_penalty=0,
+                presence_penalty=0
+            )
+        except Exception as e:
+            pool.report(key, http_status(e), log_func)
+            raise
+        pool.report(key, None, log_func)
 
+    if usage is not None and response.usage:
+        usage.update(response.usage.model_dump())
     return response.choices[0].message.content.strip()
+
+
+def stream(prompt: str, llm_param: dict, log_func=None):
+    pool = get_pool("openai")
+    if not pool.keys:
+        raise ValueError("OPENAI_API_KEY 없음")
+
+    with pool.lease() as key:
+        try:
+            response = _client(key.key).chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=llm_param.get("temperature", 0.7),
+                max_tokens=llm_param.get("max_tokens", 1024),
+                top_p=llm_param.get("top_p", 0.8),
+                frequency_penalty=0,
+                presence_penalty=0,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+        except Exception as e:
+            pool.report(key, http_status(e), log_func)
+            raise
+        pool.report(key, None, log_func)
+
+        try:
+            for chunk in response:
+                for choice in chunk.choices:
+                    if choice.delta and choice.delta.content:
+                        yield "delta", choice.delta.content
+                if chunk.usage:
+                    yield "usage", chunk.usage.model_dump()
+        finally:
+            response.close()
@@ -1,18 +1,13 @@
-import os
 import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-API_KEY = os.getenv("FIREWORKS_API_KEY")
-
-def call(prompt: str, llm_param: dict) -> str:
-    if not API_KEY:
-        raise ValueError("FIREWORKS_API_KEY 없음")
+from llm._stream import iter_sse, iter_events
+from llm._keypool import get_pool, http_status
+from utils.cfg import cfg
 
+def _build_request(prompt: str, llm_param: dict, stream: bool, api_key: str) -> tuple[dict, dict]:
     headers = {
-        "Authorization": f"Bearer {API_KEY}",
+        "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
-        "Accept": "application/json"
+        "Accept": "text/event-stream" if stream else "application/json"
     }
 
     payload = {
@@ -28,12 +23,52 @@ def call(prompt: str, llm_param: dict) -> str:
                 "role": "user",
                 "content": [{"type": "text", "text": prompt}]
             }
-        ]
+        ],
+        "stream": stream
     }
+    return headers, payload
+
+def call(prompt: str, llm_param: dict, usage: dict | None = None, log_func=None) -> str:
+    pool = get_pool("fireworks")
+    if not pool.keys:
+        raise ValueError("FIREWORKS_API_KEY 없음")
+
+    with pool.lease() as key:
+        headers, payload = _build_request(prompt, llm_param, stream=False, api_key=key.key)
+        try:
+            response = requests.post(
+                f"{cfg.get_llm_base_url('fireworks')}/chat/completions",
+                headers=headers, json=payload, timeout=60
+            )
+            response.raise_for_status()
+        except Exception as e:
+            pool.report(key, http_status(e), log_func)
+            raise
+        pool.report(key, response.status_code, log_func)
+    data = response.json()
+    if usage is not None:
+        usage.update(data.get("usage") or {})
+    return data["choices"][0]["message"]["content"].strip()
+
+
+def stream(prompt: str, llm_param: dict, log_func=None):
+    pool = get_pool("fireworks")
+    if not pool.keys:
+        raise ValueError("FIREWORKS_API_KEY 없음")
 
-    response = requests.post(
-        "https://api.fireworks.ai/inference/v1/chat/completions",
-        headers=headers, json=payload, timeout=60
-    )
-    response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"].strip()
+    with pool.lease() as key:
+        headers, payload = _build_request(prompt, llm_param, stream=True, api_key=key.key)
+        try:
+            response = requests.post(
+                f"{cfg.get_llm_base_url('fireworks')}/chat/completions",
+                headers=headers, json=payload, timeout=60, stream=True
+            )
+            response.raise_for_status()
+        except Exception as e:
+            pool.report(key, http_status(e), log_func)
+            raise
+        pool.report(key, response.status_code, log_func)
+        try:
+            yield from iter_events(iter_sse(response))
+        finally:
+            response.close()
@@ -1,18 +1,13 @@
-import os
 import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-API_KEY = os.getenv("FIREWORKS_API_KEY")
-
-def call(prompt: str, llm_param: dict, system_msg: str = "", log_func=None) -> str:
-    if not API_KEY:
-        raise ValueError("FIREWORKS_API_KEY 없음")
+from llm._stream import iter_sse, iter_events
+from llm._keypool import get_pool, http_status
+from utils.cfg import cfg
 
+def _build_request(prompt: str, llm_param: dict, system_msg: str, stream: bool, api_key: str) -> tuple[dict, dict]:
     headers = {
-        "Authorization": f"Bearer {API_KEY}",
+        "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
-        "Accept": "application/json"
+        "Accept": "text/event-stream" if stream else "application/json"
     }
 
     messages = []
@@ -28,21 +23,65 @@ def call(prompt: str, llm_param: dict, system_msg: str = "", log_func=None) -> s
         "temperature": llm_param.get("temperature", 0.7),
         "presence_penalty": 0,
         "frequency_penalty": 0,
-        "messages": messages
+        "messages": messages,
+        "stream": stream
     }
+    return headers, payload
+
+def call(prompt: str, llm_param: dict, system_msg: str = "", log_func=None, usage: dict | None = None) -> str:
+    pool = get_pool("fireworks")
+    if not pool.keys:
+        raise ValueError("FIREWORKS_API_KEY 없음")
 
     try:
-        response = requests.post(
-            "https://api.fireworks.ai/inference/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
-        response.raise_for_status()
+        with pool.lease() as key:
+            headers, payload = _build_request(prompt, llm_param, system_msg, stream=False, api_key=key.key)
+            try:
+                response = requests.post(
+                    f"{cfg.get_llm_base_url('fireworks')}/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=60
+                )
+                response.raise_for_status()
+            except Exception as e:
+                pool.report(key, http_status(e), log_func)
+                raise
+            pool.report(key, response.status_code, log_func)
         data = response.json()
+        if usage is not None:
+            usage.update(data.get("usage") or {})
         return data["choices"][0]["message"]["content"].strip()
     except Exception as e:
-        msg = f"[FIREWORKS] ❌ 호출 실패: {e}"
-        if log_func:
-            log_func(msg)
-        raise RuntimeError(msg)
+        raise RuntimeError(f"[FIREWORKS] ❌ 호출 실패: {e}")  # 실패 로그는 router 에서
+
+
+# 🔹 stream(): SSE 스트리밍 호출 → ("delta", text) / ("usage", dict) 이벤트 생성
+def stream(prompt: str, llm_param: dict, system_msg: str = "", log_func=None):
+    pool = get_pool("fireworks")
+    if not pool.keys:
+        raise ValueError("FIREWORKS_API_KEY 없음")
+
+    # 키 점유는 스트림을 다 읽거나 닫을 때까지 유지
+    with pool.lease() as key:
+        headers, payload = _build_request(prompt, llm_param, system_msg, stream=True, api_key=key.key)
+
+        try:
+            response = requests.post(
+                f"{cfg.get_llm_base_url('fireworks')}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=60,
+                stream=True
+            )
+            response.raise_for_status()
+        except Exception as e:
+            pool.report(key, http_status(e), log_func)
+            raise RuntimeError(f"[FIREWORKS] ❌ 스트리밍 호출 실패: {e}")
+        pool.report(key, response.status_code, log_func)
+
+        # 소비자가 중간에 멈추면(close) 연결도 즉시 종료
+        try:
+            yield from iter_events(iter_sse(response))
+        finally:
+            response.close()
@@ -1,104 +1,331 @@
-# runall.py (중복 load_df 제거 최종 완성본)
-import sys
+# runall.py (단계 간 DataFrame 은 RunContext 로 메모리 전달)
+# 단계 모듈(pandas, tiktoken, LLM SDK 등)은 사용할 때 import → 변경 없는 실행은 precheck 후 바로 종료
+import argparse
+import time
+from contextlib import contextmanager
 from utils.cfg import cfg
-from scripts.dataframe import load_df
-from scripts.ext_info import extract_all_info
-from scripts.mm_gen import mm_gen_main
-from scripts.fst_mapper import fst_mapper_main
-from scripts.fx_elab import fx_elab_main
-from scripts.gen_msg import gen_msg_main
-from scripts.upload import upload_main
+from utils import trace, memprof
+from scripts import precheck
 
 
 class RunAllPipeline:
-    def __init__(self):
-        self.timestamp = cfg.get_timestamp()
-        self.paths = cfg.get_results_path(self.timestamp)
-        self.log_file = cfg.init_log_file(self.timestamp)
-        self.strategy_df = None
-        cfg.log(f"🚀 RunAll 시작: {self.timestamp}", self.log_file)
+    def __init__(self, resume: bool = False):
+        from scripts.run_context import RunContext
+        from scripts.checkpoint import RunCheckpoint, git_snapshot
+
+        # 🧳 단계 간 DataFrame/공용 값은 ctx 로 메모리 전달, 디스크 저장은 체크포인트
+        self.ctx = RunContext()
+        self.timestamp = self.ctx.timestamp
+        self.paths = self.ctx.paths
+        self.log_file = self.ctx.log_file
+        self.resume = resume
+        self.no_changes = False
+        self.checkpoint = RunCheckpoint(self.timestamp)
+        self.ctx.checkpoint = self.checkpoint
+        if not cfg.DRY_RUN and not resume:
+            self.checkpoint.reset(git_snapshot())
+        cfg.log(f"🚀 RunAll {'재개' if resume else '시작'}: {self.timestamp}", self.log_file)
+        if resume:
+            cfg.log(f"📓 재개 실행: 완료된 단계 결과와 journal.jsonl 의 LLM 응답/비용을 그대로 재사용 "
+                    f"(새로 호출하지 않음, 새로 실행하려면 --resume 없이)", self.log_file, level="warning")
+
+    @property
+    def strategy_df(self):
+        return self.ctx.frame("strategy")
+
+    # ⏰ 실행 마감 설정: 이후 저중요도 LLM 호출은 취소 (중요 파일은 끝까지 완료)
+    def set_deadline(self, minutes: float | None = None):
+        schedule = cfg.get_schedule_config()
+        minutes = minutes if minutes is not None else schedule["deadline_min"]
+        if minutes and minutes > 0:
+            cfg.RUN_DEADLINE = time.monotonic() + minutes * 60
+            cfg.log(f"⏰ 실행 마감 {minutes}분 (중요도 {schedule['must_finish_importance']:g} 이상은 마감 후에도 완료)",
+                    self.log_file)
+
+    # ⏱ 단계 실행 구간: trace span 기록 + 소요 시간 로그
+    @contextmanager
+    def _timed(self, stage: str):
+        start = time.perf_counter()
+        try:
+            with trace.span(stage):
+                yield
+        finally:
+            cfg.log(f"⏱ {stage} 소요: {time.perf_counter() - start:.2f}s", self.log_file)
+            record = memprof.checkpoint(stage)
+            if record:
+                for line in memprof.summary_lines(record):
+                    cfg.log(line, self.log_file)
 
     def run_extract(self) -> bool:
+        from scripts.ext_info import extract_all_info
+
         cfg.log("📦 1단계: Git 변경 정보 수집 시작", self.log_file)
-        updated = extract_all_info()
+        with self._timed("run_extract"):
+            updated = extract_all_info(self.ctx)
         if not updated:
             cfg.log("🛑 변경된 파일 없음 → 전체 파이프라인 중단", self.log_file)
+            self.no_changes = True
             return False
         cfg.log("✅ Git 정보 수집 완료", self.log_file)
         return True
 
     def run_strategy(self) -> bool:
+        from scripts.mm_gen import mm_gen_main
+
         try:
             cfg.log("🧠 2단계: 전략 예측 시작", self.log_file)
-            mm_gen_main()
+            with self._timed("run_strategy"):
+                mm_gen_main(self.ctx)
             cfg.log("✅ 전략 예측 완료", self.log_file)
-            self.strategy_df = load_df(self.paths["strategy"])
             return True
         except Exception as e:
             cfg.log(f"❌ 전략 예측 실패: {e}", self.log_file)
             return False
 
-    def run_classify(self):
+    def run_classify(self) -> bool:
         if self.strategy_df is None or self.strategy_df.empty:
             cfg.log("⚠️ strategy_df 없음 또는 비어있음 → 분류 생략", self.log_file)
-            return
+            return True
+        from scripts.fst_mapper import fst_mapper_main
+
         try:
             cfg.log("📊 3단계: 파일 전략 분류 시작", self.log_file)
-            fst_mapper_main()
+            with self._timed("run_classify"):
+                fst_mapper_main(self.ctx)
             cfg.log("✅ 파일 전략 분류 완료", self.log_file)
+            return True
         except Exception as e:
             cfg.log(f"❌ 파일 전략 분류 실패: {e}", self.log_file)
+            return False
 
-    def run_explain(self):
+    def run_explain(self) -> bool:
         if self.strategy_df is None or self.strategy_df[self.strategy_df["Importance"] > 3].empty:
             cfg.log("⚠️ 설명 생성 대상 없음 → 생략", self.log_file)
-            return
+            return True
+        from scripts.fx_elab import fx_elab_main
+
         try:
             cfg.log("📝 4단계: 기능 설명 생성 시작", self.log_file)
-            fx_elab_main()
+            with self._timed("run_explain"):
+                fx_elab_main(self.ctx)
             cfg.log("✅ 기능 설명 완료", self.log_file)
+            return True
         except Exception as e:
             cfg.log(f"❌ 기능 설명 실패: {e}", self.log_file)
+            return False
 
-    def run_commit_msg(self):
+    def run_commit_msg(self) -> bool:
         if self.strategy_df is None or self.strategy_df[self.strategy_df["Importance"] > 3].empty:
             cfg.log("⚠️ 커밋 메시지 대상 없음 → 생략", self.log_file)
-            return
+            return True
+        from scripts.gen_msg import gen_msg_main
+
         try:
             cfg.log("✉️ 5단계: 커밋 메시지 생성 시작", self.log_file)
-            gen_msg_main()
+            with self._timed("run_commit_msg"):
+                gen_msg_main(self.ctx)
             cfg.log("✅ 커밋 메시지 생성 완료", self.log_file)
+            return True
         except Exception as e:
             cfg.log(f"❌ 커밋 메시지 생성 실패: {e}", self.log_file)
+            return False
+
+    def run_upload(self) -> bool:
+        from scripts.upload import upload_main
 
-    def run_upload(self):
         try:
             cfg.log("☁️ 6단계: 커밋 및 업로드 시작", self.log_file)
-            upload_main()
+            with self._timed("run_upload"):
+                upload_main(self.ctx)
             cfg.log("✅ 커밋 및 업로드 완료", self.log_file)
+            return True
         except Exception as e:
             cfg.log(f"❌ 업로드 실패: {e}", self.log_file)
+            return False
 
     def run_all(self):
-        if not self.run_extract():
-            return
-        if not self.run_strategy():
-            return
+        try:
+            with self._timed("run_all"):
+                completed = self.run_stages()
+            if completed or self.no_changes:
+                self.record_status()
+            if completed:
+                cfg.log("🎯 전체 파이프라인 종료", self.log_file)
+            elif not self.no_changes:
+                cfg.log("⚠️ 실패한 단계 있음 → git 상태 미기록 (다음 실행에서 다시 처리)", self.log_file)
+        finally:
+            self.ctx.flush()
+            self.record_cost()
+            self.index_catalog()
+            self.export_trace()
+            self.export_memprofile()
+
+    # 📍 단계 순서대로 실행 + 완료 표시. --resume 이면 입력이 같은 완료 단계는 건너뛰고 첫 미완료 단계부터
+    # - 모든 단계가 성공해야 True → 실패한 단계가 있으면 git 상태를 기록하지 않아 다음 실행에서 다시 처리
+    def run_stages(self) -> bool:
+        from scripts.checkpoint import STAGES
+
+        all_ok = True
+        skipping = self.resume
+        for stage in STAGES:
+            if skipping and self.checkpoint.is_done(stage):
+                cfg.log(f"⏭️ {stage} 단계 입력 변화 없음 → 이전 실행 결과 사용", self.log_file)
+                continue
+            if skipping:
+                self.checkpoint.invalidate_from(stage)
+                skipping = False
+            if self.checkpoint.begin(stage):
+                self.ctx.resuming.add(stage)
+                cfg.log(f"♻️ {stage} 단계 이어서 실행 (완료된 파일은 재사용)", self.log_file)
+
+            ok = getattr(self, f"run_{stage}")()
+            if ok:
+                self.ctx.defer(f"{stage} 완료 표시", self.checkpoint.mark_done, stage)
+            else:
+                all_ok = False
+                if stage in ("extract", "strategy"):  # 이후 단계 입력이 없으므로 중단
+                    return False
+        return all_ok
+
+    # 🧪 dry-run: 업로드 전 단계까지 프롬프트만 생성 → 단계별 토큰/비용/소요 시간 견적
+    def run_estimate(self) -> tuple[float, float] | None:
+        from scripts import estimate
+
+        cfg.log("🧪 dry-run 견적 시작 (LLM 호출 없음)", self.log_file)
+        if not self.run_extract() or not self.run_strategy():
+            return None
         self.run_classify()
         self.run_explain()
         self.run_commit_msg()
-        self.run_upload()
-        cfg.log("🎯 전체 파이프라인 종료", self.log_file)
+        self.ctx.flush()
+
+        exchange_rate = self.ctx.exchange_rate
+        report = estimate.build_report()
+        for line in estimate.summary_lines(report, exchange_rate):
+            cfg.log(line, self.log_file, echo=True)
+        return estimate.totals(report, exchange_rate)
+
+    # 💸 이번 실행 비용 합계 (cost/rollup/YY_MM.json, 월 예산 한도 계산 기준)
+    def record_cost(self):
+        if cfg.DRY_RUN:
+            return
+        from scripts.budget import record_run_cost
+
+        try:
+            record_run_cost(self.timestamp, log_func=lambda m: cfg.log(m, self.log_file))
+        except Exception as e:
+            cfg.log(f"⚠️ 실행 비용 기록 실패: {e}", self.log_file)
+
+    # ⚡ 끝까지 처리한 직후 git 상태 기록 → 다음 실행에서 그대로면 precheck 단계에서 종료
+    def record_status(self):
+        try:
+            precheck.save_last(self.timestamp)
+        except Exception as e:
+            cfg.log(f"⚠️ git 상태 기록 실패: {e}", self.log_file)
+
+    # 📚 실행 이력 카탈로그 갱신 (logs/catalog.sqlite, python -m scripts.run_catalog 로 조회)
+    def index_catalog(self):
+        if cfg.DRY_RUN:
+            return
+        from scripts.run_catalog import RunCatalog
+
+        try:
+            if RunCatalog().index_run(self.timestamp):
+                cfg.log("📚 실행 이력 카탈로그 갱신 완료", self.log_file)
+        except Exception as e:
+            cfg.log(f"⚠️ 실행 이력 카탈로그 갱신 실패: {e}", self.log_file)
+
+    # ⏱ 단계별 span → logs/<ts>/trace.json (chrome://tracing, Perfetto 로 열기)
+    def export_trace(self):
+        try:
+            path = trace.export(self.log_file.parent / "trace.json")
+            cfg.log(f"⏱ trace 저장 완료 → {path}", self.log_file)
+        except Exception as e:
+            cfg.log(f"⚠️ trace 저장 실패: {e}", self.log_file)
+
+    # 🧠 --memprofile: 단계별 메모리 기록 → logs/<ts>/memprofile.json
+    def export_memprofile(self):
+        if not memprof.enabled():
+            return
+        try:
+            path = memprof.export(self.log_file.parent / "memprofile.json")
+            cfg.log(f"🧠 메모리 프로파일 저장 완료 → {path}", self.log_file)
+        except Exception as e:
+            cfg.log(f"⚠️ 메모리 프로파일 저장 실패: {e}", self.log_file)
+
+
+# 🧪 견적이 한도를 넘으면 실행 거부
+def within_limits(totals: tuple[float, float] | None, max_cost: float | None, max_minutes: float | None) -> bool:
+    if totals is None:
+        return True
+    cost_krw, wall_sec = totals
+    if max_cost is not None and cost_krw > max_cost:
+        print(f"🛑 예상 비용 {cost_krw:,.1f}원 > 한도 {max_cost:,.1f}원 → 실행 중단")
+        return False
+    if max_minutes is not None and wall_sec / 60 > max_minutes:
+        print(f"🛑 예상 소요 {wall_sec / 60:.1f}분 > 한도 {max_minutes}분 → 실행 중단")
+        return False
+    return True
 
 
 if __name__ == "__main__":
-    runner = RunAllPipeline()
-    if len(sys.argv) == 1:
+    parser = argparse.ArgumentParser(description="git_auto 전체 파이프라인")
+    parser.add_argument("step", nargs="?", help="단일 단계만 실행 (extract, strategy, classify, explain, commit_msg, upload)")
+    parser.add_argument("--memprofile", action="store_true", help="단계별 메모리 기록 → logs/<ts>/memprofile.json")
+    parser.add_argument("--dry-run", action="store_true", help="LLM 호출 없이 토큰/비용/소요 시간 견적만 출력")
+    parser.add_argument("--max-cost", type=float, help="예상 비용(원)이 넘으면 실행 거부")
+    parser.add_argument("--max-minutes", type=float, help="예상 소요 시간(분)이 넘으면 실행 거부")
+    parser.add_argument("--resume", action="store_true",
+                        help="입력이 같은 마지막 미완료 실행을 첫 미완료 단계부터 이어서 실행 (journal 응답/비용 재사용, 변경 확인 생략)")
+    parser.add_argument("--deadline", type=float, help="실행 마감(분), 이후 저중요도 호출 취소 (기본: schedule.deadline_min)")
+    parser.add_argument("--force", action="store_true", help="git 상태가 마지막 실행과 같아도 실행")
+    args = parser.parse_args()
+
+    # ⚡ 전체 실행 전 변경 확인: 변경이 없거나 마지막 완료 실행과 같은 상태면 무거운 import/로그 폴더 생성 없이 종료
+    if not args.step and not args.force and not args.resume:
+        needed, reason = precheck.needs_run()
+        if not needed:
+            print(f"🛑 {reason} → 실행 생략 (--force 로 강제 실행)")
+            raise SystemExit(0)
+
+    if args.memprofile:
+        memprof.start()
+
+    if args.dry_run or args.max_cost is not None or args.max_minutes is not None:
+        # 견적 산출물은 <ts>_dry 에 따로 기록 (본 실행 결과와 섞이지 않도록)
+        real_timestamp = cfg.TIMESTAMP
+        cfg.DRY_RUN, cfg.TIMESTAMP = True, f"{real_timestamp}_dry"
+        totals = RunAllPipeline().run_estimate()
+        cfg.DRY_RUN, cfg.TIMESTAMP = False, real_timestamp
+        if not within_limits(totals, args.max_cost, args.max_minutes):
+            raise SystemExit(1)
+        if args.dry_run:
+            raise SystemExit(0)
+
+    resume = False
+    if args.resume:
+        # 📍 입력(HEAD, 변경 파일, 설정)이 같은 마지막 미완료 실행을 같은 타임스탬프로 이어서 실행
+        # → 끝난 단계/호출(journal)은 반복하지 않음
+        from scripts.checkpoint import git_snapshot, find_resumable
+        previous = find_resumable(git_snapshot())
+        if previous:
+            cfg.TIMESTAMP, resume = previous, True
+            print(f"📍 이전 실행 {previous} 이어서 실행 (기록된 LLM 응답/비용 재사용)")
+        else:
+            print("📍 이어서 실행할 미완료 실행 없음 → 새로 실행")
+
+    runner = RunAllPipeline(resume=resume)
+    runner.set_deadline(args.deadline)
+    if not args.step:
         runner.run_all()
     else:
-        step = sys.argv[1]
-        method = getattr(runner, f"run_{step}", None)
+        method = getattr(runner, f"run_{args.step}", None)
         if callable(method):
             method()
+            runner.ctx.flush()
+            runner.record_cost()
+            runner.index_catalog()
+            runner.export_trace()
+            runner.export_memprofile()
         else:
-            print(f"❌ 지원되지 않는 실행 단계: {step}")
+            print(f"❌ 지원되지 않는 실행 단계: {args.step}")
@@ -0,0 +1,146 @@
+import math
+import threading
+
+from utils import exchange
+from utils.cfg import cfg
+from utils.metrics import MetricsStore
+from scripts.cost_ledger import CostLedger, month_key
+
+# 💸 실행/월 단위 비용 한도 (user_config 'budget')
+# - 호출 전 최악 비용(입력 + max_tokens 출력)을 예약 → 한도를 절대 넘지 않음
+# - 절감 단계 판단은 예상 비용(이력 평균 출력 토큰) 기준
+# - 사용률에 따라 단계적 절감:
+#   1) 설명 대상 파일을 keyword_only 로 전환
+#   2) 더 저렴한 모델로 라우팅
+#   3) 중요도 낮은 파일은 설명 생략
+LEVEL_KEYWORD_ONLY, LEVEL_CHEAP_MODEL, LEVEL_SKIP_LOW = 1, 2, 3
+LEVEL_NAMES = {0: "정상", 1: "keyword_only 전환", 2: "저가 모델 라우팅", 3: "저중요도 설명 생략"}
+DEFAULT_DEGRADE_AT = [0.5, 0.7, 0.85]
+DEFAULT_LOW_IMPORTANCE = 5
+HISTORY_WINDOW_SEC = 30 * 86400
+
+
+# 📒 월 사용액 / 실행 비용: 비용 장부 rollup(cost/rollup/YY_MM.json) 의 실행별 합계
+def load_month_spent(timestamp: str, exclude: str | None = None) -> float:
+    return CostLedger().month_spent(month_key(timestamp), exclude=exclude)
+
+
+def record_run_cost(timestamp: str, log_func=None) -> float:
+    """실행 종료 시 이번 실행 합계 확인 (호출 비용은 단계 저장마다 장부/rollup 에 이미 반영됨)"""
+    totals = CostLedger().run_totals(timestamp)
+    cost = totals["cost_krw"] if totals else 0.0
+    if log_func:
+        log_func(f"💸 이번 실행 비용 {cost:,.1f}원 → {cfg.COST_DIR / 'rollup' / (month_key(timestamp) + '.json')}")
+    return cost
+
+
+def cheaper_config(config: dict) -> dict:
+    """출력 단가가 가장 낮은 등록 모델을 맨 앞에 둔 설정 (기존 fallback 체인은 그 뒤에 유지, 이미 최저가면 그대로)"""
+    cheapest = min(cfg.MODEL_RATES, key=lambda m: cfg.MODEL_RATES[m]["output"])
+    if cfg.MODEL_RATES.get(config["model"][0], {}).get("output", math.inf) <= cfg.MODEL_RATES[cheapest]["output"]:
+        return config
+    chain = [(cfg.MODEL_PROVIDER[cheapest], cheapest)] + [
+        (p, m) for p, m in zip(config["provider"], config["model"]) if m != cheapest
+    ]
+    return {**config, "provider": [p for p, _ in chain], "model": [m for _, m in chain]}
+
+
+class BudgetGovernor:
+    def __init__(self, timestamp: str, log_func=None):
+        conf = cfg.get_user_config().get("budget") or {}
+        self.timestamp = timestamp
+        self.log = log_func or (lambda m: None)
+        self.degrade_at = conf.get("degrade_at", DEFAULT_DEGRADE_AT)
+        self.low_importance = conf.get("low_importance", DEFAULT_LOW_IMPORTANCE)
+
+        caps = []
+        run_cap = self._krw(conf, "run")
+        if run_cap is not None:
+            caps.append(run_cap)
+        month_cap = self._krw(conf, "month")
+        if month_cap is not None:
+            month_spent = load_month_spent(timestamp, exclude=timestamp)
+            caps.append(max(month_cap - month_spent, 0.0))
+            self.log(f"💸 이번 달 사용액 {month_spent:,.1f}원 / 한도 {month_cap:,.1f}원")
+        self.limit = min(caps) if caps else None
+
+        self.spent = 0.0
+        self.reserved = 0.0
+        self._level = 0
+        self._lock = threading.Condition()
+        self._avg_out: dict | None = None
+        if self.limit is not None:
+            self.log(f"💸 이번 실행 예산 한도: {self.limit:,.1f}원")
+
+    def _krw(self, conf: dict, scope: str) -> float | None:
+        if conf.get(f"{scope}_krw") is not None:
+            return float(conf[f"{scope}_krw"])
+        if conf.get(f"{scope}_usd") is not None:
+            return float(conf[f"{scope}_usd"]) * exchange.get_rate(log_func=self.log)  # 한도는 확정 환율로
+        return None
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit is not None
+
+    def worst_case_krw(self, model: str, tokens_in: int, max_tokens: int) -> float:
+        usd = cfg.calc_cost(model, tokens_in, "input") + cfg.calc_cost(model, max_tokens, "output")
+        return usd * exchange.reserve_rate()  # 환율 조회를 기다리지 않되, 확정 전이면 높게 잡아 한도 초과 방지
+
+    def expected_krw(self, stage: str, model: str, tokens_in: int, max_tokens: int) -> float:
+        """이력 평균 출력 토큰 기준 예상 비용 (이력 없으면 최악 비용)"""
+        if self._avg_out is None:
+            try:
+                rows = MetricsStore().stats(HISTORY_WINDOW_SEC)
+            except Exception:
+                rows = []
+            self._avg_out = {(r["model"], r["stage"]): r["avg tokens out"] for r in rows if r["avg tokens out"]}
+        tokens_out = min(self._avg_out.get((model, stage), max_tokens), max_tokens)
+        return self.worst_case_krw(model, tokens_in, tokens_out)
+
+    def level(self, extra_krw: float = 0.0) -> int:
+        """사용(+예약+예정) 비율 기준 절감 단계. 단계가 오를 때마다 로그"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            used = self.spent + self.reserved + extra_krw
+            ratio = used / self.limit if self.limit else math.inf
+            level = sum(1 for t in self.degrade_at if ratio >= t)
+            if level > self._level:
+                self.log(f"💸 예산 사용률 {ratio:.0%} ({used:,.1f}/{self.limit:,.1f}원) → "
+                         f"{level}단계: {LEVEL_NAMES[level]}")
+                self._level = level
+            return level
+
+    def reserve(self, amount_krw: float) -> bool:
+        """진행 중인 호출이 정산되면 여유가 생길 수 있으므로 대기, 실제 사용액만으로도 넘으면 거부"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            while self.spent + self.reserved + amount_krw > self.limit:
+                if self.reserved <= 0 or self.spent + amount_krw > self.limit:
+                    return False
+                self._lock.wait()
+            self.reserved += amount_krw
+            return True
+
+    def settle(self, reserved_krw: float, actual_krw: float):
+        with self._lock:
+            if self.enabled:
+                self.reserved -= reserved_krw
+            self.spent += actual_krw
+            self._lock.notify_all()
+
+
+_governor: BudgetGovernor | None = None
+_governor_lock = threading.Lock()
+
+
+# ✅ 프로세스 단위 공용 governor (실행 타임스탬프 기준)
+def get_governor(log_func=None) -> BudgetGovernor:
+    global _governor
+    with _governor_lock:
+        timestamp = cfg.get_timestamp()
+        if _governor is None or _governor.timestamp != timestamp:
+            _governor = BudgetGovernor(timestamp, log_func)
+        return _governor
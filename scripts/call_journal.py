@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from utils.cfg import cfg
+
+
+class CallJournal:
+    """
+    LLM 호출 단위 append-only 기록 (results/<ts>/journal.jsonl)
+    - 호출이 끝나는 즉시 한 줄 기록 + fsync → 프로세스가 죽어도 완료된 호출은 남음
+    - 같은 입력의 미완료 실행을 이어서 실행하면(--resume) 같은 (단계, tag, 프롬프트 해시) 호출은 기록된 응답으로 대체
+    - in/out 장부에 반영된 호출은 "saved" 줄로 표시 → 재사용 시 비용을 두 번 집계하지 않음
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._calls: dict[str, dict] = {}
+        self._saved: set[str] = set()
+        self._load()
+        # 이전 프로세스에서 끝났지만 장부에 저장되지 못한 호출 (산출물 파일이 재사용돼 다시 호출되지 않는 경우 포함)
+        self._carried = {key for key in self._calls if key not in self._saved}
+
+    @staticmethod
+    def key(stage: str, tag: str, prompt: str) -> str:
+        return f"{stage}:{tag}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]}"
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 기록 도중 종료된 마지막 줄
+            if entry.get("type") == "call":
+                self._calls[entry["key"]] = entry
+            elif entry.get("type") == "saved":
+                self._saved.update(entry["keys"])
+
+    def _append(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def lookup(self, key: str) -> dict | None:
+        return self._calls.get(key)
+
+    def is_saved(self, key: str) -> bool:
+        return key in self._saved
+
+    def take_carried(self, stage: str) -> list[dict]:
+        """이 단계의 이월 호출을 한 번만 꺼냄 (장부 반영 후 mark_saved)"""
+        with self._lock:
+            keys = [key for key in self._carried if key.startswith(f"{stage}:")]
+            self._carried.difference_update(keys)
+        return [self._calls[key] for key in keys]
+
+    def record(self, key: str, response: str, usage: dict, record: dict):
+        entry = {"type": "call", "key": key, "response": response, "usage": usage, "record": record}
+        self._append(entry)
+        with self._lock:
+            self._calls[key] = entry
+
+    def mark_saved(self, keys: list[str]):
+        if not keys:
+            return
+        self._append({"type": "saved", "keys": keys})
+        with self._lock:
+            self._saved.update(keys)
+
+
+_journal: CallJournal | None = None
+_journal_lock = threading.Lock()
+
+
+# ✅ 프로세스 단위 공용 journal (실행 타임스탬프 기준)
+def get_journal(timestamp: str) -> CallJournal:
+    global _journal
+    with _journal_lock:
+        path = cfg.get_results_path(timestamp)["journal"]
+        if _journal is None or _journal.path != path:
+            _journal = CallJournal(path)
+        return _journal
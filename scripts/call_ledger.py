@@ -0,0 +1,93 @@
+import threading
+from typing import NamedTuple
+import pandas as pd
+
+IN_COLUMNS = ["prompt", "llm", "meta data", "token", "cached token", "cost($)", "cost(krw)",
+              "cache saving(krw)", "routing saving(krw)", "name4save", "save_path"]
+OUT_COLUMNS = ["prompt", "llm", "meta data", "purpose", "Is upload", "upload pf",
+               "token", "cost($)", "cost(krw)", "latency(s)", "ttft(s)", "tok/s",
+               "name4save", "save_path"]
+# 💸 비용 장부(scripts.cost_ledger) 한 행 = 호출 1건
+COST_COLUMNS = ["run", "day", "stage", "tag", "file", "model", "tokens_in", "cached", "tokens_out",
+                "cost_usd", "cost_krw", "cache_saving_krw", "routing_saving_krw"]
+
+
+class CallRecord(NamedTuple):
+    tag: str
+    llm: str
+    meta_data: str
+    purpose: str
+    token_in: int
+    token_out: int
+    cost_in: float
+    cost_out: float
+    name4save: str | None
+    save_path: list | None
+    latency: float | None = None
+    ttft: float | None = None
+    tps: float | None = None
+    cached: int = 0
+    cache_saving: float = 0.0
+    route_saving: float = 0.0  # 라우팅으로 기본 모델 대신 보낸 경우 절감액(USD)
+    file: str | None = None  # 단일 파일 호출이면 대상 파일명 (묶음/전략 호출은 None)
+
+
+class CallLedger:
+    """
+    LLM 호출 기록용 append-only 장부
+    - 워커 스레드에서 동시에 append 해도 안전 (lock)
+    - DataFrame 변환은 저장 시점에 한 번만 수행
+    """
+
+    def __init__(self):
+        self._records: list[CallRecord] = []
+        self._saved = 0
+        self._lock = threading.Lock()
+
+    def append(self, record: CallRecord):
+        with self._lock:
+            self._records.append(record)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def drain(self) -> list[CallRecord]:
+        """아직 저장되지 않은 기록만 반환하고 저장 완료로 표시"""
+        with self._lock:
+            pending = self._records[self._saved:]
+            self._saved = len(self._records)
+            return pending
+
+    @staticmethod
+    def to_frames(records: list[CallRecord], exchange_rate: float) -> tuple[pd.DataFrame, pd.DataFrame]:
+        in_df = pd.DataFrame([{
+            "prompt": r.tag, "llm": r.llm, "meta data": r.meta_data,
+            "token": r.token_in, "cached token": r.cached, "cost($)": r.cost_in,
+            "cost(krw)": round(r.cost_in * exchange_rate, 4),
+            "cache saving(krw)": round(r.cache_saving * exchange_rate, 4),
+            "routing saving(krw)": round(r.route_saving * exchange_rate, 4),
+            "name4save": r.name4save, "save_path": r.save_path
+        } for r in records], columns=IN_COLUMNS)
+        out_df = pd.DataFrame([{
+            "prompt": r.tag, "llm": r.llm, "meta data": r.meta_data, "purpose": r.purpose,
+            "Is upload": False, "upload pf": "", "token": r.token_out,
+            "cost($)": r.cost_out, "cost(krw)": round(r.cost_out * exchange_rate, 4),
+            "latency(s)": r.latency, "ttft(s)": r.ttft, "tok/s": r.tps,
+            "name4save": r.name4save, "save_path": r.save_path
+        } for r in records], columns=OUT_COLUMNS)
+        return in_df, out_df
+
+    @staticmethod
+    def to_cost_frame(records: list[CallRecord], run: str, day: str, exchange_rate: float) -> pd.DataFrame:
+        """비용 장부용 (호출 단위 토큰 + USD/KRW), 컬럼 단위로 한 번에 계산"""
+        df = pd.DataFrame(records, columns=CallRecord._fields)
+        usd = df["cost_in"] + df["cost_out"]
+        return pd.DataFrame({
+            "run": run, "day": day, "stage": df["meta_data"].fillna("").str.split(":").str[0],
+            "tag": df["tag"], "file": df["file"], "model": df["llm"],
+            "tokens_in": df["token_in"], "cached": df["cached"], "tokens_out": df["token_out"],
+            "cost_usd": usd, "cost_krw": (usd * exchange_rate).round(4),
+            "cache_saving_krw": (df["cache_saving"] * exchange_rate).round(4),
+            "routing_saving_krw": (df["route_saving"] * exchange_rate).round(4),
+        }, columns=COST_COLUMNS)
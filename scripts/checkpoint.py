@@ -0,0 +1,193 @@
+import hashlib
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from utils.cfg import cfg
+from utils.artifacts import get_store
+from scripts.precheck import git, changed_files
+
+# 📍 단계별 체크포인트 (results/<ts>/checkpoint/)
+# - inputs.json: 실행 시작 시점의 git 상태 (HEAD + 변경 파일 내용 해시)
+# - <stage>.started / <stage>.done: 단계 입력 fingerprint (설정/모델 + 이전 단계 fingerprint 연쇄)
+# - <stage>.progress.json: 단계 내부 진행 상황 (업로드의 커밋 완료 파일 등)
+# --resume: 입력이 같은 마지막 미완료 실행을 찾아, 완료된 앞 단계는 건너뛰고 첫 미완료 단계부터 이어서 실행
+STAGES = ["extract", "strategy", "classify", "explain", "commit_msg", "upload"]
+
+# 단계별 입력: llm 설정 이름 / user_config 섹션 / 프롬프트 템플릿 포함 여부
+STAGE_INPUTS = {
+    "extract": {"sections": ["change detection"]},
+    "strategy": {"llm": "strategy"},
+    "classify": {},
+    "explain": {"llm": "explain", "sections": ["budget", "routing"]},
+    "commit_msg": {"llm": "mk_msg", "sections": ["style", "routing"], "prompts": True},
+    "upload": {"sections": ["notify", "record", "timezone"]},
+}
+
+
+def _digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()[:16]
+
+
+def file_sha(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    except OSError:
+        return "missing"
+
+
+def git_snapshot() -> dict:
+    """HEAD + 변경 감지 대상 파일별 내용 해시 (precheck / ext_info 와 같은 기준 → 실행 산출물은 제외)"""
+    root, changed = changed_files()
+    files = {path: file_sha(root / path) for _, path in changed}
+    return {"head": git(["rev-parse", "HEAD"]), "files": files}
+
+
+def _prompts_digest() -> str:
+    return _digest({str(p.relative_to(cfg.PROMPT_DIR)): file_sha(p)
+                    for p in sorted(cfg.PROMPT_DIR.rglob("*")) if p.is_file()})
+
+
+def has_output(path: Path) -> bool:
+    """이전 실행의 LLM 응답이 재사용 가능한지 (비어 있거나 실패/취소 기록이면 다시 생성)"""
+    try:
+        text = get_store().read_text(path).strip()
+    except OSError:
+        return False
+    return bool(text) and not text.startswith("[ERROR]")
+
+
+class RunCheckpoint:
+    def __init__(self, timestamp: str):
+        self.timestamp = timestamp
+        self.dir = cfg.RESULTS_DIR / timestamp / "checkpoint"
+        self._fingerprints: dict[str, str] = {}
+
+    # 📸 실행 입력 (git 상태)
+    @property
+    def inputs_path(self) -> Path:
+        return self.dir / "inputs.json"
+
+    def load_inputs(self) -> dict | None:
+        try:
+            return json.loads(self.inputs_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def reset(self, snapshot: dict):
+        """새 실행: 같은 타임스탬프의 이전 표시를 지우고 입력 기록"""
+        if self.dir.exists():
+            for marker in self.dir.iterdir():
+                marker.unlink()
+        self._fingerprints.clear()
+        self.save_inputs(snapshot)
+
+    def save_inputs(self, snapshot: dict):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.inputs_path.write_text(json.dumps(snapshot, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def inputs_match(self, current: dict) -> bool:
+        """
+        기록된 변경 파일 내용이 그대로이고 새 변경 파일이 없으면 동일 입력으로 판단
+        업로드 단계가 시작된 뒤라면 일부 파일이 이미 커밋됐을 수 있으므로
+        HEAD 가 기록 시점 HEAD 의 후손이면 허용
+        """
+        recorded = self.load_inputs()
+        if recorded is None:
+            return False
+        if any(path not in recorded["files"] for path in current["files"]):
+            return False
+        root = Path(git(["rev-parse", "--show-toplevel"]) or ".")
+        if any(file_sha(root / path) != sha for path, sha in recorded["files"].items()):
+            return False
+        if current["head"] == recorded["head"]:
+            return True
+        return (self._marker("upload", "started").exists()
+                and subprocess.run(["git", "merge-base", "--is-ancestor", recorded["head"], current["head"]],
+                                   capture_output=True).returncode == 0)
+
+    # 🔗 단계 fingerprint: 단계 입력 + 실행 입력 + 이전 단계 fingerprint
+    def fingerprint(self, stage: str) -> str:
+        if stage not in self._fingerprints:
+            spec = STAGE_INPUTS[stage]
+            user_conf = cfg.get_user_config()
+            idx = STAGES.index(stage)
+            parts = {
+                "stage": stage,
+                "prev": self.fingerprint(STAGES[idx - 1]) if idx else _digest(self.load_inputs()),
+                "sections": {s: user_conf.get(s) for s in spec.get("sections", [])},
+            }
+            if spec.get("llm"):
+                parts["llm"] = cfg.get_llm_config(spec["llm"])
+            if spec.get("prompts"):
+                parts["prompts"] = _prompts_digest()
+            self._fingerprints[stage] = _digest(parts)
+        return self._fingerprints[stage]
+
+    def _marker(self, stage: str, kind: str) -> Path:
+        return self.dir / f"{stage}.{kind}"
+
+    def _marked(self, stage: str, kind: str) -> bool:
+        try:
+            marker = json.loads(self._marker(stage, kind).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return False
+        return marker.get("fingerprint") == self.fingerprint(stage)
+
+    def _mark(self, stage: str, kind: str):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._marker(stage, kind).write_text(json.dumps({
+            "fingerprint": self.fingerprint(stage),
+            "at": datetime.now().isoformat(timespec="seconds"),
+        }), encoding="utf-8")
+
+    def is_done(self, stage: str) -> bool:
+        return self._marked(stage, "done")
+
+    def begin(self, stage: str) -> bool:
+        """단계 시작 표시. 같은 입력으로 시작했다가 끝나지 않은 단계면 True (파일 단위 결과 재사용 가능)"""
+        reuse = self._marked(stage, "started")
+        if not reuse:
+            self._marker(stage, "progress.json").unlink(missing_ok=True)
+        self._mark(stage, "started")
+        return reuse
+
+    def mark_done(self, stage: str):
+        self._mark(stage, "done")
+
+    def invalidate_from(self, stage: str):
+        """이 단계부터 이후 단계 완료 표시 삭제 (앞 단계 결과가 바뀌었으므로)"""
+        for later in STAGES[STAGES.index(stage):]:
+            self._marker(later, "done").unlink(missing_ok=True)
+
+    # 📒 단계 내부 진행 상황
+    def load_progress(self, stage: str) -> dict:
+        try:
+            return json.loads(self._marker(stage, "progress.json").read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def save_progress(self, stage: str, progress: dict):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._marker(stage, "progress.json").write_text(json.dumps(progress, ensure_ascii=False, indent=2),
+                                                        encoding="utf-8")
+
+
+def find_resumable(snapshot: dict) -> str | None:
+    """
+    체크포인트가 있는 가장 최근 실행이 미완료이고 입력이 같으면 그 타임스탬프
+    - 그 실행이 끝까지 완료됐거나 입력이 다르면 더 이전 실행은 보지 않음 (오래된 결과로 되돌아가지 않도록)
+    """
+    if not cfg.RESULTS_DIR.exists():
+        return None
+    for run_dir in sorted(cfg.RESULTS_DIR.iterdir(), reverse=True):
+        if not run_dir.is_dir() or run_dir.name.endswith("_dry"):
+            continue
+        checkpoint = RunCheckpoint(run_dir.name)
+        if checkpoint.load_inputs() is None:
+            continue
+        if checkpoint.is_done(STAGES[-1]) or not checkpoint.inputs_match(snapshot):
+            return None
+        return run_dir.name
+    return None
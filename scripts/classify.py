@@ -1,12 +1,17 @@
 import json
 from pathlib import Path
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
 import pandas as pd
 from utils.cfg import cfg
+from utils.artifacts import get_store
+from scripts.dataframe import load_df
+from scripts.cost_ledger import CostLedger, frames_totals
+from scripts.run_context import RunContext, stage_entry
 
-def classify_main() -> dict:
-    timestamp = cfg.get_timestamp()
-    log_file = cfg.init_log_file(timestamp)
+@stage_entry
+def classify_main(ctx: RunContext) -> dict:
+    timestamp = ctx.timestamp
+    log_file = ctx.log_file
     log_dir = cfg.LOGS_DIR / timestamp
 
     result = {
@@ -17,48 +22,47 @@ def classify_main() -> dict:
             "commits": [],
             "cost_total": "",
             "cost_breakdown": {},
+            "cache_saving": "",
+            "routing_saving": "",
             "review_files": []
         }
     }
 
-    # ✅ 커밋 메시지 수집
-    for file in sorted(log_dir.glob("commit_out_*.txt")):
-        filename = file.stem.replace("commit_out_", "")
-        result["commit"][filename] = file.read_text(encoding="utf-8")
-
-    # ✅ 기능 요약 수집
-    for file in sorted(log_dir.glob("fx_out_*.txt")):
-        filename = file.stem.replace("fx_out_", "")
-        result["fx_summary"][filename] = file.read_text(encoding="utf-8")
+    # ✅ 커밋 메시지 / 기능 요약 수집 (save_path: [diff, explain_in, explain_out, mk_msg_in, mk_msg_out])
+    # 응답이 없거나 실패/취소된 파일은 제외 → upload 단계에서 fallback 커밋 메시지 사용
+    strategy_df = ctx.frame("strategy")
+    rows = strategy_df.sort_values("File") if strategy_df is not None else pd.DataFrame()
+    store = get_store()
+    for _, row in rows.iterrows():
+        save_path = row.get("save_path")
+        if not isinstance(save_path, list) or len(save_path) < 5:
+            continue
+        for key, out_path in (("commit", save_path[4]), ("fx_summary", save_path[2])):
+            path = Path(out_path)
+            if not store.exists(path):
+                continue
+            text = store.read_text(path).strip()
+            if text and not text.startswith("[ERROR]"):
+                result[key][row["File"]] = text
 
     # ✅ 정렬된 커밋 순서 유지
     result["notify"]["commits"] = list(result["commit"].values())
 
-    # ✅ 비용 계산
+    # ✅ 비용 계산: 비용 장부 rollup 의 이번 실행 합계 (장부 도입 전 실행은 in/out 장부에서 계산)
     try:
-        paths = cfg.get_results_path(timestamp)
-        cost_total = 0.0
-        cost_breakdown = defaultdict(float)
-
-        for path in [paths["in"], paths["out"]]:
-            if not path.exists():
-                continue
-            df = pd.read_pickle(path)
-            if df.empty or "cost(krw)" not in df.columns:
-                continue
-
-            df["cost(krw)"] = pd.to_numeric(df["cost(krw)"], errors="coerce").fillna(0)
-
-            for meta in df["meta data"].dropna().unique():
-                stage = str(meta).split(":")[0]
-                stage_df = df[df["meta data"] == meta]
-                stage_cost = stage_df["cost(krw)"].sum()
-                cost_breakdown[stage] += stage_cost
-                cost_total += stage_cost
+        totals = CostLedger().run_totals(timestamp)
+        if totals is None or "cache_saving_krw" not in totals:
+            totals = frames_totals([load_df(ctx.paths[key], columns=[
+                "meta data", "cost(krw)", "cache saving(krw)", "routing saving(krw)"]) for key in ("in", "out")])
+        cost_total = totals.get("cost_krw", 0.0)
+        routing_saving = totals.get("routing_saving_krw", 0.0)
 
         result["notify"]["cost_total"] = f"💸 전체 LLM 사용 비용: {cost_total:,.0f}원"
+        result["notify"]["cache_saving"] = f"♻️ prefix cache 절감액: {totals.get('cache_saving_krw', 0.0):,.0f}원"
+        if routing_saving:
+            result["notify"]["routing_saving"] = f"🔀 모델 라우팅 절감액: {routing_saving:,.0f}원"
         result["notify"]["cost_breakdown"] = {
-            k: f"{v:,.0f}원" for k, v in cost_breakdown.items()
+            k: f"{v:,.0f}원" for k, v in totals.get("stages", {}).items()
         }
 
     except Exception as e:
@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from utils.cfg import cfg
+from scripts import run_store
+from scripts.call_ledger import CallLedger, CallRecord, COST_COLUMNS
+
+# 💸 비용 장부 (append-only, 월 단위 파티션)
+# - cost/ledger/YY_MM/<run>_<stage>_<ms>.parquet: 단계 저장(save_all)마다 호출 단위 행을 새 part 로 추가 (수정 없음)
+# - cost/rollup/YY_MM.json: part 를 추가할 때마다 그 part 의 groupby 합계만 더해 두는 월별 집계
+#   → 알림 요약 / 월 예산 계산은 rollup 만 읽음 (장부 재스캔 없음)
+# - rollup 에 반영되지 않은 part(중단, 다른 프로세스)는 읽을 때 이어서 반영, rebuild 로 언제든 재계산
+# - 이전 형식 cost/YY_MM.txt ("timestamp<TAB>krw") 는 rollup 이 처음 만들어질 때 실행 합계로만 가져옴
+# - dry-run(cfg.DRY_RUN) 중에는 읽기만 함: part 추가 / rollup 파일 생성·갱신 없음
+# 사용: python -m scripts.cost_ledger report [--month 25_05] [--by stage|model|file|day|run] | rebuild [--month]
+METRICS = ["tokens_in", "cached", "tokens_out", "cost_usd", "cost_krw", "cache_saving_krw", "routing_saving_krw"]
+DIMENSIONS = ["run", "stage", "model", "file", "day"]
+
+
+def month_key(timestamp: str) -> str:
+    """'250518_1034' → '25_05' (월 파티션 / rollup 파일명)"""
+    return f"{timestamp[:2]}_{timestamp[2:4]}"
+
+
+def summarize(df: pd.DataFrame) -> dict:
+    """장부 행 → {"total", "by_<차원>", "by_run_stage"} 합계 (차원별 groupby 한 번씩)"""
+    df = df.assign(calls=1)
+    metrics = ["calls", *METRICS]
+    summary = {"total": {k: float(v) for k, v in df[metrics].sum().items()}}
+    for dim in DIMENSIONS:
+        grouped = df.dropna(subset=[dim]).groupby(dim, sort=False)[metrics].sum()
+        summary[f"by_{dim}"] = grouped.to_dict(orient="index")
+    by_run_stage = df.groupby(["run", "stage"], sort=False)["cost_krw"].sum()
+    summary["by_run_stage"] = {}
+    for (run, stage), krw in by_run_stage.items():
+        summary["by_run_stage"].setdefault(run, {})[stage] = float(krw)
+    return summary
+
+
+def _add(target: dict, delta: dict):
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            _add(target.setdefault(key, {}), value)
+        else:
+            target[key] = round(target.get(key, 0.0) + float(value), 6)
+
+
+def frames_totals(frames: list[pd.DataFrame | None]) -> dict:
+    """장부가 없는 실행용: in/out DataFrame 에서 같은 형태의 실행 합계 계산"""
+    totals = {"cost_krw": 0.0, "cache_saving_krw": 0.0, "routing_saving_krw": 0.0, "stages": {}}
+    for df in frames:
+        if df is None or df.empty or "cost(krw)" not in df.columns:
+            continue
+        cost = pd.to_numeric(df["cost(krw)"], errors="coerce").fillna(0)
+        totals["cost_krw"] += float(cost.sum())
+        for col, key in (("cache saving(krw)", "cache_saving_krw"), ("routing saving(krw)", "routing_saving_krw")):
+            if col in df.columns:
+                totals[key] += float(pd.to_numeric(df[col], errors="coerce").fillna(0).sum())
+        stage = df["meta data"].dropna().astype(str).str.split(":").str[0]
+        _add(totals["stages"], cost[stage.index].groupby(stage).sum().to_dict())
+    return totals
+
+
+class CostLedger:
+    def __init__(self, root: Path | None = None):
+        self.root = root or cfg.COST_DIR
+        self.ledger_dir = self.root / "ledger"
+        self.rollup_dir = self.root / "rollup"
+
+    def _parts(self, month: str) -> list[Path]:
+        folder = self.ledger_dir / month
+        return sorted(folder.glob("*.parquet")) + sorted(folder.glob("*.pkl")) if folder.exists() else []
+
+    def _rollup_path(self, month: str) -> Path:
+        return self.rollup_dir / f"{month}.json"
+
+    # 📒 단계 저장 시점 기록: part 1개 추가 + 그 part 합계만 rollup 에 더함
+    def append(self, run: str, stage: str, records: list[CallRecord], exchange_rate: float) -> Path | None:
+        if not records or cfg.DRY_RUN:
+            return None
+        day = datetime.now().strftime("%Y-%m-%d")
+        df = CallLedger.to_cost_frame(records, run, day, exchange_rate)
+        month = month_key(run)
+        path = self.ledger_dir / month / f"{run}_{stage}_{int(time.time() * 1000)}.parquet"
+        with _rollup_lock:  # part 기록 ~ rollup 반영 사이에 rollup() 이 같은 part 를 중복 반영하지 않도록
+            run_store.write(df, path, table="cost")
+            rollup = self._load(month)
+            if rollup is None:
+                self._save(month, self._build(month))
+            else:
+                _add(rollup, summarize(df))
+                rollup["parts"].append(path.stem)
+                self._save(month, rollup)
+        return path
+
+    def frame(self, month: str) -> pd.DataFrame:
+        """월 파티션 전체 (집계/리포트용)"""
+        frames = [run_store.read(p.with_suffix(".parquet")) for p in self._parts(month)]
+        frames = [f for f in frames if f is not None and not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COST_COLUMNS)
+
+    def _load(self, month: str) -> dict | None:
+        try:
+            return json.loads(self._rollup_path(month).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _save(self, month: str, rollup: dict):
+        if cfg.DRY_RUN:  # 견적 실행은 장부 상태를 남기지 않음 (계산한 rollup 은 메모리에서만 사용)
+            return
+        path = self._rollup_path(month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(rollup, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _legacy_runs(self, month: str) -> dict[str, float]:
+        path = self.root / f"{month}.txt"
+        runs = {}
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                parts = line.split("\t")
+                try:
+                    runs[parts[0]] = float(parts[1])
+                except (IndexError, ValueError):
+                    continue
+        return runs
+
+    def _build(self, month: str) -> dict:
+        parts = self._parts(month)
+        rollup = {"month": month, "parts": [p.stem for p in parts], "total": {}, "by_run": {}}
+        df = self.frame(month)
+        if not df.empty:
+            _add(rollup, summarize(df))
+        for run, krw in self._legacy_runs(month).items():  # 장부 도입 전 실행: 합계만
+            if run not in rollup["by_run"]:
+                rollup["by_run"][run] = {"cost_krw": krw, "legacy": 1}
+                _add(rollup["total"], {"cost_krw": krw})
+        return rollup
+
+    def rebuild(self, month: str) -> dict:
+        with _rollup_lock:
+            rollup = self._build(month)
+            self._save(month, rollup)
+            return rollup
+
+    def rollup(self, month: str) -> dict:
+        """월별 집계 (없으면 생성, 아직 반영 안 된 part 만 이어서 반영)"""
+        with _rollup_lock:
+            rollup = self._load(month)
+            if rollup is None:
+                rollup = self._build(month)
+                self._save(month, rollup)
+                return rollup
+            applied = set(rollup["parts"])
+            missing = [p for p in self._parts(month) if p.stem not in applied]
+            if missing:
+                for p in missing:
+                    df = run_store.read(p.with_suffix(".parquet"))
+                    if df is not None and not df.empty:
+                        _add(rollup, summarize(df))
+                    rollup["parts"].append(p.stem)
+                self._save(month, rollup)
+            return rollup
+
+    def run_totals(self, run: str) -> dict | None:
+        """실행 합계 {"cost_krw", "cache_saving_krw", "routing_saving_krw", "calls", "stages"} (장부에 없으면 None)"""
+        rollup = self.rollup(month_key(run))
+        totals = rollup["by_run"].get(run)
+        if totals is None:
+            return None
+        return {**totals, "stages": rollup.get("by_run_stage", {}).get(run, {})}
+
+    def month_spent(self, month: str, exclude: str | None = None) -> float:
+        by_run = self.rollup(month)["by_run"]
+        return float(sum(t.get("cost_krw", 0.0) for run, t in by_run.items() if run != exclude))
+
+
+_rollup_lock = threading.Lock()
+
+
+def print_report(rollup: dict, by: str, limit: int):
+    total = rollup.get("total", {})
+    print(f"💸 {rollup['month']}: {total.get('cost_krw', 0):,.1f}원 / 호출 {int(total.get('calls', 0))}건 "
+          f"(part {len(rollup['parts'])}개)")
+    rows = sorted(rollup.get(f"by_{by}", {}).items(), key=lambda kv: -kv[1].get("cost_krw", 0))[:limit]
+    if not rows:
+        return
+    width = max(len(str(k)) for k, _ in rows)
+    print(f"{by:<{width}}  {'calls':>6}  {'tokens in':>10}  {'tokens out':>10}  {'cost($)':>9}  {'cost(krw)':>10}")
+    for key, t in rows:
+        print(f"{key:<{width}}  {int(t.get('calls', 0)):>6}  {int(t.get('tokens_in', 0)):>10}  "
+              f"{int(t.get('tokens_out', 0)):>10}  {t.get('cost_usd', 0):>9.4f}  {t.get('cost_krw', 0):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 비용 장부 / 월별 집계")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="월별 집계 출력")
+    report.add_argument("--month", default=month_key(cfg.get_timestamp()), help="YY_MM (기본: 이번 달)")
+    report.add_argument("--by", choices=DIMENSIONS, default="stage")
+    report.add_argument("--limit", type=int, default=20)
+    rebuild = sub.add_parser("rebuild", help="장부 part 에서 월별 집계 재계산")
+    rebuild.add_argument("--month", default=month_key(cfg.get_timestamp()))
+    args = parser.parse_args()
+
+    ledger = CostLedger()
+    if args.command == "report":
+        print_report(ledger.rollup(args.month), args.by, args.limit)
+    else:
+        print_report(ledger.rebuild(args.month), "stage", 20)
+
+
+if __name__ == "__main__":
+    main()
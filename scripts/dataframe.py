@@ -1,11 +1,8 @@
 import pandas as pd
 from pathlib import Path
 from utils.cfg import cfg
-results = cfg.get_results_path(cfg.get_timestamp())
-REPO_PATH = results["repo"]
-INFO_PATH = results["info"]
-STRATEGY_PATH = results["strategy"]
-PROMPT_PATH = results["prompt"]
+from utils import trace
+from scripts import run_store
 def init_repo_df() -> pd.DataFrame:
     return pd.DataFrame(columns=[
         "Repo",               # 레포 이름
@@ -68,22 +65,25 @@ def convert_columns_to_kor(df: pd.DataFrame, mapping: dict) -> pd.DataFrame:
     return df.rename(columns=mapping)
 
 def save_df(df: pd.DataFrame, path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_pickle(path)
+    with trace.span(f"save {path.name}", "io"):
+        run_store.write(df, path)
 
-def load_df(path: Path) -> pd.DataFrame:
-    return pd.read_pickle(path) if path.exists() else None
+def load_df(path: Path, columns: list[str] | None = None) -> pd.DataFrame | None:
+    """columns 지정 시 해당 컬럼만 읽음 (없는 컬럼은 무시)"""
+    with trace.span(f"load {path.name}", "io"):
+        return run_store.read(path, columns)
 
 # 🧱 빈 데이터프레임 초기 생성 및 저장
 def init_df_and_save():
     """
     전체 주요 DataFrame 구조를 빈 상태로 초기화하고,
-    설정된 전역 경로에 저장합니다.
+    현재 실행 타임스탬프 경로에 저장합니다. (--resume 으로 타임스탬프가 바뀐 뒤에도 맞는 경로)
     """
-    save_df(init_repo_df(), REPO_PATH)
-    save_df(init_info_df([]), INFO_PATH)
-    save_df(init_strategy_df([]), STRATEGY_PATH)
+    paths = cfg.get_results_path(cfg.get_timestamp())
+    save_df(init_repo_df(), paths["repo"])
+    save_df(init_info_df([]), paths["info"])
+    save_df(init_strategy_df([]), paths["strategy"])
 
     # 입력/출력 프롬프트용
-    save_df(init_in_df(), PROMPT_PATH.with_name("in_prompt_df.pkl"))
-    save_df(init_out_df(), PROMPT_PATH.with_name("out_prompt_df.pkl"))
\ No newline at end of file
+    save_df(init_in_df(), paths["prompt"].with_name("in_prompt_df.parquet"))
+    save_df(init_out_df(), paths["prompt"].with_name("out_prompt_df.parquet"))
\ No newline at end of file
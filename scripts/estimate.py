@@ -0,0 +1,104 @@
+import math
+import threading
+from dataclasses import dataclass, field
+
+from utils.cfg import cfg
+from utils.metrics import MetricsStore
+
+# 🧪 dry-run 사전 견적 (runall.py --dry-run)
+# - LLMManager.call_all 이 dry-run 일 때 호출 대신 add_batch()로 배치 단위 기록
+# - 출력 토큰/지연은 metrics 이력 우선, 없으면 보수적 기본값
+DEFAULT_TOK_PER_SEC = 50.0
+DEFAULT_OVERHEAD_SEC = 1.0
+HISTORY_WINDOW_SEC = 30 * 86400
+
+# 전략 예측 응답 대신 채우는 값: 모든 파일이 설명/커밋 메시지 대상이 되도록 상한 기준으로 가정
+DRY_RUN_STRATEGY = {
+    "Required Commit Detail": 5,
+    "Component Type": "unknown",
+    "Importance": 8,
+    "Most Related Files": [],
+}
+
+
+@dataclass
+class Batch:
+    stage: str
+    provider: str
+    model: str
+    tokens_in: list[int]
+    max_tokens: int
+    workers: int
+    pause_sec: float = 0.0  # 직렬 호출 사이 대기 (non-fireworks)
+
+
+@dataclass
+class StageEstimate:
+    stage: str
+    calls: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost_usd: float = 0.0
+    wall_sec: float = 0.0
+    from_history: bool = False
+    models: set = field(default_factory=set)
+
+
+_batches: list[Batch] = []
+_lock = threading.Lock()
+
+
+def add_batch(batch: Batch):
+    with _lock:
+        _batches.append(batch)
+
+
+def build_report(metrics: MetricsStore | None = None) -> list[StageEstimate]:
+    metrics = metrics or MetricsStore()
+    history = {}
+    try:
+        for row in metrics.stats(HISTORY_WINDOW_SEC):
+            history[(row["provider"], row["model"], row["stage"])] = row
+    except Exception:
+        pass  # 이력 DB 손상/잠금 시 기본값으로 추정
+
+    stages: dict[str, StageEstimate] = {}
+    with _lock:
+        batches = list(_batches)
+    for b in batches:
+        est = stages.setdefault(b.stage, StageEstimate(b.stage))
+        hist = history.get((b.provider, b.model, b.stage))
+        avg_out = (hist or {}).get("avg tokens out")
+        out_per_call = int(avg_out) if avg_out else b.max_tokens
+        latency = (hist or {}).get("p50") or (out_per_call / DEFAULT_TOK_PER_SEC + DEFAULT_OVERHEAD_SEC)
+
+        n = len(b.tokens_in)
+        est.calls += n
+        est.tokens_in += sum(b.tokens_in)
+        est.tokens_out += out_per_call * n
+        est.cost_usd += cfg.calc_cost(b.model, sum(b.tokens_in), "input") + cfg.calc_cost(b.model, out_per_call * n, "output")
+        est.wall_sec += math.ceil(n / max(b.workers, 1)) * latency + b.pause_sec * n
+        est.from_history = est.from_history or hist is not None
+        est.models.add(b.model)
+    return list(stages.values())
+
+
+def summary_lines(report: list[StageEstimate], exchange_rate: float) -> list[str]:
+    lines = [f"{'stage':<10} {'model':<30} {'calls':>6} {'in tok':>9} {'out tok':>9} {'cost(krw)':>11} {'time(s)':>9}"]
+    total_krw, total_sec = 0.0, 0.0
+    for est in report:
+        krw = est.cost_usd * exchange_rate
+        total_krw += krw
+        total_sec += est.wall_sec
+        basis = "" if est.from_history else " *"
+        lines.append(f"{est.stage:<10} {', '.join(sorted(est.models)):<30} {est.calls:>6} {est.tokens_in:>9} "
+                     f"{est.tokens_out:>9} {krw:>11,.1f} {est.wall_sec:>9.1f}{basis}")
+    lines.append(f"{'합계':<10} {'':<30} {sum(e.calls for e in report):>6} {sum(e.tokens_in for e in report):>9} "
+                 f"{sum(e.tokens_out for e in report):>9} {total_krw:>11,.1f} {total_sec:>9.1f}")
+    lines.append("* 이력 없음 → max_tokens / 기본 처리량 기준 추정")
+    return lines
+
+
+def totals(report: list[StageEstimate], exchange_rate: float) -> tuple[float, float]:
+    """(총 비용 KRW, 총 소요 시간 초)"""
+    return (sum(e.cost_usd for e in report) * exchange_rate, sum(e.wall_sec for e in report))
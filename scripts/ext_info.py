@@ -7,35 +7,29 @@ from dateutil.parser import parse
 from collections import Counter
 import uuid
 
-from scripts.dataframe import init_info_df, init_strategy_df, save_df
+from scripts.dataframe import init_info_df, init_strategy_df
+from scripts.run_context import RunContext, stage_entry
 from utils.cfg import cfg
+from utils import trace, memprof
+from utils.artifacts import get_store
+from scripts.precheck import changed_files
 
 
 def run_git(args: list[str], cwd: Path = Path.cwd()) -> str:
-    result = subprocess.run(args, cwd=cwd, capture_output=True, text=True, encoding="utf-8")
+    with trace.span(" ".join(args[:2]), "git"):
+        result = subprocess.run(args, cwd=cwd, capture_output=True, text=True, encoding="utf-8")
     return result.stdout.strip()
 
-def get_changed_files(log_file) -> list[str]:
-    output = run_git(["git", "status", "--porcelain"])
-    lines = output.splitlines()
-    changed = []
-    allowed_exts = cfg.get_allowed_extensions(log_func=lambda msg: cfg.log(msg, log_file))
-    root = Path(run_git(["git", "rev-parse", "--show-toplevel"]))
+def file_id(path: str) -> str:
+    """파일 id: 저장소 상대 경로 기준 고정 값 → 다시 실행해도 프롬프트(와 journal 해시)가 바뀌지 않음"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, path))
 
-    for line in lines:
-        if not line.strip():
-            continue
-        status, path = line[:2].strip(), line[3:].strip()
-        full_path = root / path
-        if status in {"M", "A", "??"}:
-            if not full_path.exists():
-                cfg.log(f"[ext_info] ⚠️ Git status에 있으나 파일 없음 → 제외: {path}", log_file)
-                continue
-            if full_path.suffix not in allowed_exts:
-                cfg.log(f"[ext_info] ⏭️ 제외된 확장자: {path}", log_file)
-                continue
-            changed.append(path)
-    return changed
+def get_changed_files(log_file) -> list[str]:
+    # precheck 와 같은 기준 (porcelain 첫 줄의 앞 공백을 지우지 않도록 공용 파서 사용)
+    with trace.span("git status", "git"):
+        _, changed = changed_files(log_func=lambda m: cfg.log(m, log_file),
+                                   debug_func=lambda m: cfg.log(m, log_file, level="debug"))
+    return [path for _, path in changed]
 
 def extract_readme_token_and_strategy() -> tuple:
     root = Path(run_git(["git", "rev-parse", "--show-toplevel"]))
@@ -76,7 +70,7 @@ def extract_repo_info(readme_token: int, log_file) -> pd.DataFrame:
     branches = run_git(["git", "branch", "--format=%(refname:short)"]).splitlines()
     head = run_git(["git", "symbolic-ref", "--short", "HEAD"])
     default_branch = next((b for b in ["main", "master"] if b in branches), branches[0] if branches else None)
-    contributors = run_git(["git", "shortlog", "-sne"]).splitlines()
+    contributors = run_git(["git", "shortlog", "-sne", "HEAD"]).splitlines()
     recent_commit_count = len(run_git(["git", "log", "--since=14 days ago", "--oneline"]).splitlines())
     changed_files = get_changed_files(log_file)
     diff_stat = run_git(["git", "diff", "--stat", "--"] + changed_files)
@@ -106,10 +100,10 @@ def extract_info_and_strategy(files: list[str], readme_strategy: list, log_file,
 
     root = Path(run_git(["git", "rev-parse", "--show-toplevel"]))
 
-    # 1️⃣ UUID 및 파일명 초기값 삽입
+    # 1️⃣ id 및 파일명 초기값 삽입
     for i, f in enumerate(files):
         file_name = Path(f).name
-        info_df.at[i, "id"] = str(uuid.uuid4())
+        info_df.at[i, "id"] = file_id(f)
         strategy_df.at[i, "id"] = info_df.at[i, "id"]
         info_df.at[i, "file"] = file_name
         strategy_df.at[i, "File"] = file_name
@@ -154,9 +148,8 @@ def extract_info_and_strategy(files: list[str], readme_strategy: list, log_file,
 
         diff = run_git(["git", "diff", "--", str(f)])
         diff_token = len(enc.encode(diff))
-        diff_path = paths["diff"] / f"diff_{Path(name4save).stem}.txt" # diff 저장 경로는 str(paths["diff"] / f"diff_{namesave}.txt"),
-        diff_path.parent.mkdir(parents=True, exist_ok=True)
-        diff_path.write_text(diff, encoding="utf-8")
+        diff_path = Path(info_df.at[i, "save_path"][0])  # gen_msg 가 읽는 save_path 와 같은 경로
+        get_store().write_text(diff_path, diff)
 
         date_strs = run_git(["git", "log", "--pretty=format:%ad", "--date=iso", "--", str(f)]).splitlines()
         try:
@@ -202,10 +195,10 @@ def to_safe_filename(filename: str) -> str:
     return filename.replace("/", "_").replace("\\", "_").replace(" ", "_")
 
 # 전체 통합 실행
-def extract_all_info() -> bool:
-    timestamp = cfg.get_timestamp()
-    paths = cfg.get_results_path(timestamp)
-    log_file = cfg.init_log_file(timestamp)
+@stage_entry
+def extract_all_info(ctx: RunContext) -> bool:
+    paths = ctx.paths
+    log_file = ctx.log_file
     readme_token, readme_strategy = extract_readme_token_and_strategy()
     repo_df = extract_repo_info(readme_token, log_file)
     files = repo_df.iloc[0]["Diff list"]
@@ -219,9 +212,11 @@ def extract_all_info() -> bool:
         info_df, strategy_df = extract_info_and_strategy(files, readme_strategy, log_file, paths)
         updated = True
 
-    save_df(repo_df, paths["repo"])
-    save_df(info_df, paths["info"])
-    save_df(strategy_df, paths["strategy"])
+    memprof.note("info_df", info_df)
+    memprof.note("strategy_df", strategy_df)
+    ctx.put("repo", repo_df)
+    ctx.put("info", info_df)
+    ctx.put("strategy", strategy_df)
     cfg.log("✅ 정보 수집 완료", log_file)
 
     return updated
@@ -1,12 +1,11 @@
 import json
 from pathlib import Path
 import pandas as pd
-from scripts.dataframe import load_df, save_df
+from scripts.run_context import RunContext, stage_entry
 from utils.cfg import cfg
 
 def classify_file_strategy(row: pd.Series) -> str:
-    file_tok = row.get("file token", 0) or 0
-    diff_tok = row.get("diff token", 0) or 0
+    file_tok, diff_tok = (0 if pd.isna(row.get(col)) else row.get(col) for col in ("file token", "diff token"))
 
     if file_tok <= 300 and diff_tok <= 200:
         return "full_pass"
@@ -14,12 +13,12 @@ def classify_file_strategy(row: pd.Series) -> str:
         return "mid_focus"
     return "keyword_only"
 
-def fst_mapper_main():
-    timestamp = cfg.get_timestamp()
-    paths = cfg.get_results_path(timestamp)
-    log_file = cfg.init_log_file(timestamp)
+@stage_entry
+def fst_mapper_main(ctx: RunContext):
+    paths = ctx.paths
+    log_file = ctx.log_file
 
-    df = load_df(paths["strategy"])
+    df = ctx.frame("strategy")
     if df is None or df.empty:
         cfg.log("⚠️ strategy_df 불러오기 실패 또는 빈 상태", log_file)
         return
@@ -38,10 +37,11 @@ def fst_mapper_main():
     # ⚠️ 중요도 9 이상 수집
     review_files = df[df["Importance"].fillna(0) >= 9]["File"].tolist()
     review_path = paths["strategy"].parent / "manual_review.json"
+    review_path.parent.mkdir(parents=True, exist_ok=True)  # df 체크포인트보다 먼저 기록될 수 있음
     with open(review_path, "w", encoding="utf-8") as f:
         json.dump(review_files, f, ensure_ascii=False, indent=2)
     cfg.log(f"⚠️ 중요도 9 이상 파일 {len(review_files)}개 기록 완료 → {review_path}", log_file)
 
     # 💾 결과 저장
-    save_df(df, paths["strategy"])
+    ctx.put("strategy", df)
     cfg.log("✅ strategy_df 저장 완료", log_file)
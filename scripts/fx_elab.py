@@ -1,9 +1,41 @@
 from pathlib import Path
-from scripts.dataframe import load_df, save_df
+from scripts.run_context import RunContext, stage_entry
+from scripts.checkpoint import has_output
 from utils.cfg import cfg
-from scripts.llm_mng import LLMManager
+from utils import memprof
+from scripts.llm_mng import LLMManager, CANCELLED
 from scripts.ext_info import to_safe_filename
+from scripts.prompt_layout import build_prompt, prefix_key, order_by_prefix
+from scripts.budget import get_governor, LEVEL_KEYWORD_ONLY, LEVEL_SKIP_LOW
+from scripts.llm_mng import get_encoding
 import pandas as pd
+import re
+
+PACK_PATTERN = re.compile(r"<<<FILE id=(\S+?)>>>\s*(.*?)\s*<<<END>>>", re.DOTALL)
+
+SINGLE_INSTRUCTION = """📌 요청 목적:
+맨 아래 분석 FILE 스크립트의 주요 기능과 로직을 300 tokens 내외로 요약해주세요.
+레포 전체 구조에서의 역할과 연계성을 포함해주세요.
+반드시 한국어로 작성해주세요."""
+
+PACK_INSTRUCTION = """📌 요청 목적:
+맨 아래 나열된 스크립트 각각의 주요 기능과 로직을 파일별 300 tokens 내외로 요약해주세요.
+레포 전체 구조에서의 역할과 연계성을 포함해주세요.
+반드시 한국어로 작성해주세요.
+
+✅ 출력 형식 (필수):
+파일마다 아래 블록을 하나씩, 주어진 id 그대로 작성하고 블록 밖에는 아무것도 쓰지 마세요.
+<<<FILE id=파일id>>>
+요약 내용
+<<<END>>>"""
+
+
+def shared_context(instruction: str, tree_structure: str, readme_content: str) -> list[str]:
+    return [
+        instruction,
+        f"📎 폴더 구조:\n{tree_structure}",
+        f"📎 README 요약:\n{readme_content}" if readme_content else ""
+    ]
 
 def extract_keywords_code(filepath: Path) -> str:
     keywords = ("def ", "return ", "class ", "self", "@", "from ", "logger")
@@ -26,29 +58,40 @@ def extract_readme_summary(readme_path: Path) -> str:
     except Exception:
         return ""
 
-def fx_elab_main():
-    timestamp = cfg.get_timestamp()
-    paths = cfg.get_results_path(timestamp)
-    log_file = cfg.init_log_file(timestamp)
+@stage_entry
+def fx_elab_main(ctx: RunContext):
+    log_file = ctx.log_file
 
-    repo_df = load_df(paths["repo"])
-    info_df = load_df(paths["info"])
-    strategy_df = load_df(paths["strategy"])
+    repo_df = ctx.frame("repo")
+    info_df = ctx.frame("info")
+    strategy_df = ctx.frame("strategy")
 
     root_path = Path(repo_df["Root path"].iloc[0])
     readme_path = root_path / "README.md"
-    folder_lines, file_lines = cfg.build_llm_file_structure(root_path)
-    tree_structure = "\n".join(folder_lines + file_lines)
+    tree_structure = ctx.tree_structure
+
+    prompts, tags, meta_rows, sections, prefixes, priorities = [], [], [], [], [], []
 
-    prompts, tags, meta_rows = [], [], []
+    # 💸 예산 절감: 중요도 높은 파일부터 프롬프트를 만들며 예상 비용을 누적 → 단계별로 축소
+    budget = get_governor(log_func=lambda m: cfg.log(m, log_file))
+    llm_conf = cfg.get_llm_config("explain")
+    enc = get_encoding(llm_conf["model"][0])
+    projected = 0.0
+    degraded = False
+    reuse = "explain" in ctx.resuming
+    reused = 0
+    strategy_df = strategy_df.sort_values("Importance", ascending=False, na_position="last", kind="stable")
 
-    for _, row in strategy_df.iterrows():
+    for idx, row in strategy_df.iterrows():
         file = row["File"]
         id_ = row["id"]
         name4save = row["name4save"]
         save_path = row["save_path"]
         fx_in_path = Path(save_path[1])
         fx_out_path = Path(save_path[2])
+        if reuse and has_output(fx_out_path):  # 📍 이전 실행에서 설명이 끝난 파일
+            reused += 1
+            continue
 
         info_row = info_df[info_df["file"] == file]
         if info_row.empty:
@@ -57,6 +100,17 @@ def fx_elab_main():
 
         file_path = Path(info_row["path"].iloc[0]) / to_safe_filename(file)
         strategy = row["File strategy"]
+        importance = None if pd.isna(row["Importance"]) else row["Importance"]  # 결측(NA) → None
+
+        level = budget.level(projected)
+        if level >= LEVEL_SKIP_LOW and (importance or 0) <= budget.low_importance:
+            cfg.log(f"[fx_elab] 💸 예산 절감: 중요도 {row['Importance']} → 설명 생략: {file}", log_file)
+            continue
+        if level >= LEVEL_KEYWORD_ONLY and strategy != "keyword_only":
+            cfg.log(f"[fx_elab] 💸 예산 절감: {strategy} → keyword_only: {file}", log_file)
+            strategy = "keyword_only"
+            strategy_df.at[idx, "File strategy"] = strategy
+            degraded = True
 
         try:
             main_content = (
@@ -102,12 +156,7 @@ def fx_elab_main():
         else:
             readme_content = ""
 
-        prompt = f"""
-📌 요청 목적:
-아래 스크립트의 주요 기능과 로직을 300 tokens 내외로 요약해주세요.
-레포 전체 구조에서의 역할과 연계성을 포함해주세요.
-
-📎 분석 FILE: {file}
+        file_section = f"""📎 분석 FILE: {file}
 📎 기능 유형: {row['Component Type']}
 📎 중요도: {row['Importance']}
 
@@ -118,37 +167,114 @@ def fx_elab_main():
 {commit_lines}
 
 📎 관련 스크립트 요약:
-{"".join(related_info)}
+{"".join(related_info)}"""
 
-📎 폴더 구조:
-{tree_structure}
-
-📎 README 요약:
-{readme_content}
-반드시 한국어로 작성해주세요.
-""".strip()
-
-        fx_in_path.parent.mkdir(parents=True, exist_ok=True)
-        fx_in_path.write_text(prompt, encoding="utf-8")
+        # 🧱 공통 prefix(지시문/폴더 구조/README) + 파일별 suffix
+        shared = shared_context(SINGLE_INSTRUCTION, tree_structure, readme_content)
+        prompt = build_prompt(shared, [file_section])
 
         prompts.append(prompt)
+        if budget.enabled:
+            projected += budget.expected_krw("explain", llm_conf["model"][0], len(enc.encode(prompt)),
+                                             llm_conf["max_tokens"])
+        prefixes.append(prefix_key(shared))
+        priorities.append(importance)
         tags.append(id_)
         meta_rows.append({
             "id": id_,
+            "File": file,
             "name4save": name4save,
-            "save_path": [str(fx_in_path), str(fx_out_path)]
+            "save_path": [str(fx_in_path), str(fx_out_path)],
+            "Importance": importance,
+            "File strategy": strategy
         })
+        sections.append({
+            "id": id_,
+            "section": file_section,
+            "readme": readme_content,
+            "packable": strategy == "full_pass",
+            "out_path": fx_out_path,
+            "importance": importance or 0
+        })
+
+    if reused:
+        cfg.log(f"[fx_elab] ♻️ 이전 실행 설명 재사용: {reused}개 파일", log_file)
+    if degraded:
+        ctx.put("strategy", strategy_df.sort_index())  # 이후 단계(커밋 메시지)도 축소된 전략 사용
 
     if not prompts:
         cfg.log("[fx_elab] ❌ 생성된 프롬프트 없음", log_file)
         return
 
+    memprof.note("info_df", info_df)
+    memprof.note("explain prompts", prompts)
+    memprof.note("explain sections", [sec["section"] for sec in sections])
     df_for_call = pd.DataFrame(meta_rows)
 
-    with LLMManager("explain", repo_df, df_for_call=df_for_call) as llm:
-        results = llm.call_all(prompts, tags)
-        for result, row in zip(results, meta_rows):
-            fx_out_path = Path(row["save_path"][1])
-            fx_out_path.write_text(result, encoding="utf-8")
+    with LLMManager("explain", repo_df, df_for_call=df_for_call, ctx=ctx) as llm:
+        pack_budget = llm.config.get("pack_budget", 0)
+        done_ids = set()
+        if pack_budget:
+            packs = pack_sections(sections, pack_budget, llm_conf["model"][0])
+            cfg.log(f"[fx_elab] 📦 소형 full_pass 파일 {sum(len(p) for p in packs)}개 → 묶음 요청 {len(packs)}건", log_file)
+            pack_prompts = [build_packed_prompt(pack, tree_structure) for pack in packs]
+            pack_priorities = [max(sec["importance"] for sec in pack) for pack in packs]
+            order = order_by_prefix([prefix_key([pack[0]["readme"]]) for pack in packs], pack_priorities)
+            packs = [packs[i] for i in order]
+            pack_prompts = [pack_prompts[i] for i in order]
+            pack_priorities = [pack_priorities[i] for i in order]
+            pack_tags = [f"pack_{i + 1}" for i in range(len(packs))]
+            memprof.note("explain pack prompts", pack_prompts)
+            for pack, response in zip(packs, llm.call_all(pack_prompts, pack_tags, priorities=pack_priorities)):
+                if cfg.DRY_RUN or response == CANCELLED:  # 마감 취소분은 단건 재요청하지 않음
+                    done_ids.update(sec["id"] for sec in pack)
+                    continue
+                parsed = parse_packed_response(response)
+                for sec in pack:
+                    text = parsed.get(sec["id"])
+                    if not text:
+                        cfg.log(f"[fx_elab] ⚠️ 묶음 응답 파싱 실패 → 단건 재요청: {sec['id']}", log_file)
+                        continue
+                    llm.writer.write(sec["out_path"], text)
+                    done_ids.add(sec["id"])
 
+        # ✅ 묶이지 않았거나 파싱 실패한 파일은 단건 호출
+        # 같은 prefix끼리 연달아 보내야 캐시가 살아있는 동안 재사용됨
+        single = [i for i in order_by_prefix(prefixes, priorities) if tags[i] not in done_ids]
+        if single:
+            llm.call_all([prompts[i] for i in single], [tags[i] for i in single],
+                         priorities=[priorities[i] for i in single])
         llm.save_all()
+
+
+# 📦 소형 full_pass 파일을 토큰 예산 내에서 묶음 (README가 같은 파일끼리만)
+def pack_sections(sections: list[dict], budget: int, model: str) -> list[list[dict]]:
+    enc = get_encoding(model)  # 실제 과금/견적과 같은 토크나이저로 예산 계산
+    packs, current, used, current_readme = [], [], 0, None
+    for sec in sections:
+        if not sec["packable"]:
+            continue
+        tokens = len(enc.encode(sec["section"]))
+        if tokens > budget // 2:
+            continue
+        if current and (used + tokens > budget or sec["readme"] != current_readme):
+            packs.append(current)
+            current, used = [], 0
+        current.append(sec)
+        current_readme = sec["readme"]
+        used += tokens
+    if current:
+        packs.append(current)
+    # 1개짜리 묶음은 단건 호출과 동일하므로 제외
+    return [pack for pack in packs if len(pack) > 1]
+
+
+def build_packed_prompt(pack: list[dict], tree_structure: str) -> str:
+    file_blocks = [f"### FILE id={sec['id']}\n{sec['section']}" for sec in pack]
+    return build_prompt(shared_context(PACK_INSTRUCTION, tree_structure, pack[0]["readme"]), file_blocks)
+
+
+def parse_packed_response(response: str) -> dict:
+    if not response or response.startswith("[ERROR]"):
+        return {}
+    return {m.group(1): m.group(2).strip() for m in PACK_PATTERN.finditer(response)}
@@ -1,8 +1,12 @@
 from pathlib import Path
-from scripts.dataframe import load_df
+from scripts.run_context import RunContext, stage_entry
+from scripts.checkpoint import has_output
 from scripts.ext_info import to_safe_filename
 from utils.cfg import cfg
+from utils import memprof
+from utils.artifacts import get_store
 from scripts.llm_mng import LLMManager
+from scripts.prompt_layout import build_prompt, prefix_key, order_by_prefix
 import pandas as pd
 
 def select_prompt_template(length: int, importance: int) -> str:
@@ -13,24 +17,33 @@ def select_prompt_template(length: int, importance: int) -> str:
     else:
         return "solo_detail"
 
-def gen_msg_main():
-    timestamp = cfg.get_timestamp()
-    paths = cfg.get_results_path(timestamp)
-    log_file = cfg.init_log_file(timestamp)
+# 템플릿의 {change} 자리는 맨 아래 파일별 블록을 가리키도록 고정 문구로 치환
+CHANGE_REF = {
+    "ko": "맨 아래 파일별 변경 정보(기능 요약/코드/커밋/diff)",
+    "en": "the per-file change details at the bottom (summary/code/commits/diff)",
+}
 
-    repo_df = load_df(paths["repo"])
-    info_df = load_df(paths["info"])
-    strategy_df = load_df(paths["strategy"])
+@stage_entry
+def gen_msg_main(ctx: RunContext):
+    log_file = ctx.log_file
 
-    root_path = Path(repo_df["Root path"].iloc[0])
-    folder_lines, file_lines = cfg.build_llm_file_structure(root_path)
-    tree_txt = "\n".join(folder_lines + file_lines)
+    repo_df = ctx.frame("repo")
+    info_df = ctx.frame("info")
+    strategy_df = ctx.frame("strategy")
 
-    prompts, tags, meta_rows = [], [], []
+    tree_txt = ctx.tree_structure
+
+    prompts, tags, meta_rows, prefixes, priorities = [], [], [], [], []
+    templates = {}
 
     lang = "ko"
+    reuse = "commit_msg" in ctx.resuming
+    reused = 0
     for _, row in strategy_df.iterrows():
-        if row.get("Importance", 0) <= 3:
+        importance = row.get("Importance")
+        if importance is None or pd.isna(importance):  # 중요도 미확인(결측) → 기본 5
+            importance = 5
+        if importance <= 3:
             continue
 
         file = row["File"]
@@ -39,6 +52,9 @@ def gen_msg_main():
         save_path = row["save_path"]
         prompt_in_path = Path(save_path[3])  # mk_msg_in
         prompt_out_path = Path(save_path[4])  # mk_msg_out
+        if reuse and has_output(prompt_out_path):  # 📍 이전 실행에서 커밋 메시지가 끝난 파일
+            reused += 1
+            continue
         safe_file = to_safe_filename(file)
 
         info_row = info_df[info_df["file"] == file]
@@ -51,13 +67,13 @@ def gen_msg_main():
         diff_path = Path(save_path[0])  # diff
 
         try:
-            fx_summary = fx_path.read_text(encoding="utf-8")
+            fx_summary = get_store().read_text(fx_path)
         except Exception:
             fx_summary = ""
             cfg.log(f"[gen_msg] ❌ {file} 기능 요약 파일 읽기 실패", log_file)
 
         try:
-            diff_txt = diff_path.read_text(encoding="utf-8")
+            diff_txt = get_store().read_text(diff_path)
         except Exception:
             diff_txt = ""
             cfg.log(f"[gen_msg] ❌ {file} diff 파일 읽기 실패", log_file)
@@ -83,58 +99,57 @@ def gen_msg_main():
             commit_summary = ""
             cfg.log(f"[gen_msg] ⚠️ {file} 커밋 요약 추출 실패", log_file)
 
-        length = row.get("Recommended length", 300)
-        importance = row.get("Importance", 5)
+        length = row.get("Recommended length")
+        length = 300 if length is None or pd.isna(length) or not length else length
         style = select_prompt_template(length, importance)
         template_path = Path(f"prompt/{lang}/{style}.txt")
         if not template_path.exists():
             cfg.log(f"[gen_msg] ❌ 템플릿 없음: {template_path}", log_file)
             continue
 
-        try:
-            base_prompt = template_path.read_text(encoding="utf-8")
-        except Exception:
-            cfg.log(f"[gen_msg] ❌ 템플릿 읽기 실패: {template_path}", log_file)
-            continue
-
-        full_prompt = base_prompt.replace("{change}", f"""
-📘 기능 요약:
-{fx_summary}
-
-📂 폴더 구조:
-{tree_txt}
-
-📄 변경된 스크립트 주요 내용:
-{script_txt}
-
-📌 최근 커밋 메시지:
-{commit_summary}
-
-🧾 변경 사항(diff):
-{diff_txt}
-""").strip()
-
-        prompt_in_path.parent.mkdir(parents=True, exist_ok=True)
-        prompt_in_path.write_text(full_prompt, encoding="utf-8")
+        if style not in templates:
+            try:
+                templates[style] = template_path.read_text(encoding="utf-8")
+            except Exception:
+                cfg.log(f"[gen_msg] ❌ 템플릿 읽기 실패: {template_path}", log_file)
+                continue
+        base_prompt = templates[style].replace("{change}", CHANGE_REF[lang])
+
+        # 🧱 공통 prefix(템플릿 지시문 + 폴더 구조) → 파일별 suffix(요약/코드/커밋/diff)
+        shared = [base_prompt, f"📂 폴더 구조:\n{tree_txt}"]
+        full_prompt = build_prompt(shared, [
+            f"📘 기능 요약:\n{fx_summary}",
+            f"📄 변경된 스크립트 주요 내용:\n{script_txt}",
+            f"📌 최근 커밋 메시지:\n{commit_summary}",
+            f"🧾 변경 사항(diff):\n{diff_txt}",
+        ])
 
         prompts.append(full_prompt)
+        prefixes.append(prefix_key(shared))
+        priorities.append(importance)
         tags.append(id_)
         meta_rows.append({
             "id": id_,
+            "File": file,
             "name4save": name4save,
-            "save_path": [str(prompt_in_path), str(prompt_out_path)]
+            "save_path": [str(prompt_in_path), str(prompt_out_path)],
+            "Importance": importance,
+            "File strategy": strategy
         })
 
+    if reused:
+        cfg.log(f"[gen_msg] ♻️ 이전 실행 커밋 메시지 재사용: {reused}개 파일", log_file)
     if not prompts:
         cfg.log("[gen_msg] ❌ 생성된 프롬프트 없음", log_file)
         return
 
+    memprof.note("mk_msg prompts", prompts)
     df_for_call = pd.DataFrame(meta_rows)
 
-    with LLMManager("mk_msg", repo_df, df_for_call=df_for_call) as llm:
-        results = llm.call_all(prompts, tags)
-        for result, row in zip(results, meta_rows):
-            out_path = Path(row["save_path"][1])
-            out_path.write_text(result, encoding="utf-8")
-
+    with LLMManager("mk_msg", repo_df, df_for_call=df_for_call, ctx=ctx) as llm:
+        # 마감과 무관하게 끝낼 파일 먼저, 그 안에서는 같은 템플릿(prefix)끼리 연달아 호출
+        # 마감 초과로 취소된 파일은 upload 단계에서 fallback 커밋 메시지 사용
+        order = order_by_prefix(prefixes, priorities)
+        llm.call_all([prompts[i] for i in order], [tags[i] for i in order],
+                     priorities=[priorities[i] for i in order])
         llm.save_all()
@@ -1,18 +1,34 @@
 from pathlib import Path
 import pandas as pd
 import functools
+import threading
 import time
 import tiktoken
-from typing import Any
+from typing import Any, Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from utils.cfg import cfg
-from scripts.llm_router import call_llm
-from scripts.dataframe import save_df
+from scripts.llm_router import call_llm, stream_llm
+from scripts.dataframe import save_df, load_df
+from scripts.call_ledger import CallLedger, CallRecord
+from scripts.cost_ledger import CostLedger
+from utils.writer import get_writer
+from utils.artifacts import get_store
+from utils.metrics import MetricsStore
+from utils import exchange, trace
+from scripts import estimate
+from scripts.budget import get_governor, cheaper_config, LEVEL_CHEAP_MODEL
+from scripts.routing import RoutingPolicy, routing_saving
+from llm._keypool import get_pool
+from scripts.call_journal import CallJournal, get_journal
+
+
+class DeadlineExceeded(Exception):
+    pass
 
 
 class LLMManager:
-    def __init__(self, stage: str, repo_df: pd.DataFrame, df_for_call: pd.DataFrame | None = None):
+    def __init__(self, stage: str, repo_df: pd.DataFrame, df_for_call: pd.DataFrame | None = None, ctx=None):
         self.stage = stage
         self.repo_df = repo_df
         self.call_count = 0
@@ -20,16 +36,36 @@ class LLMManager:
         self.model = self.config["model"][0]
         self.provider = self.config["provider"][0]
         self.params = {k: self.config[k] for k in ["temperature", "top_p", "top_k", "max_tokens"]}
-        self.exchange_rate = cfg.get_usd_exchange_rate()
-        self.timestamp = cfg.get_timestamp()
-        self.paths = cfg.get_results_path(self.timestamp)
-        self.log_file = cfg.init_log_file(self.timestamp)
+        self.stream = self.config.get("stream", False)
+        if ctx is not None:  # RunContext: 환율/경로를 단계마다 다시 구하지 않음
+            self.timestamp, self.paths, self.log_file = ctx.timestamp, ctx.paths, ctx.log_file
+        else:
+            self.timestamp = cfg.get_timestamp()
+            self.paths = cfg.get_results_path(self.timestamp)
+            self.log_file = cfg.init_log_file(self.timestamp)
+        exchange.prefetch(log_func=lambda m: cfg.log(m, self.log_file))  # 비용 확정 시점(exchange_rate)에만 대기
         self.df_for_call = df_for_call
+        self.writer = get_writer()
+        self.store = get_store()
+        self._reserved_paths: set[Path] = set()
+        self._path_lock = threading.Lock()
         self.n_files = len(df_for_call) if df_for_call is not None else len(repo_df["Diff list"].iloc[0])
-        self.in_df = pd.DataFrame(columns=["prompt", "llm", "meta data", "token", "cost($)", "cost(krw)",
-                                           "name4save", "save_path"])
-        self.out_df = pd.DataFrame(columns=["prompt", "llm", "purpose", "Is upload", "upload pf",
-                                            "token", "cost($)", "cost(krw)", "name4save", "save_path"])
+        self.ledger = CallLedger()
+        self.cost_ledger = CostLedger()
+        self.metrics = MetricsStore()
+        self.budget = get_governor(log_func=lambda m: cfg.log(m, self.log_file))
+        self._active_config = self.config  # 예산 절감 단계에 따라 call_all 마다 갱신
+        self.routing = RoutingPolicy(stage, self.config, self.metrics)
+        self.journal = get_journal(self.timestamp)
+        self._journal_pending: list[str] = []  # 장부에 아직 저장되지 않은 journal key
+        self._replayed = 0
+        self.key_pool = get_pool(self.provider)
+        # router → provider 모듈 → 키 풀까지 호출마다 전달 (공용 키 풀 상태는 바꾸지 않음)
+        self._call_log = lambda m: cfg.log(f"[{self.stage}] {m}", self.log_file)
+
+    @property
+    def exchange_rate(self) -> float:
+        return exchange.get_rate()
 
     def __enter__(self):
         self._start_time = time.perf_counter()
@@ -38,13 +74,28 @@ class LLMManager:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         elapsed = round(time.perf_counter() - self._start_time, 3)
+        for err in self.writer.flush():
+            cfg.log(f"[{self.stage}] ⚠️ 아티팩트 {err}", self.log_file)
+        try:
+            self.metrics.flush()
+        except Exception as e:
+            cfg.log(f"[{self.stage}] ⚠️ 지표 저장 실패: {e}", self.log_file)
         msg = f"[{self.stage}] LLMManager 종료 (총 {elapsed}s)"
         if exc_type:
             msg += f" ❌ 예외 발생: {exc_val}"
         cfg.log(msg, self.log_file)
 
-    def call(self, prompt: str, tag: str = "llm_call") -> str:
-        enc = tiktoken.encoding_for_model("gpt-4")
+    def call(self, prompt: str, tag: str = "llm_call",
+             stop_when: Callable[[str], bool] | None = None,
+             on_delta: Callable[[str], None] | None = None,
+             queued_at: float | None = None,
+             cancel_at: float | None = None,
+             importance: float | None = None) -> str:
+        t_call = time.perf_counter()
+        if cancel_at is not None and time.monotonic() >= cancel_at:
+            return CANCELLED
+        queue_wait = round(t_call - queued_at, 3) if queued_at else 0.0
+        enc = get_encoding(self.model)
         token_in = len(enc.encode(prompt))
 
         in_path = self._get_unique_file_path(self.paths[f"{self.stage}_in"], f"in_{tag}")
@@ -53,6 +104,8 @@ class LLMManager:
         save_path = None
         meta_data = f"{self.stage}:{tag}"
         purpose = f"{self.stage}_result"
+        file_strategy = None
+        file_name = None
 
         if self.df_for_call is not None and "id" in self.df_for_call.columns:
             matched = self.df_for_call[self.df_for_call["id"] == tag]
@@ -67,79 +120,345 @@ class LLMManager:
                     name4save = row.get("name4save")
                     meta_data = row.get("meta data", meta_data)
                     purpose = row.get("purpose", purpose)
+                    importance = row.get("Importance", importance)
+                    file_strategy = row.get("File strategy")
+                    file_name = row.get("File") or row.get("file")
                 except Exception as e:
                     cfg.log(f"[{self.stage}] {tag} 메타정보 파싱 실패: {e}", self.log_file)
 
-        try:
-            prompt_text = in_path.read_text(encoding="utf-8")
-        except Exception as e:
-            cfg.log(f"[{self.stage}] {tag} 입력 프롬프트 로딩 실패: {e}", self.log_file)
-            return f"[ERROR] input prompt missing"
+        # 📓 이전 실행에서 끝난 호출이면 기록된 응답 사용
+        journal_key = CallJournal.key(self.stage, tag, prompt)
+        entry = self.journal.lookup(journal_key)
+        if entry is not None:
+            return self._replay(entry, journal_key, prompt, in_path, out_path)
+
+        # 🔀 요청별 모델 선택 (예산 절감으로 이미 저가 모델이 강제된 경우는 그대로)
+        config = self._active_config
+        if config is self.config and self.routing.enabled:
+            if importance is not None and pd.isna(importance):
+                importance = None
+            chosen = self.routing.choose(importance, file_strategy, token_in)
+            if chosen != self.model:
+                config = self.routing.routed_config(chosen)
+                cfg.log(f"[{self.stage}] [{tag}] 🔀 중요도 {importance} / {file_strategy} / {token_in} tok → {chosen}",
+                        self.log_file, level="debug", file_id=tag, model=chosen, tokens_in=token_in)
+        routed = config is not self._active_config
+
+        # 💸 최악 비용(입력 + max_tokens 출력)을 먼저 예약 → 한도 초과 호출은 보내지 않음
+        reserved = max(self.budget.worst_case_krw(m, token_in, config["max_tokens"]) for m in config["model"])
+        if not self.budget.reserve(reserved):
+            cfg.log(f"[{self.stage}] [{tag}] 💸 예산 한도 초과 예상 → 호출 생략", self.log_file)
+            return "[ERROR] 예산 한도 초과"
+
+        # 📝 프롬프트는 메모리 그대로 전송, 기록은 write-behind
+        self.writer.write(in_path, prompt)
 
         t0 = time.perf_counter()
+        ttft = None
+        usage = {}
+        route = {}
+        partial: list[str] = []  # 스트림 도중 중단되어도 받은 만큼은 과금되므로 보관
         try:
-            response = call_llm(prompt_text, self.config, log=lambda m: cfg.log(m, self.log_file))
+            if self.stream or stop_when or on_delta:
+                response, ttft = self._consume_stream(prompt, config, tag, t0, stop_when, on_delta, usage, route,
+                                                      cancel_at, partial)
+            else:
+                response = call_llm(prompt, config, log=self._call_log, usage=usage,
+                                    route=route)
+        except DeadlineExceeded:
+            self._settle_partial(reserved, "cancelled", tag, route, usage, partial, token_in, enc, meta_data,
+                                 purpose, name4save, save_path, file_name, routed, t0)
+            cfg.log(f"[{self.stage}] [{tag}] ⏰ 마감 초과 → 스트림 중단", self.log_file)
+            return CANCELLED
         except Exception as e:
-            cfg.log(f"[{self.stage}] [{tag}] 호출 실패: {e}", self.log_file)
+            if "fallback 실패" not in str(e):  # 스트림 수신 도중 실패 등 router 밖 오류
+                route.setdefault("failures", []).append(
+                    (route.get("provider", self.provider), route.get("model", self.model), str(e)))
+            self._record_failures(tag, route, token_in)
+            self._settle_partial(reserved, "failed", tag, route, usage, partial, token_in, enc, meta_data,
+                                 purpose, name4save, save_path, file_name, routed, t0)
+            trace.add_span("network", "llm", t0, time.perf_counter(), tag=tag, error=str(e))
+            trace.add_span("llm call", "llm", t_call, time.perf_counter(), stage=self.stage, tag=tag,
+                           queue_wait_s=queue_wait)
+            cfg.log(f"[{self.stage}] [{tag}] 호출 실패: {e}", self.log_file, level="error", file_id=tag)
             return f"[ERROR] {e}"
         t1 = time.perf_counter()
+        trace.add_span("prepare", "llm", t_call, t0, tag=tag)
+        trace.add_span("network", "llm", t0, t1, tag=tag, ttft_s=ttft)
+
+        self.writer.write(out_path, response)
+        self._record_failures(tag, route, token_in)
+        model = route.get("model", self.model)  # fallback 시 실제 응답한 모델 기준으로 비용 계산
 
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_text(response, encoding="utf-8")
-
-        token_out = len(enc.encode(response))
-        cost_in = cfg.calc_cost(self.model, token_in, "input")
-        cost_out = cfg.calc_cost(self.model, token_out, "output")
-        cost_in_krw = round(cost_in * self.exchange_rate, 4)
-        cost_out_krw = round(cost_out * self.exchange_rate, 4)
-
-        self.in_df.loc[len(self.in_df)] = {
-            "prompt": tag, "llm": self.model, "meta data": meta_data,
-            "token": token_in, "cost($)": cost_in, "cost(krw)": cost_in_krw,
-            "name4save": name4save, "save_path": save_path
-        }
-        self.out_df.loc[len(self.out_df)] = {
-            "prompt": tag, "llm": self.model, "purpose": purpose,
-            "Is upload": False, "upload pf": "", "token": token_out,
-            "cost($)": cost_out, "cost(krw)": cost_out_krw,
-            "name4save": name4save, "save_path": save_path
-        }
+        # 📊 provider usage 우선, 없으면(조기 종료 등) tiktoken 추정치 사용
+        token_in = usage.get("prompt_tokens") or token_in
+        token_out = usage.get("completion_tokens") or len(enc.encode(response))
+        latency = round(t1 - t0, 3)
+        gen_time = (t1 - t0) - (ttft or 0)
+        tps = round(token_out / gen_time, 1) if ttft is not None and gen_time > 0 else None
+        record = self._make_record(tag, model, meta_data, purpose, token_in, token_out, usage, name4save,
+                                   save_path, file_name, routed, latency, ttft, tps)
+        cached, cost_in, cost_out = record.cached, record.cost_in, record.cost_out
+        self.ledger.append(record)
+        self.journal.record(journal_key, response, usage, record._asdict())
+        self._journal_pending.append(journal_key)
+        self.budget.settle(reserved, (cost_in + cost_out) * self.exchange_rate)
+        self.metrics.record(
+            run=self.timestamp, stage=self.stage, tag=tag,
+            provider=route.get("provider", self.provider), model=model,
+            latency=latency, ttft=ttft, tokens_in=token_in, tokens_out=token_out, cached=cached,
+            retries=route.get("attempts"), outcome="ok"
+        )
+        cfg.log(f"[{self.stage}] [{tag}] ✅ {model} {latency:.2f}s / {token_in}→{token_out} tok", self.log_file,
+                level="debug", file_id=tag, model=model, latency=latency, ttft=ttft,
+                tokens_in=token_in, tokens_out=token_out, cost_krw=round((cost_in + cost_out) * self.exchange_rate, 4))
+        t_end = time.perf_counter()
+        trace.add_span("parse", "llm", t1, t_end, tag=tag)
+        trace.add_span("llm call", "llm", t_call, t_end, stage=self.stage, tag=tag, model=model,
+                       queue_wait_s=queue_wait, token_in=token_in, token_out=token_out)
 
         return response
 
-    def call_all(self, prompts: list[str], tags: list[str]) -> list[str]:
+    # 💸 토큰 → 비용 계산 (cached 는 usage 기준, 라우팅 시 기본 모델 대비 절감액 포함)
+    def _make_record(self, tag: str, model: str, meta_data: str, purpose: str, token_in: int, token_out: int,
+                     usage: dict, name4save, save_path, file_name, routed: bool,
+                     latency=None, ttft=None, tps=None) -> CallRecord:
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        cost_in = round(cfg.calc_cost(model, token_in - cached, "input")
+                        + cfg.calc_cost(model, cached, "cached"), 6)
+        cost_out = cfg.calc_cost(model, token_out, "output")
+        cache_saving = round(cfg.calc_cost(model, cached, "input") - cfg.calc_cost(model, cached, "cached"), 6)
+        route_saving = routing_saving(self.model, model, token_in, cached, token_out) if routed else 0.0
+        return CallRecord(
+            tag, model, meta_data, purpose, token_in, token_out,
+            cost_in, cost_out, name4save, save_path, latency, ttft, tps,
+            cached, cache_saving, route_saving, file_name
+        )
+
+    # ⏰ 스트림 도중 중단/실패: provider 가 응답을 시작했다면 입력 + 받은 출력까지 과금되므로 장부/예산에 반영
+    # - journal 에는 남기지 않음 (다음 실행에서 다시 호출)
+    def _settle_partial(self, reserved: float, outcome: str, tag: str, route: dict, usage: dict,
+                        partial: list[str], token_in: int, enc, meta_data: str, purpose: str,
+                        name4save, save_path, file_name, routed: bool, t0: float):
+        if not partial and not usage:  # 요청이 처리되기 전 실패 → 과금 없음
+            self.budget.settle(reserved, 0.0)
+            return
+        model = route.get("model", self.model)
+        token_in = usage.get("prompt_tokens") or token_in
+        token_out = usage.get("completion_tokens") or len(enc.encode("".join(partial)))
+        record = self._make_record(tag, model, meta_data, f"{purpose}:{outcome}", token_in, token_out, usage,
+                                   name4save, save_path, file_name, routed, round(time.perf_counter() - t0, 3))
+        self.ledger.append(record)
+        krw = (record.cost_in + record.cost_out) * self.exchange_rate
+        self.budget.settle(reserved, krw)
+        cfg.log(f"[{self.stage}] [{tag}] 💸 {outcome}: 받은 만큼 과금 반영 {token_in}→{token_out} tok ({krw:,.2f}원)",
+                self.log_file, level="debug", file_id=tag, model=model, tokens_in=token_in, tokens_out=token_out,
+                cost_krw=round(krw, 4), outcome=outcome)
+
+    # 📓 journal 재사용: 산출물만 기록 (장부에 저장되기 전에 중단된 호출의 비용은 save_all 에서 이월 반영)
+    def _replay(self, entry: dict, journal_key: str, prompt: str, in_path: Path, out_path: Path) -> str:
+        self.writer.write(in_path, prompt)
+        self.writer.write(out_path, entry["response"])
+        self._replayed += 1
+        return entry["response"]
+
+    # 📉 fallback 전에 실패한 시도들을 모델별 오류로 기록 (429는 rate_limited 로 구분)
+    def _record_failures(self, tag: str, route: dict, token_in: int):
+        for provider, model, err in route.get("failures", []):
+            self.metrics.record(
+                run=self.timestamp, stage=self.stage, tag=tag, provider=provider, model=model,
+                tokens_in=token_in, retries=1, outcome="rate_limited" if "429" in err else "error"
+            )
+
+    # 🔁 스트리밍 응답 소비: TTFT 측정 + 구조화 출력 완료 시 조기 종료
+    # - stop_when은 닫는 괄호가 포함된 delta를 받았을 때만 평가 (전체 재스캔 비용 절감)
+    def _consume_stream(self, prompt: str, config: dict, tag: str, t0: float,
+                        stop_when: Callable[[str], bool] | None,
+                        on_delta: Callable[[str], None] | None,
+                        usage: dict, route: dict,
+                        cancel_at: float | None = None,
+                        parts: list[str] | None = None) -> tuple[str, float | None]:
+        parts, ttft = ([] if parts is None else parts), None
+        events = stream_llm(prompt, config, log=self._call_log, route=route)
+        try:
+            for kind, payload in events:
+                if kind == "usage":
+                    usage.update(payload)
+                    continue
+                if ttft is None:
+                    ttft = round(time.perf_counter() - t0, 3)
+                parts.append(payload)
+                if cancel_at is not None and time.monotonic() >= cancel_at:
+                    raise DeadlineExceeded()
+                if on_delta:
+                    on_delta(payload)
+                if stop_when and ("]" in payload or "}" in payload) and stop_when("".join(parts)):
+                    cfg.log(f"[{self.stage}] [{tag}] ✂️ 구조화 출력 완료 → 스트림 조기 종료", self.log_file,
+                            level="debug", file_id=tag)
+                    break
+        finally:
+            events.close()
+        return "".join(parts).strip(), ttft
+
+    def call_all(self, prompts: list[str], tags: list[str],
+                 stop_when: Callable[[str], bool] | None = None,
+                 priorities: list[float] | None = None) -> list[str]:
+        """
+        입력 순서대로 보냄 (순서는 호출하는 쪽에서 prompt_layout.order_by_prefix 로 결정 → prefix 묶음 보존)
+        priorities(중요도)가 주어지면 실행 마감(cfg.RUN_DEADLINE) 이후 must_finish 미만 호출을 취소
+        """
         results = [None] * len(prompts)
+        self._active_config = self.config
 
-        if self.provider == "fireworks":
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                futures = {
-                    executor.submit(self.call, p, tag=t): i
-                    for i, (p, t) in enumerate(zip(prompts, tags))
-                }
-                for future in as_completed(futures):
-                    i = futures[future]
-                    try:
-                        results[i] = future.result()
-                    except Exception as e:
-                        results[i] = f"[ERROR] {e}"
-        else:
-            for i, (p, t) in enumerate(zip(prompts, tags)):
-                results[i] = self.call(p, tag=t)
-                time.sleep(2)
+        if cfg.DRY_RUN:
+            return self._dry_run(prompts, self._batch_workers()[1])
 
+        # 💸 이번 배치까지 포함한 예상 사용률이 높으면 저가 모델로 라우팅
+        if self.budget.enabled:
+            enc = get_encoding(self.model)
+            projected = sum(self.budget.expected_krw(self.stage, self.model, len(enc.encode(p)), self.params["max_tokens"])
+                            for p in prompts)
+            if self.budget.level(projected) >= LEVEL_CHEAP_MODEL:
+                self._active_config = cheaper_config(self.config)
+                if self._active_config is not self.config:
+                    cfg.log(f"[{self.stage}] 💸 예산 절감: {self.model} → {self._active_config['model'][0]}",
+                            self.log_file)
+
+        # ⏰ 호출별 취소 시점 (우선순위 없으면 모두 완료 대상)
+        cancel_at = [None] * len(prompts)
+        if priorities is not None and cfg.RUN_DEADLINE is not None:
+            must_finish = cfg.get_schedule_config()["must_finish_importance"]
+            cancel_at = [None if (p or 0) >= must_finish else cfg.RUN_DEADLINE for p in priorities]
+
+        # 🔑 동시 실행 수 = 배치가 보낼 provider 별 (키 수 × 키별 동시 실행 수) 합
+        # 📉 최근 429 비율이 높은 provider 는 그 몫을 줄임
+        capacity, workers = self._batch_workers()
+        if workers != capacity:
+            cfg.log(f"[{self.stage}] ⚠️ 최근 rate limit 빈발 → 동시 실행 {workers}개로 축소", self.log_file)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.call, prompts[i], tag=tags[i], stop_when=stop_when,
+                                queued_at=time.perf_counter(), cancel_at=cancel_at[i],
+                                importance=priorities[i] if priorities else None): i
+                for i in range(len(prompts))
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = f"[ERROR] {e}"
+
+        cancelled = sum(1 for r in results if r == CANCELLED)
+        if cancelled:
+            cfg.log(f"[{self.stage}] ⏰ 실행 마감 초과 → 저중요도 호출 {cancelled}건 취소", self.log_file)
         return results
 
+    def _batch_workers(self) -> tuple[int, int]:
+        """(키 풀 용량 합, 최근 rate limit 반영 동시 실행 수) - 라우팅으로 보낼 수 있는 provider 포함
+        provider 별 동시 실행/호출 간격은 각 키 풀이 지키므로 합만큼 띄워도 한 provider 가 넘치지 않음"""
+        config = self._active_config
+        targets = {config["provider"][0]: config["model"][0]}
+        if config is self.config and self.routing.enabled:
+            for model in self.routing.models():
+                targets.setdefault(cfg.MODEL_PROVIDER[model], model)
+        capacity = workers = 0
+        for provider, model in targets.items():
+            pool_capacity = get_pool(provider).capacity
+            capacity += pool_capacity
+            workers += self.metrics.suggest_workers(provider, model, default=pool_capacity)
+        return capacity, workers
+
+    # 🧪 dry-run: 호출 없이 토큰 수만 기록, 응답은 빈 문자열
+    def _dry_run(self, prompts: list[str], workers: int) -> list[str]:
+        enc = get_encoding(self.model)
+        estimate.add_batch(estimate.Batch(
+            stage=self.stage, provider=self.provider, model=self.model,
+            tokens_in=[len(enc.encode(p)) for p in prompts],
+            max_tokens=self.params["max_tokens"], workers=workers,
+            pause_sec=self.key_pool.pacing_sec(),
+        ))
+        return [""] * len(prompts)
+
     def _get_unique_file_path(self, folder: Path, base_name: str) -> Path:
-        folder.mkdir(parents=True, exist_ok=True)
-        path = folder / f"{base_name}.txt"
-        counter = 1
-        while path.exists():
-            path = folder / f"{base_name}_{counter}.txt"
-            counter += 1
-        return path
+        # 기록이 지연되므로 저장소(cas 면 manifest) 존재 여부 + 이미 예약된 경로를 함께 확인
+        with self._path_lock:
+            path = folder / f"{base_name}.txt"
+            counter = 1
+            while path in self._reserved_paths or self.store.exists(path):
+                path = folder / f"{base_name}_{counter}.txt"
+                counter += 1
+            self._reserved_paths.add(path)
+            return path
 
     def save_all(self):
-        save_df(self.in_df, self.paths["in"])
-        save_df(self.out_df, self.paths["out"])
-        cfg.log(f"[{self.stage}] in/out DataFrame 저장 완료", self.log_file)
+        # 📒 장부 → DataFrame 변환은 여기서 한 번만, 이전 단계 기록 뒤에 이어 붙임
+        for entry in self.journal.take_carried(self.stage):
+            record = CallRecord(**entry["record"])
+            self.ledger.append(record)
+            self._journal_pending.append(entry["key"])
+            self.budget.settle(0.0, (record.cost_in + record.cost_out) * self.exchange_rate)
+        records = self.ledger.drain()
+        in_new, out_new = CallLedger.to_frames(records, self.exchange_rate)
+        for key, new_df in (("in", in_new), ("out", out_new)):
+            prev_df = load_df(self.paths[key])
+            if prev_df is not None and not prev_df.empty:
+                new_df = pd.concat([prev_df, new_df], ignore_index=True)
+            save_df(new_df, self.paths[key])
+        try:
+            self.cost_ledger.append(self.timestamp, self.stage, records, self.exchange_rate)
+        except Exception as e:
+            cfg.log(f"[{self.stage}] ⚠️ 비용 장부 기록 실패: {e}", self.log_file)
+        keys, self._journal_pending = self._journal_pending, []
+        self.journal.mark_saved(keys)
+        cfg.log(f"[{self.stage}] in/out DataFrame 저장 완료 (+{len(records)}건)", self.log_file)
+        if self._replayed:
+            cfg.log(f"[{self.stage}] 📓 이전 실행 journal 응답 재사용 {self._replayed}건 (provider 호출 생략)",
+                    self.log_file)
+        routed = [r for r in records if r.llm != self.model]
+        if routed:
+            saving = sum(r.route_saving for r in routed) * self.exchange_rate
+            cfg.log(f"[{self.stage}] 🔀 {len(routed)}/{len(records)}건 {self.model} 외 모델 사용 → 절감 {saving:,.1f}원",
+                    self.log_file)
+
+
+
+
+CANCELLED = "[ERROR] ⏰ 실행 마감 초과로 취소"
+
+
+# 🔤 모델별 토크나이저 (Llama 4 는 tiktoken 계열 ~200k 어휘라 o200k_base 로 근사)
+MODEL_ENCODING = {
+    "gpt-4o": "o200k_base",
+    "llama4-maverick-instruct-basic": "o200k_base",
+    "llama4-scout-instruct-basic": "o200k_base",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str):
+    return tiktoken.get_encoding(MODEL_ENCODING.get(model, "cl100k_base"))
+
 
+def json_array_closed(text: str) -> bool:
+    """최상위 JSON 배열의 닫는 ']'까지 수신됐는지 판별 (문자열 내부 괄호 무시)"""
+    depth, in_str, escaped, started = 0, False, False, False
+    for ch in text:
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"' and started:
+            in_str = True
+        elif ch == "[":
+            depth += 1
+            started = True
+        elif ch == "]" and started:
+            depth -= 1
+            if depth == 0:
+                return True
+    return False
@@ -2,7 +2,8 @@ import importlib
 from typing import Optional, Callable
 log: Optional[Callable] = None
 
-def call_llm(prompt: str, llm_cfg: dict, log: Optional[Callable] = None) -> str:
+def call_llm(prompt: str, llm_cfg: dict, log: Optional[Callable] = None, usage: Optional[dict] = None,
+             route: Optional[dict] = None) -> str:
     providers = llm_cfg["provider"]
     models = llm_cfg["model"]
     llm_param = {
@@ -12,15 +13,66 @@ def call_llm(prompt: str, llm_cfg: dict, log: Optional[Callable] = None) -> str:
         "max_tokens": llm_cfg.get("max_tokens", 1024)
     }
 
-    for provider, model in zip(providers, models):
+    for attempt, (provider, model) in enumerate(zip(providers, models), start=1):
+        # route: 실제 응답한 provider/model, 시도 횟수, 실패한 시도 기록용
+        if route is not None:
+            route.update(provider=provider, model=model, attempts=attempt)
         try:
             module = importlib.import_module(f"llm.{model}")
             if not hasattr(module, "call"):
                 raise AttributeError(f"'call' 함수 없음 in llm.{model}")
-            return module.call(prompt, llm_param)
+            return module.call(prompt, llm_param, usage=usage, log_func=log)
         except Exception as e:
+            if route is not None:
+                route.setdefault("failures", []).append((provider, model, str(e)))
             if log:
                 log(f"⚠️ {provider}:{model} 호출 실패 → {e}")
             continue
 
-    raise RuntimeError("❌ 모든 LLM 호출 실패: fallback 실패")
\ No newline at end of file
+    raise RuntimeError("❌ 모든 LLM 호출 실패: fallback 실패")
+
+def stream_llm(prompt: str, llm_cfg: dict, log: Optional[Callable] = None, route: Optional[dict] = None):
+    """
+    스트리밍 호출 → ("delta", text) / ("usage", dict) 이벤트 생성
+    - stream 미지원 모듈은 call() 결과를 delta 1건으로 변환
+    - 첫 토큰 수신 전 실패만 다음 모델로 fallback (수신 이후 실패는 그대로 전달)
+    """
+    providers = llm_cfg["provider"]
+    models = llm_cfg["model"]
+    llm_param = {
+        "temperature": llm_cfg.get("temperature", 0.7),
+        "top_p": llm_cfg.get("top_p", 0.9),
+        "top_k": llm_cfg.get("top_k", 80),
+        "max_tokens": llm_cfg.get("max_tokens", 1024)
+    }
+
+    for attempt, (provider, model) in enumerate(zip(providers, models), start=1):
+        started, events = False, None
+        if route is not None:
+            route.update(provider=provider, model=model, attempts=attempt)
+        try:
+            module = importlib.import_module(f"llm.{model}")
+            if hasattr(module, "stream"):
+                events = module.stream(prompt, llm_param, log_func=log)
+            elif hasattr(module, "call"):
+                events = iter([("delta", module.call(prompt, llm_param, log_func=log))])
+            else:
+                raise AttributeError(f"'call' 함수 없음 in llm.{model}")
+            for event in events:
+                started = True
+                yield event
+            return
+        except Exception as e:
+            if started:
+                raise
+            if route is not None:
+                route.setdefault("failures", []).append((provider, model, str(e)))
+            if log:
+                log(f"⚠️ {provider}:{model} 스트리밍 호출 실패 → {e}")
+            continue
+        finally:
+            # 조기 종료 시에도 HTTP 스트림 즉시 해제
+            if hasattr(events, "close"):
+                events.close()
+
+    raise RuntimeError("❌ 모든 LLM 호출 실패: fallback 실패")
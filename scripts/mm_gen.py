@@ -1,9 +1,11 @@
 import json
-import uuid
 import pandas as pd
-from scripts.dataframe import load_df, save_df
+from scripts.run_context import RunContext, stage_entry
 from utils.cfg import cfg
-from scripts.llm_mng import LLMManager
+from utils import memprof
+from scripts.estimate import DRY_RUN_STRATEGY
+from scripts.llm_mng import LLMManager, json_array_closed
+from scripts.ext_info import file_id
 from pathlib import Path
 
 CHUNK_THRESHOLDS = [(50, 3), (20, 2)]
@@ -24,6 +26,11 @@ def clean_llm_response(response: str) -> str:
     return "\n".join(lines).strip()
 
 
+def to_builtin(value):
+    # numpy 스칼라(int64 등) → 파이썬 기본형
+    return value.item() if hasattr(value, "item") else str(value)
+
+
 def build_strategy_prompt(repo_df, info_df, strategy_df, file_chunk, id_map):
     files_info = []
     for file in file_chunk:
@@ -66,7 +73,7 @@ List[Dict], e.g.
 ]
 
 📚 Meta data per file:
-{json.dumps(files_info, ensure_ascii=False)}
+{json.dumps(files_info, ensure_ascii=False, default=to_builtin)}
 
 📂 Repository Info:
 - Root: {repo_df["Root path"].iloc[0]}
@@ -82,21 +89,26 @@ Return ONLY a JSON array (no explanation or comments).
     return prompt
 
 
-def mm_gen_main():
-    timestamp = cfg.get_timestamp()
-    paths = cfg.get_results_path(timestamp)
-    log_file = cfg.init_log_file(timestamp)
+@stage_entry
+def mm_gen_main(ctx: RunContext):
+    paths = ctx.paths
+    log_file = ctx.log_file
 
-    repo_df = load_df(paths["repo"])
-    info_df = load_df(paths["info"])
-    strategy_df = load_df(paths["strategy"])
+    repo_df = ctx.frame("repo")
+    info_df = ctx.frame("info")
+    strategy_df = ctx.frame("strategy")
 
     file_list = strategy_df["File"].tolist()
-    if len(file_list) > 60:
-        raise SystemExit("⚠️ 변경 파일 수가 60개 초과 → 작업 종료")
+    max_files = cfg.get_max_changed_files()
+    if len(file_list) > max_files:
+        raise SystemExit(f"⚠️ 변경 파일 수가 {max_files}개 초과 → 작업 종료")
 
-    # 1️⃣ UUID 미리 지정
-    id_map = {file: str(uuid.uuid4()) for file in file_list}
+    # 1️⃣ id 미리 지정: extract 단계에서 정한 고정 id 유지 (무작위 id 는 재실행 시 프롬프트 해시를 바꿈)
+    existing = dict(zip(strategy_df["File"], strategy_df["id"])) if "id" in strategy_df.columns else {}
+    id_map = {}
+    for file in file_list:
+        id_ = existing.get(file)
+        id_map[file] = id_ if isinstance(id_, str) and id_ else file_id(file)
     for file in file_list:
         idx = strategy_df[strategy_df["File"] == file].index[0]
         strategy_df.at[idx, "id"] = id_map[file]
@@ -112,14 +124,13 @@ def mm_gen_main():
 
     required_keys = {"id", "File", "Required Commit Detail", "Component Type", "Importance", "Most Related Files"}
 
-    with LLMManager("strategy", repo_df, df_for_call=strategy_df) as llm:
+    with LLMManager("strategy", repo_df, df_for_call=strategy_df, ctx=ctx) as llm:
         for i, chunk in enumerate(chunks):
             prompt_in = build_strategy_prompt(repo_df, info_df, strategy_df, chunk, id_map)
 
             name4save = f"chunk_{i+1}"
             in_path = paths["strategy_in"] / f"in_{i+1}.txt"
             out_path = paths["strategy_out"] / f"out_{i+1}.txt"
-            in_path.write_text(prompt_in, encoding="utf-8")
 
             # 👉 임시 메타 데이터 구성
             chunk_df = pd.DataFrame([{
@@ -131,9 +142,17 @@ def mm_gen_main():
             # 👉 단건이라도 DataFrame으로 넘김 (id 매칭 기반)
             llm.df_for_call = chunk_df
 
+            if cfg.DRY_RUN:
+                # 🧪 응답이 없으므로 상한 기준 가정값으로 채워 다음 단계 프롬프트까지 생성
+                llm.call_all([prompt_in], [name4save])
+                for file in chunk:
+                    i = strategy_df[strategy_df["File"] == file].index[0]
+                    for key, value in DRY_RUN_STRATEGY.items():
+                        strategy_df.at[i, key] = value
+                continue
+
             try:
-                response = llm.call_all([prompt_in], [name4save])[0]
-                out_path.write_text(response, encoding="utf-8")  # ← 백업용 저장도 유지
+                response = llm.call_all([prompt_in], [name4save], stop_when=json_array_closed)[0]
                 parsed = json.loads(clean_llm_response(response))
 
                 for row in parsed:
@@ -160,5 +179,8 @@ def mm_gen_main():
                 cfg.log(f"❌ LLM 호출 실패: {e}", log_file)
                 raise SystemExit("🚫 LLM 호출 실패 → 파이프라인 중단")
 
-    save_df(strategy_df, paths["strategy"])
+        llm.save_all()
+
+    memprof.note("strategy_df", strategy_df)
+    ctx.put("strategy", strategy_df)
     cfg.log("✅ 전략 결과 및 프롬프트 저장 완료", log_file)
@@ -0,0 +1,260 @@
+"""
+로컬 mock LLM 서버 (Fireworks / OpenAI chat-completions 호환)
+
+실행:
+    python -m scripts.mock_llm_server --port 8765 --latency lognormal:-0.5,0.4 --error 429:0.05 --error 500:0.02
+
+연결:
+    LLM_MOCK_URL=http://127.0.0.1:8765 python runall.py
+    (또는 config/user_config.yml 의 'mock llm → enabled: true')
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROUTES = {"/inference/v1/chat/completions", "/v1/chat/completions"}
+PREFIX_CHARS = 2048  # prefix cache 시뮬레이션 기준 길이
+
+
+# ⏱ 지연 분포: fixed:x | uniform:a,b | normal:mu,sigma | lognormal:mu,sigma (초 단위)
+def parse_latency(spec: str):
+    kind, _, args = spec.partition(":")
+    nums = [float(x) for x in args.split(",") if x]
+    if kind == "fixed":
+        return lambda rng: nums[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(nums[0], nums[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(nums[0], nums[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(nums[0], nums[1])
+    raise ValueError(f"지원되지 않는 지연 분포: {spec}")
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# 🧾 요청 내용에 맞는 결정적(deterministic) 응답 생성
+def canned_response(prompt: str) -> str:
+    digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+
+    # 전략 예측: 메타 데이터 JSON에서 id/File 추출 → 유효한 전략 JSON 배열
+    meta = re.search(r"📚 Meta data per file:\n(.*?)\n\n", prompt, re.DOTALL)
+    if "valid JSON array format" in prompt and meta:
+        try:
+            files = json.loads(meta.group(1))
+        except json.JSONDecodeError:
+            files = []
+        names = [f["file"] for f in files]
+        rows = []
+        for f in files:
+            h = int(hashlib.sha1(f["file"].encode("utf-8")).hexdigest(), 16)
+            rows.append({
+                "id": f["id"],
+                "File": f["file"],
+                "Required Commit Detail": h % 5 + 1,
+                "Component Type": ["core", "support", "config", "util"][h % 4],
+                "Importance": h % 11,
+                "Most Related Files": [n for n in names if n != f["file"]][:3],
+            })
+        return "```json\n" + json.dumps(rows, ensure_ascii=False, indent=2) + "\n```"
+
+    # 묶음 설명: 파일 id별 블록
+    packed_ids = re.findall(r"### FILE id=(\S+)", prompt)
+    if packed_ids:
+        return "\n".join(f"<<<FILE id={i}>>>\n[mock] {i} 요약 ({digest})\n<<<END>>>" for i in packed_ids)
+
+    if "commit" in prompt.lower() or "커밋 메시지" in prompt:
+        return f"chore(mock): 자동 생성 커밋 메시지 {digest}\n\n- mock 서버 응답"
+    return f"[mock] 기능 요약 {digest}\n- 주요 기능과 로직 설명 (mock)"
+
+
+class MockState:
+    def __init__(self, latency, errors: list[tuple[int, float]], token_delay: float, seed: int):
+        self.latency = latency
+        self.errors = errors
+        self.token_delay = token_delay
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.seen_prefixes: set[str] = set()
+        self.stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "errors": {}, "streamed": 0}
+
+    def draw(self) -> tuple[float, int | None]:
+        with self.lock:
+            delay = self.latency(self.rng)
+            roll = self.rng.random()
+        acc = 0.0
+        for status, rate in self.errors:
+            acc += rate
+            if roll < acc:
+                return delay, status
+        return delay, None
+
+    def cached_tokens(self, prompt: str) -> int:
+        prefix = prompt[:PREFIX_CHARS]
+        key = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        with self.lock:
+            hit = key in self.seen_prefixes
+            self.seen_prefixes.add(key)
+        return approx_tokens(prefix) if hit and len(prompt) > PREFIX_CHARS else 0
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict, headers: dict | None = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    self._send_json(200, state.stats)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path not in ROUTES:
+                return self._send_json(404, {"error": "not found"})
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+
+            with state.lock:
+                state.stats["requests"] += 1
+                state.stats["in_flight"] += 1
+                state.stats["max_in_flight"] = max(state.stats["max_in_flight"], state.stats["in_flight"])
+            try:
+                self._handle_completion(payload)
+            finally:
+                with state.lock:
+                    state.stats["in_flight"] -= 1
+
+        def _handle_completion(self, payload: dict):
+            prompt = extract_prompt(payload.get("messages", []))
+            delay, error = state.draw()
+            time.sleep(delay)
+
+            if error:
+                with state.lock:
+                    state.stats["errors"][str(error)] = state.stats["errors"].get(str(error), 0) + 1
+                headers = {"Retry-After": "1"} if error == 429 else None
+                return self._send_json(error, {"error": {"message": f"mock injected {error}", "code": error}}, headers)
+
+            text = canned_response(prompt)
+            max_tokens = int(payload.get("max_tokens") or 4096)
+            words = re.split(r"(?<=\s)", text)[:max_tokens]
+            text = "".join(words)
+            usage = {
+                "prompt_tokens": approx_tokens(prompt),
+                "completion_tokens": approx_tokens(text),
+                "total_tokens": approx_tokens(prompt) + approx_tokens(text),
+                "prompt_tokens_details": {"cached_tokens": state.cached_tokens(prompt)},
+            }
+            model = payload.get("model", "mock")
+
+            if not payload.get("stream"):
+                return self._send_json(200, {
+                    "id": "mock-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12],
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+
+            with state.lock:
+                state.stats["streamed"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            try:
+                for word in words:
+                    self._sse({"id": "mock", "object": "chat.completion.chunk", "model": model,
+                               "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]})
+                    if state.token_delay:
+                        time.sleep(state.token_delay)
+                self._sse({"id": "mock", "object": "chat.completion.chunk", "model": model,
+                           "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # 클라이언트 조기 종료(early stop)
+            self.close_connection = True
+
+        def _sse(self, chunk: dict):
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+    return Handler
+
+
+def extract_prompt(messages: list[dict]) -> str:
+    texts = []
+    for msg in messages:
+        content = msg.get("content", "")
+        if isinstance(content, list):
+            texts.extend(part.get("text", "") for part in content if isinstance(part, dict))
+        else:
+            texts.append(str(content))
+    return "\n".join(texts)
+
+
+def build_server(host: str = "127.0.0.1", port: int = 8765, latency: str = "fixed:0.05",
+                 errors: list[tuple[int, float]] | None = None, token_delay: float = 0.0,
+                 seed: int = 0) -> ThreadingHTTPServer:
+    state = MockState(parse_latency(latency), errors or [], token_delay, seed)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    return server
+
+
+def start_server(**kwargs) -> ThreadingHTTPServer:
+    """백그라운드 스레드로 서버 기동 (벤치마크용). port=0 이면 임의 포트"""
+    server = build_server(**kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True).start()
+    return server
+
+
+def parse_error(spec: str) -> tuple[int, float]:
+    status, _, rate = spec.partition(":")
+    return int(status), float(rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 mock LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0.05", help="fixed:x | uniform:a,b | normal:mu,sigma | lognormal:mu,sigma")
+    parser.add_argument("--error", action="append", type=parse_error, default=[], help="상태코드:비율 (예: 429:0.05)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="스트리밍 chunk 간 지연(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = build_server(args.host, args.port, args.latency, args.error, args.token_delay, args.seed)
+    print(f"🧪 mock LLM 서버 실행: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from utils.cfg import cfg
+
+# ⚡ 실행 전 변경 확인 (pandas / tiktoken 등 무거운 모듈을 import 하기 전에)
+# - git status 에서 변경 감지 대상(M/A/??, 허용 확장자, 존재하는 파일)만 추림 → ext_info 와 같은 기준
+# - HEAD + 대상 파일(경로, 상태, 크기, mtime) 해시를 마지막으로 끝까지 처리한 실행의 기록과 비교
+LAST_STATUS_NAME = "last_status.json"
+CHANGE_STATUSES = {"M", "A", "??"}
+
+
+def git(args: list[str]) -> str:
+    # porcelain 출력은 첫 칸이 공백일 수 있으므로 줄바꿈만 제거
+    return subprocess.run(["git", *args], capture_output=True, text=True, encoding="utf-8").stdout.rstrip("\n")
+
+
+def parse_porcelain(output: str) -> list[tuple[str, str]]:
+    entries = []
+    for line in output.splitlines():
+        if line.strip():
+            path = line[3:].strip().strip('"')
+            if " -> " in path:  # rename: 새 경로 기준
+                path = path.split(" -> ")[1].strip('"')
+            entries.append((line[:2].strip(), path))
+    return entries
+
+
+def git_status() -> list[tuple[str, str]]:
+    """[(상태, 경로)] - 새 폴더 안의 파일도 개별 경로로 (precheck / ext_info / checkpoint 공용)"""
+    return parse_porcelain(git(["status", "--porcelain", "-uall"]))
+
+
+def changed_files(log_func=None, debug_func=None) -> tuple[Path, list[tuple[str, str]]]:
+    """(저장소 루트, [(상태, 경로)]) - 파일 없음/제외 확장자는 log_func/debug_func 로 알림"""
+    root = Path(git(["rev-parse", "--show-toplevel"]) or ".")
+    allowed = set(cfg.get_allowed_extensions(log_func=log_func or (lambda m: None)))
+    changed = []
+    for status, path in git_status():
+        if status not in CHANGE_STATUSES:
+            continue
+        full_path = root / path
+        if not full_path.exists():
+            if log_func:
+                log_func(f"[ext_info] ⚠️ Git status에 있으나 파일 없음 → 제외: {path}")
+            continue
+        if full_path.suffix not in allowed:
+            if debug_func:
+                debug_func(f"[ext_info] ⏭️ 제외된 확장자: {path}")
+            continue
+        changed.append((status, path))
+    return root, changed
+
+
+def status_digest(root: Path, changed: list[tuple[str, str]]) -> str:
+    parts = [git(["rev-parse", "HEAD"])]
+    for status, path in sorted(changed, key=lambda c: c[1]):
+        try:
+            st = (root / path).stat()
+            parts.append(f"{status}\t{path}\t{st.st_size}\t{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{status}\t{path}\tmissing")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _last_status_path() -> Path:
+    return cfg.LOGS_DIR / LAST_STATUS_NAME
+
+
+def load_last() -> dict:
+    try:
+        return json.loads(_last_status_path().read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_last(run: str):
+    """끝까지 처리한 실행(또는 변경 없음으로 끝난 실행) 직후의 git 상태 기록"""
+    root, changed = changed_files()
+    path = _last_status_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "digest": status_digest(root, changed),
+        "run": run,
+        "at": datetime.now().isoformat(timespec="seconds"),
+    }), encoding="utf-8")
+
+
+def needs_run() -> tuple[bool, str]:
+    """(실행 필요 여부, 사유)"""
+    root, changed = changed_files()
+    if not changed:
+        return False, "변경된 파일 없음"
+    last = load_last()
+    if last.get("digest") == status_digest(root, changed):
+        return False, f"마지막 실행({last.get('run')}) 이후 변경 없음"
+    return True, f"변경 파일 {len(changed)}개"
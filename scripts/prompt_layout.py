@@ -0,0 +1,35 @@
+import hashlib
+
+from utils.cfg import cfg
+
+# 🧱 프롬프트 조립 규칙
+# - 공통(shared) 블록은 항상 앞쪽, 동일한 순서/문자열로 고정 → provider prefix cache 적중
+# - 파일별(per-file) 블록은 항상 뒤쪽
+SECTION_SEP = "\n\n"
+
+
+def build_prompt(shared_parts: list[str], file_parts: list[str]) -> str:
+    shared = SECTION_SEP.join(p.strip() for p in shared_parts if p and p.strip())
+    per_file = SECTION_SEP.join(p.strip() for p in file_parts if p and p.strip())
+    return f"{shared}{SECTION_SEP}{per_file}".strip()
+
+
+def prefix_key(shared_parts: list[str]) -> str:
+    joined = SECTION_SEP.join(p.strip() for p in shared_parts if p and p.strip())
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:12]
+
+
+def order_by_prefix(keys: list[str], priorities: list[float] | None = None) -> list[int]:
+    """
+    같은 prefix를 가진 요청끼리 연속 배치되도록 인덱스 순서 반환
+    - prefix 그룹 순서는 처음 등장한 순서 유지, 그룹 내부 순서도 유지
+    - priorities 가 주어지면 마감과 무관하게 끝낼 묶음(must_finish 이상)을 먼저, 묶음 안에서는 prefix 순서
+    """
+    first_seen = {}
+    for i, key in enumerate(keys):
+        first_seen.setdefault(key, i)
+    band = [0] * len(keys)
+    if priorities is not None:
+        must_finish = cfg.get_schedule_config()["must_finish_importance"]
+        band = [0 if (p or 0) >= must_finish else 1 for p in priorities]
+    return sorted(range(len(keys)), key=lambda i: (band[i], first_seen[keys[i]], i))
@@ -0,0 +1,86 @@
+from utils.cfg import cfg
+from utils.metrics import MetricsStore
+
+# 🔀 요청 단위 모델 라우팅 (user_config 'routing' → 단계별 규칙 목록, 위에서부터 첫 매치)
+# - 조건: min/max_importance, max_prompt_tokens, file_strategy
+# - 최근 이력상 오류율/지연이 기준을 넘는 모델은 건너뜀
+# - 매치 없으면 단계 기본 모델(config 첫 번째) 사용
+HISTORY_WINDOW_SEC = 7 * 86400
+DEFAULT_MAX_ERROR_RATE = 0.2
+
+
+class RoutingPolicy:
+    def __init__(self, stage: str, config: dict, metrics: MetricsStore | None = None):
+        self.stage = stage
+        self.config = config
+        self.primary = config["model"][0]
+        self.rules = ((cfg.get_user_config().get("routing") or {}).get(stage)) or []
+        self.metrics = metrics or MetricsStore()
+        self._health: dict | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rules)
+
+    def _history(self) -> dict:
+        if self._health is None:
+            try:
+                rows = self.metrics.stats(HISTORY_WINDOW_SEC, stage=self.stage)
+            except Exception:
+                rows = []
+            self._health = {r["model"]: r for r in rows}
+        return self._health
+
+    def _healthy(self, model: str, rule: dict) -> bool:
+        hist = self._history().get(model)
+        if not hist:
+            return True
+        if hist["error rate"] > rule.get("max_error_rate", DEFAULT_MAX_ERROR_RATE):
+            return False
+        max_p95 = rule.get("max_p95_s")
+        return not (max_p95 and hist["p95"] and hist["p95"] > max_p95)
+
+    @staticmethod
+    def _matches(rule: dict, importance, file_strategy, tokens_in: int) -> bool:
+        if "max_importance" in rule and (importance is None or importance > rule["max_importance"]):
+            return False
+        if "min_importance" in rule and (importance is None or importance < rule["min_importance"]):
+            return False
+        if "max_prompt_tokens" in rule and tokens_in > rule["max_prompt_tokens"]:
+            return False
+        if "file_strategy" in rule and file_strategy not in rule["file_strategy"]:
+            return False
+        return True
+
+    def choose(self, importance=None, file_strategy: str | None = None, tokens_in: int = 0) -> str:
+        for rule in self.rules:
+            model = rule.get("model")
+            if model not in cfg.MODEL_PROVIDER:
+                continue
+            if self._matches(rule, importance, file_strategy, tokens_in) and self._healthy(model, rule):
+                return model
+        return self.primary
+
+    def models(self) -> list[str]:
+        """규칙에 등장하는 (알려진) 모델 목록"""
+        return [r["model"] for r in self.rules if r.get("model") in cfg.MODEL_PROVIDER]
+
+    def routed_config(self, model: str) -> dict:
+        """선택 모델을 맨 앞에, 기존 fallback 체인은 그 뒤에 유지"""
+        if model == self.primary:
+            return self.config
+        chain = [(cfg.MODEL_PROVIDER[model], model)] + [
+            (p, m) for p, m in zip(self.config["provider"], self.config["model"]) if m != model
+        ]
+        return {**self.config, "provider": [p for p, _ in chain], "model": [m for _, m in chain]}
+
+
+def routing_saving(primary: str, model: str, token_in: int, cached: int, token_out: int) -> float:
+    """기본 모델로 보냈을 때 대비 절감액(USD), 같은 토큰 수 기준"""
+    if model == primary:
+        return 0.0
+
+    def cost(m: str) -> float:
+        return (cfg.calc_cost(m, token_in - cached, "input") + cfg.calc_cost(m, cached, "cached")
+                + cfg.calc_cost(m, token_out, "output"))
+    return round(cost(primary) - cost(model), 6)
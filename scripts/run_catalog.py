@@ -0,0 +1,309 @@
+"""
+실행 이력 카탈로그 (SQLite, logs/catalog.sqlite)
+- 실행 종료 시 그 실행의 메타데이터 / 파일별 전략·결과 / LLM 호출(토큰, 비용, 지연)을 색인
+- results/ 를 실행마다 뒤지지 않고 여러 실행에 걸친 질의를 SQL 한 번으로 처리
+
+사용:
+    python -m scripts.run_catalog backfill              # 기존 results/ 전체 색인 (이미 색인된 실행은 건너뜀)
+    python -m scripts.run_catalog runs --since 30d
+    python -m scripts.run_catalog files --since 30d --top 10
+    python -m scripts.run_catalog stages --since 7d
+    python -m scripts.run_catalog sql "SELECT stage, avg(latency) FROM calls GROUP BY stage"
+"""
+import argparse
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+from utils.cfg import cfg
+from utils.metrics import parse_window
+from scripts.dataframe import load_df
+from scripts.checkpoint import STAGES, RunCheckpoint
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,
+    started REAL,
+    repo TEXT,
+    branch TEXT,
+    files INTEGER,
+    calls INTEGER,
+    tokens_in INTEGER,
+    tokens_out INTEGER,
+    cached INTEGER,
+    cost_krw REAL,
+    cache_saving_krw REAL,
+    routing_saving_krw REAL,
+    last_stage TEXT,
+    complete INTEGER,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS files (
+    run TEXT NOT NULL,
+    file TEXT NOT NULL,
+    path TEXT,
+    component_type TEXT,
+    importance INTEGER,
+    file_strategy TEXT,
+    required_detail INTEGER,
+    recommended_length INTEGER,
+    diff_tokens INTEGER,
+    explained INTEGER,
+    commit_msg INTEGER,
+    committed INTEGER,
+    PRIMARY KEY (run, file)
+);
+CREATE TABLE IF NOT EXISTS calls (
+    run TEXT NOT NULL,
+    stage TEXT,
+    tag TEXT,
+    file TEXT,
+    llm TEXT,
+    purpose TEXT,
+    tokens_in INTEGER,
+    cached INTEGER,
+    tokens_out INTEGER,
+    cost_krw REAL,
+    latency REAL,
+    ttft REAL,
+    tps REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS idx_files_file ON files (file);
+CREATE INDEX IF NOT EXISTS idx_calls_run ON calls (run, stage);
+CREATE INDEX IF NOT EXISTS idx_calls_file ON calls (file);
+"""
+RUN_COLUMNS = ["run", "started", "repo", "branch", "files", "calls", "tokens_in", "tokens_out", "cached",
+               "cost_krw", "cache_saving_krw", "routing_saving_krw", "last_stage", "complete", "indexed_at"]
+FILE_COLUMNS = ["run", "file", "path", "component_type", "importance", "file_strategy", "required_detail",
+                "recommended_length", "diff_tokens", "explained", "commit_msg", "committed"]
+CALL_COLUMNS = ["run", "stage", "tag", "file", "llm", "purpose", "tokens_in", "cached", "tokens_out",
+                "cost_krw", "latency", "ttft", "tps"]
+
+
+def run_started(timestamp: str) -> float | None:
+    started = cfg.parse_timestamp(timestamp)
+    return started.timestamp() if started else None
+
+
+def _num(value, cast=float):
+    try:
+        return None if value is None or pd.isna(value) else cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _insert(conn: sqlite3.Connection, table: str, columns: list[str], rows: list[tuple]):
+    if rows:
+        conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+
+
+class RunCatalog:
+    def __init__(self, db_path: Path | None = None):
+        self.db_path = Path(db_path or cfg.CATALOG_DB)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """트랜잭션(commit/rollback) 후 연결까지 닫음 (sqlite3 연결의 with 는 commit 만 함)"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def indexed(self) -> set[str]:
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT run FROM runs")}
+
+    # 📚 실행 하나 색인 (같은 실행은 지우고 다시 기록 → --resume 으로 이어진 실행도 최신 상태로)
+    def index_run(self, timestamp: str) -> bool:
+        paths = cfg.get_results_path(timestamp)
+        repo_df = load_df(paths["repo"], columns=["Repo", "Current branch"])
+        if repo_df is None or repo_df.empty:
+            return False
+        info_df = load_df(paths["info"], columns=["id", "file", "path", "diff token"])
+        strategy_df = load_df(paths["strategy"], columns=[
+            "id", "File", "File strategy", "Required Commit Detail", "Recommended length",
+            "Component Type", "Importance"])
+        calls = self._call_rows(timestamp, paths, info_df, strategy_df)
+        files = self._file_rows(timestamp, info_df, strategy_df)
+
+        checkpoint = RunCheckpoint(timestamp)
+        done = [stage for stage in STAGES if (checkpoint.dir / f"{stage}.done").exists()]
+        run = (
+            timestamp, run_started(timestamp),
+            str(repo_df["Repo"].iloc[0]), str(repo_df["Current branch"].iloc[0]),
+            len(files), len(calls),
+            sum(c[6] or 0 for c in calls), sum(c[8] or 0 for c in calls), sum(c[7] or 0 for c in calls),
+            round(sum(c[9] or 0 for c in calls), 4),
+            self._ledger_sum(paths["in"], "cache saving(krw)"), self._ledger_sum(paths["in"], "routing saving(krw)"),
+            done[-1] if done else None, int(STAGES[-1] in done), time.time(),
+        )
+        with self._connect() as conn:
+            for table in ("runs", "files", "calls"):
+                conn.execute(f"DELETE FROM {table} WHERE run = ?", (timestamp,))
+            _insert(conn, "runs", RUN_COLUMNS, [run])
+            _insert(conn, "files", FILE_COLUMNS, files)
+            _insert(conn, "calls", CALL_COLUMNS, calls)
+        return True
+
+    @staticmethod
+    def _ledger_sum(path: Path, column: str) -> float:
+        df = load_df(path, columns=[column])
+        if df is None or column not in df.columns:
+            return 0.0
+        return round(float(pd.to_numeric(df[column], errors="coerce").fillna(0).sum()), 4)
+
+    @staticmethod
+    def _call_rows(timestamp: str, paths: dict, info_df, strategy_df) -> list[tuple]:
+        in_df = load_df(paths["in"], columns=["prompt", "llm", "meta data", "token", "cached token", "cost(krw)"])
+        out_df = load_df(paths["out"], columns=["purpose", "token", "cost(krw)", "latency(s)", "ttft(s)", "tok/s"])
+        if in_df is None or out_df is None:
+            return []
+        # in/out 장부는 같은 CallRecord 에서 같은 순서로 기록됨 → 위치로 짝지음
+        n = min(len(in_df), len(out_df))
+        in_df, out_df = in_df.iloc[:n].reset_index(drop=True), out_df.iloc[:n].reset_index(drop=True)
+        # tag 가 파일 id 인 호출(단일 파일 explain/mk_msg)만 파일에 귀속, 묶음(pack_N)/전략 호출은 file 없음
+        id_to_file = {}
+        for df, col in ((info_df, "file"), (strategy_df, "File")):
+            if df is not None and "id" in df.columns:
+                id_to_file.update(zip(df["id"], df[col]))
+
+        rows = []
+        for i in range(n):
+            tag = in_df.at[i, "prompt"]
+            meta = str(in_df.at[i, "meta data"] or "")
+            rows.append((
+                timestamp, meta.split(":")[0] or None, tag, id_to_file.get(tag), in_df.at[i, "llm"],
+                out_df.at[i, "purpose"],
+                _num(in_df.at[i, "token"], int), _num(in_df.at[i, "cached token"], int), _num(out_df.at[i, "token"], int),
+                round((_num(in_df.at[i, "cost(krw)"]) or 0) + (_num(out_df.at[i, "cost(krw)"]) or 0), 4),
+                _num(out_df.at[i, "latency(s)"]), _num(out_df.at[i, "ttft(s)"]), _num(out_df.at[i, "tok/s"]),
+            ))
+        return rows
+
+    @staticmethod
+    def _file_rows(timestamp: str, info_df, strategy_df) -> list[tuple]:
+        if strategy_df is None or strategy_df.empty:
+            return []
+        info = info_df.drop_duplicates("file").set_index("file").to_dict(orient="index") if info_df is not None else {}
+        classified = cfg.LOGS_DIR / timestamp / "classified_result.json"
+        try:
+            result = json.loads(classified.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            result = {}
+        committed = set(RunCheckpoint(timestamp).load_progress("upload").get("committed", []))
+
+        rows = []
+        for _, row in strategy_df.drop_duplicates("File").iterrows():
+            file = row["File"]
+            meta = info.get(file, {})
+            rows.append((
+                timestamp, file, meta.get("path"), row.get("Component Type"),
+                _num(row.get("Importance"), int), row.get("File strategy"),
+                _num(row.get("Required Commit Detail"), int), _num(row.get("Recommended length"), int),
+                _num(meta.get("diff token"), int),
+                int(file in result.get("fx_summary", {})), int(file in result.get("commit", {})),
+                int(file in committed),
+            ))
+        return rows
+
+    # 🗂️ 기존 results/ 색인 (dry-run 결과 제외)
+    def backfill(self, force: bool = False, log_func=print) -> int:
+        if not cfg.RESULTS_DIR.exists():
+            return 0
+        done = set() if force else self.indexed()
+        count = 0
+        for run_dir in sorted(cfg.RESULTS_DIR.iterdir()):
+            if not run_dir.is_dir() or run_dir.name.endswith("_dry") or run_dir.name in done:
+                continue
+            try:
+                if self.index_run(run_dir.name):
+                    count += 1
+            except Exception as e:
+                log_func(f"⚠️ {run_dir.name} 색인 실패: {e}")
+        return count
+
+    def query(self, sql: str, params: tuple = ()) -> tuple[list[str], list[tuple]]:
+        with self._connect() as conn:
+            cur = conn.execute(sql, params)
+            return [d[0] for d in cur.description or []], cur.fetchall()
+
+
+# 📋 자주 쓰는 질의 (기간은 실행 시작 시각 기준)
+REPORTS = {
+    "runs": """
+        SELECT run, repo, branch, files, calls, tokens_in, tokens_out, round(cost_krw, 1) AS cost_krw,
+               last_stage, complete
+        FROM runs WHERE started >= ? ORDER BY run DESC
+    """,
+    "files": """
+        SELECT c.file, count(DISTINCT c.run) AS runs, count(*) AS calls,
+               sum(c.tokens_in) AS tokens_in, sum(c.tokens_out) AS tokens_out, round(sum(c.cost_krw), 1) AS cost_krw
+        FROM calls c JOIN runs r ON r.run = c.run
+        WHERE r.started >= ? AND c.file IS NOT NULL
+        GROUP BY c.file ORDER BY cost_krw DESC LIMIT ?
+    """,
+    "stages": """
+        SELECT c.stage, c.llm, count(*) AS calls, round(avg(c.latency), 2) AS avg_latency,
+               round(avg(c.tps), 1) AS avg_tps, sum(c.tokens_in) AS tokens_in, sum(c.tokens_out) AS tokens_out,
+               round(sum(c.cost_krw), 1) AS cost_krw
+        FROM calls c JOIN runs r ON r.run = c.run
+        WHERE r.started >= ?
+        GROUP BY c.stage, c.llm ORDER BY c.stage, cost_krw DESC
+    """,
+}
+
+
+def print_table(columns: list[str], rows: list[tuple]):
+    if not rows:
+        print("⚠️ 해당 기간 기록 없음")
+        return
+    cells = [[("-" if v is None else str(v)) for v in row] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실행 이력 카탈로그")
+    parser.add_argument("--db", type=Path)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    fill = sub.add_parser("backfill", help="기존 results/ 색인")
+    fill.add_argument("--force", action="store_true", help="이미 색인된 실행도 다시 색인")
+    idx = sub.add_parser("index", help="실행 하나 (다시) 색인")
+    idx.add_argument("run")
+    for name, help_text in (("runs", "실행별 요약"), ("files", "파일별 LLM 비용 상위"), ("stages", "단계/모델별 평균 지연, 비용")):
+        rep = sub.add_parser(name, help=help_text)
+        rep.add_argument("--since", default="30d", help="조회 기간 (예: 24h, 7d, 30d)")
+        if name == "files":
+            rep.add_argument("--top", type=int, default=20)
+    raw = sub.add_parser("sql", help="임의 SQL (runs / files / calls 테이블)")
+    raw.add_argument("query")
+    args = parser.parse_args()
+
+    catalog = RunCatalog(args.db)
+    if args.cmd == "backfill":
+        print(f"📚 {catalog.backfill(force=args.force)}개 실행 색인 완료 → {catalog.db_path}")
+    elif args.cmd == "index":
+        print("📚 색인 완료" if catalog.index_run(args.run) else f"⚠️ {args.run} 실행 결과 없음")
+    elif args.cmd == "sql":
+        print_table(*catalog.query(args.query))
+    else:
+        params = (time.time() - parse_window(args.since),)
+        if args.cmd == "files":
+            params += (args.top,)
+        print_table(*catalog.query(REPORTS[args.cmd], params))
+
+
+if __name__ == "__main__":
+    main()
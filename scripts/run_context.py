@@ -0,0 +1,90 @@
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from utils import exchange
+from utils.cfg import cfg
+from scripts.dataframe import load_df, save_df
+
+
+class RunContext:
+    """
+    RunAllPipeline 이 소유하는 실행 단위 상태
+    - 단계 간 repo/info/strategy DataFrame 은 메모리로 넘기고, 디스크 저장은 백그라운드 체크포인트
+    - 폴더 구조 텍스트처럼 단계마다 다시 구하던 값은 한 번만 계산, 환율은 생성 시 백그라운드 조회 시작
+    - 메모리에 없는 테이블은 처음 요청할 때 디스크에서 로드 (단독 실행, 이어서 실행)
+    - checkpoint/resuming: --resume 시 이전 실행에서 끝나지 않은 단계의 파일 단위 결과 재사용
+    """
+
+    def __init__(self, timestamp: str | None = None):
+        self.timestamp = timestamp or cfg.get_timestamp()
+        self.paths = cfg.get_results_path(self.timestamp)
+        self.log_file = cfg.init_log_file(self.timestamp)
+        self._frames: dict[str, pd.DataFrame | None] = {}
+        self._tree: str | None = None
+        self._checkpoints = ThreadPoolExecutor(max_workers=1, thread_name_prefix="df-checkpoint")
+        self._pending: list[tuple[str, Future]] = []
+        self.checkpoint = None  # scripts.checkpoint.RunCheckpoint (RunAllPipeline 실행 시)
+        self.resuming: set[str] = set()
+        exchange.prefetch(log_func=self.log)
+
+    def log(self, msg: str):
+        cfg.log(msg, self.log_file)
+
+    def frame(self, name: str) -> pd.DataFrame | None:
+        if name not in self._frames:
+            self._frames[name] = load_df(self.paths[name])
+        return self._frames[name]
+
+    def put(self, name: str, df: pd.DataFrame):
+        """메모리 갱신 후 스냅샷을 비동기로 저장 (단일 워커 → 같은 테이블은 순서대로 기록)"""
+        self._frames[name] = df
+        self._pending.append((f"{name}_df", self._checkpoints.submit(save_df, df.copy(), self.paths[name])))
+
+    def defer(self, name: str, func, *args):
+        """대기 중인 체크포인트 저장이 끝난 뒤 실행 (완료 표시 등), 앞선 저장이 실패했으면 건너뜀"""
+        prior = [future for _, future in self._pending]
+
+        def run():
+            if not any(future.exception() for future in prior):
+                func(*args)
+        self._pending.append((name, self._checkpoints.submit(run)))
+
+    def flush(self):
+        """대기 중인 체크포인트가 모두 디스크에 반영될 때까지 대기"""
+        pending, self._pending = self._pending, []
+        for name, future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                self.log(f"⚠️ {name} 체크포인트 저장 실패: {e}")
+        cfg.flush_log()
+
+    @property
+    def tree_structure(self) -> str:
+        if self._tree is None:
+            root_path = Path(self.frame("repo")["Root path"].iloc[0])
+            folder_lines, file_lines = cfg.build_llm_file_structure(root_path)
+            self._tree = "\n".join(folder_lines + file_lines)
+        return self._tree
+
+    @property
+    def exchange_rate(self) -> float:
+        """확정 환율 (__init__ 에서 시작한 백그라운드 조회 결과를 기다림)"""
+        return exchange.get_rate(log_func=self.log)
+
+
+# ✅ 단계 진입점: ctx 없이 호출되면(runall.py <step>, bench) 새 컨텍스트로 실행 후 체크포인트까지 반영
+def stage_entry(func):
+    @functools.wraps(func)
+    def wrapper(ctx: RunContext | None = None, *args, **kwargs):
+        if ctx is not None:
+            return func(ctx, *args, **kwargs)
+        ctx = RunContext()
+        try:
+            return func(ctx, *args, **kwargs)
+        finally:
+            ctx.flush()
+    return wrapper
@@ -0,0 +1,181 @@
+import json
+import math
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow 없으면 pickle 로 저장
+    pa = pq = None
+
+from scripts.call_ledger import IN_COLUMNS, OUT_COLUMNS
+
+# 🗄️ 실행 단위 DataFrame 저장소 (results/<ts>/df/*.parquet)
+# - 테이블별 컬럼 타입을 선언해 두고 저장 시 강제 → 리스트 컬럼은 Parquet list<string> 으로 그대로 저장
+# - 값 구조가 일정하지 않은 컬럼(dict, [bool, str] 등)은 json 문자열로 저장 후 복원
+# - 로드 시 필요한 컬럼만 읽음(columns), 파일은 memory map 으로 열기
+# - pyarrow 가 없으면 같은 경로의 .pkl 로 저장/로드 (기존 실행 결과도 그대로 읽힘)
+STR, INT, FLOAT, BOOL, LIST, JSON = "str", "int", "float", "bool", "list", "json"
+INDEX_COLUMN = "__index__"
+
+_LEDGER_KINDS = {
+    "prompt": STR, "llm": STR, "meta data": STR, "purpose": STR, "Is upload": BOOL, "upload pf": STR,
+    "token": INT, "cached token": INT, "cost($)": FLOAT, "cost(krw)": FLOAT,
+    "cache saving(krw)": FLOAT, "routing saving(krw)": FLOAT,
+    "latency(s)": FLOAT, "ttft(s)": FLOAT, "tok/s": FLOAT, "name4save": STR, "save_path": LIST,
+}
+
+SCHEMAS: dict[str, dict[str, str]] = {
+    "repo": {
+        "Repo": STR, "Main branch": STR, "Branch list": LIST, "Current branch": STR,
+        "Contributors": INT, "Root path": STR, "Commit frequency": INT, "File count": JSON,
+        "Diff list": LIST, "Diff stat": STR, "Readme token": INT,
+    },
+    "info": {
+        "id": STR, "file": STR, "file type": STR, "path": STR, "file token": INT,
+        "diff var name": STR, "diff token": INT, "Files in folder": INT,
+        "last commit time": LIST, "5 latest commit": LIST, "name4save": STR, "save_path": LIST,
+    },
+    "strategy": {
+        "id": STR, "File": STR, "File strategy": STR, "Num of extract file": INT,
+        "Required Commit Detail": INT, "Recommended length": INT, "Component Type": STR,
+        "Importance": INT, "Most Related Files": LIST, "Readme strategy": JSON,
+        "name4save": STR, "save_path": LIST,
+    },
+    "in": {"id": STR, **{c: _LEDGER_KINDS[c] for c in IN_COLUMNS}},
+    "out": {"id": STR, **{c: _LEDGER_KINDS[c] for c in OUT_COLUMNS}},
+    "cost": {
+        "run": STR, "day": STR, "stage": STR, "tag": STR, "file": STR, "model": STR,
+        "tokens_in": INT, "cached": INT, "tokens_out": INT, "cost_usd": FLOAT, "cost_krw": FLOAT,
+        "cache_saving_krw": FLOAT, "routing_saving_krw": FLOAT,
+    },
+}
+
+# 파일명(stem) → 테이블
+TABLES = {"repo_df": "repo", "info_df": "info", "strategy_df": "strategy",
+          "in_df": "in", "out_df": "out", "in_prompt_df": "in", "out_prompt_df": "out"}
+
+_ARROW_TYPES = {} if pa is None else {
+    STR: pa.string(), INT: pa.int64(), FLOAT: pa.float64(), BOOL: pa.bool_(),
+    LIST: pa.list_(pa.string()), JSON: pa.string(),
+}
+
+
+def schema_of(path: Path) -> dict[str, str]:
+    return SCHEMAS.get(TABLES.get(path.stem, ""), {})
+
+
+def _is_null(v) -> bool:
+    return v is None or (isinstance(v, float) and math.isnan(v)) or v is pd.NA or v is pd.NaT
+
+
+def _to_int(v):
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+_ENCODERS = {
+    STR: str,
+    INT: _to_int,
+    FLOAT: _to_float,
+    BOOL: bool,
+    LIST: lambda v: [str(x) for x in v],
+    JSON: lambda v: json.dumps(v, ensure_ascii=False, default=str),
+}
+
+
+def _encode(values, kind: str) -> list:
+    encode = _ENCODERS[kind]
+    return [None if _is_null(v) else encode(v) for v in values]
+
+
+_DECODERS = {
+    STR: str,
+    LIST: list,
+    JSON: json.loads,
+}
+
+
+def _decode(series: pd.Series, kind: str) -> pd.Series:
+    # 문자열/리스트/json 은 None 을 쓰는 object 컬럼으로 복원 (기존 pickle 과 동일하게)
+    # 결측 있는 정수는 nullable Int64 → 정수 값/비교 연산(>, <=)이 그대로 유지됨
+    if kind == INT:
+        return series.astype("Int64") if series.isna().any() else series
+    if kind not in _DECODERS:
+        return series
+    decode = _DECODERS[kind]
+    return pd.Series([None if _is_null(v) else decode(v) for v in series],
+                     index=series.index, name=series.name, dtype=object)
+
+
+def _pickle_path(path: Path) -> Path:
+    return path.with_suffix(".pkl")
+
+
+def write(df: pd.DataFrame, path: Path, table: str | None = None):
+    """table: 파일명으로 테이블을 알 수 없는 경우(비용 장부 part 등) 스키마 지정"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if pa is None:
+        df.to_pickle(_pickle_path(path))
+        return
+
+    schema = SCHEMAS.get(table, {}) if table else schema_of(path)
+    arrays, fields = [], []
+    for col in df.columns:
+        kind = schema.get(col)
+        if kind:
+            arrays.append(pa.array(_encode(df[col].tolist(), kind), type=_ARROW_TYPES[kind]))
+        else:
+            # 선언되지 않은 컬럼: 타입 추론, 실패하면 json 으로 보존
+            try:
+                arrays.append(pa.array(df[col], from_pandas=True))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                kind = JSON
+                arrays.append(pa.array(_encode(df[col].tolist(), JSON), type=pa.string()))
+        fields.append(pa.field(str(col), arrays[-1].type, metadata={"kind": kind or ""}))
+
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        arrays.append(pa.array(df.index.tolist(), type=pa.int64()))
+        fields.append(pa.field(INDEX_COLUMN, pa.int64()))
+
+    table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    _pickle_path(path).unlink(missing_ok=True)
+
+
+def read(path: Path, columns: list[str] | None = None) -> pd.DataFrame | None:
+    if pa is not None and path.exists():
+        names = pq.read_schema(path).names
+        wanted = names if columns is None else [c for c in columns if c in names]
+        if INDEX_COLUMN in names and INDEX_COLUMN not in wanted:
+            wanted.append(INDEX_COLUMN)
+        table = pq.read_table(path, columns=wanted, memory_map=True)
+        df = table.to_pandas()
+        for f in table.schema:
+            kind = (f.metadata or {}).get(b"kind", b"").decode()
+            if kind:
+                df[f.name] = _decode(df[f.name], kind)
+        if INDEX_COLUMN in df.columns:
+            df = df.set_index(INDEX_COLUMN)
+            df.index.name = None
+        return df
+
+    pkl = _pickle_path(path)
+    if not pkl.exists():
+        return None
+    df = pd.read_pickle(pkl)
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
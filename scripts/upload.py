@@ -2,32 +2,48 @@ from pathlib import Path
 import json
 from collections import defaultdict
 from utils.cfg import cfg
-from scripts.dataframe import load_df
+from utils import trace
+from scripts.run_context import RunContext, stage_entry
 from scripts.classify import classify_main
 from scripts.upload_utils import get_file_path, do_git_commit, send_notification
 from scripts.ext_info import to_safe_filename
 import record.notion as notion
 
-def upload_main():
-    timestamp = cfg.get_timestamp()  # ✅ 고정값 사용
-    log_file = cfg.init_log_file(timestamp)
-    paths = cfg.get_results_path(timestamp)
+@stage_entry
+def upload_main(ctx: RunContext):
+    log_file = ctx.log_file
 
-    strategy_df = load_df(paths["strategy"])
+    strategy_df = ctx.frame("strategy")
+    info_df = ctx.frame("info")
     if strategy_df is None or strategy_df.empty:
         cfg.log("❌ strategy_df 없음 → 업로드 중단", log_file)
         return
 
-    result = classify_main()
+    result = classify_main(ctx)
     commit_msgs = result["commit"]
     fx_summary = result["fx_summary"]
     notify = result["notify"]
 
     strategy_map = strategy_df.set_index("File").to_dict(orient="index")
+    # strategy_df에는 경로가 없으므로 info_df에서 파일별 폴더 경로 조회
+    path_map = dict(zip(info_df["file"], info_df["path"])) if info_df is not None else {}
     commit_result = {}
     commit_groups = {"success": [], "fallback": [], "fail": []}
 
+    # 📍 --resume: 이전 실행에서 이미 커밋/알림/업로드된 항목은 건너뜀
+    checkpoint = ctx.checkpoint
+    progress = checkpoint.load_progress("upload") if checkpoint and "upload" in ctx.resuming else {}
+    committed = progress.setdefault("committed", [])
+    uploaded = progress.setdefault("notion", [])
+
+    def save_progress():
+        if checkpoint:
+            checkpoint.save_progress("upload", progress)
+
     for file in strategy_df["File"]:
+        if file in committed:
+            commit_result[file] = "⏭️ 이전 실행에서 커밋됨"
+            continue
         row = strategy_map.get(file)
         if not row:
             cfg.log(f"⚠️ strategy_df에 {file} 없음", log_file)
@@ -35,23 +51,31 @@ def upload_main():
             commit_groups["fail"].append(file)
             continue
 
-        filepath = Path(row["path"]) / to_safe_filename(file)
+        filepath = Path(path_map.get(file, ".")) / to_safe_filename(file)
 
         if file in commit_msgs:
             msg = commit_msgs[file]
             success = do_git_commit(filepath, msg, lambda m: cfg.log(m, log_file))
             commit_result[file] = "✅" if success else "❌"
             commit_groups["success" if success else "fail"].append(file)
+            if success:
+                committed.append(file)
+                save_progress()
         else:
             dummy_msg = f"chore(auto): {file} 변경사항 (no LLM commit message)"
             success = do_git_commit(filepath, dummy_msg, lambda m: cfg.log(m, log_file))
             commit_result[file] = "⚠️ fallback" if success else "❌"
             commit_groups["fallback" if success else "fail"].append(file)
+            if success:
+                committed.append(file)
+                save_progress()
 
     cfg.log(f"✅ Git 커밋 결과 요약:\n{json.dumps(commit_result, ensure_ascii=False, indent=2)}", log_file)
 
     notify_text = (
         f"{notify['summary']}\n\n📌 비용 요약: {notify['cost_total']}\n"
+        + (f"{notify['cache_saving']}\n" if notify.get("cache_saving") else "")
+        + (f"{notify['routing_saving']}\n" if notify.get("routing_saving") else "")
         + "\n".join(notify["commits"][:5])
     )
     if commit_groups["fail"]:
@@ -61,12 +85,22 @@ def upload_main():
     if notify.get("review_files"):
         notify_text += f"\n🧐 수동 검토 대상: {', '.join(notify['review_files'])}"
 
-    send_notification(["kakao", "slack", "discord", "gmail"], notify_text, lambda m: cfg.log(m, log_file))
+    if progress.get("notified"):
+        cfg.log("⏭️ 이전 실행에서 알림 전송됨 → 생략", log_file)
+    else:
+        send_notification(["kakao", "slack", "discord", "gmail"], notify_text, lambda m: cfg.log(m, log_file))
+        progress["notified"] = True
+        save_progress()
 
     notion_failures = []
     for file, text in fx_summary.items():
+        if file in uploaded:
+            continue
         try:
-            notion.upload_fx_record(file, text)
+            with trace.span("notion upload", "notify", file=file):
+                notion.upload_fx_record(file, text)
+            uploaded.append(file)
+            save_progress()
         except Exception as e:
             notion_failures.append(file)
             cfg.log(f"[NOTION] {file} 업로드 실패: {e}", log_file)
@@ -1,6 +1,7 @@
 from pathlib import Path
 import subprocess
 from typing import Callable
+from utils import trace
 
 def get_file_path(file: str, strategy_df, log_func: Callable | None = None) -> Path | None:
     """
@@ -22,9 +23,12 @@ def do_git_commit(filepath: Path, msg: str, log_func: Callable) -> bool:
     - 실패 시 False 반환 + 로그 기록
     """
     try:
-        subprocess.run(["git", "add", str(filepath)], check=True)
-        subprocess.run(["git", "commit", "-m", msg], check=True)
-        subprocess.run(["git", "push"], check=True)
+        with trace.span("git add", "git", file=str(filepath)):
+            subprocess.run(["git", "add", str(filepath)], check=True)
+        with trace.span("git commit", "git", file=str(filepath)):
+            subprocess.run(["git", "commit", "-m", msg], check=True)
+        with trace.span("git push", "git", file=str(filepath)):
+            subprocess.run(["git", "push"], check=True)
         return True
     except subprocess.CalledProcessError as e:
         log_func(f"❌ Git 커밋 실패: {filepath} → {e}")
@@ -59,7 +63,8 @@ def send_notification(platforms: list[str], msg: str, log_func: Callable) -> lis
             continue
 
         try:
-            sender(msg)
+            with trace.span(f"notify {pf}", "notify"):
+                sender(msg)
         except Exception as e:
             log_func(f"[알림 실패] {pf}: {e}")
             failed.append(pf)
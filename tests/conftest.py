@@ -0,0 +1,33 @@
+import copy
+
+import pytest
+
+from utils.cfg import cfg
+
+
+class FakeEncoding:
+    """tiktoken 인코딩 대용 (단어 단위) → 테스트 중 인코딩 파일 다운로드 없음"""
+    name = "fake"
+
+    def encode(self, text: str, **kwargs) -> list[str]:
+        return text.split()
+
+
+# 🧪 실행 산출물 경로(results/logs/cost/artifacts)를 테스트별 임시 폴더로
+@pytest.fixture
+def run_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg, "RESULTS_DIR", tmp_path / "results")
+    monkeypatch.setattr(cfg, "LOGS_DIR", tmp_path / "logs")
+    monkeypatch.setattr(cfg, "COST_DIR", tmp_path / "cost")
+    monkeypatch.setattr(cfg, "ARTIFACT_DIR", tmp_path / "artifacts")
+    monkeypatch.setattr(cfg, "METRICS_DB", tmp_path / "logs" / "metrics.sqlite")
+    monkeypatch.setattr(cfg, "DRY_RUN", False)
+    return tmp_path
+
+
+# 🧪 user_config 일부 섹션만 바꿔서 사용 (테스트가 끝나면 원래 설정으로)
+@pytest.fixture
+def user_config(monkeypatch):
+    conf = copy.deepcopy(cfg.get_user_config())
+    monkeypatch.setattr(cfg, "_user_config_cache", conf)
+    return conf
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from utils.artifacts import ArtifactStore, MANIFEST_NAME, load_manifest, split_chunks
+from utils.cfg import cfg
+
+# 반복되는 큰 블록 (README, 폴더 구조 등)
+BLOCK = "".join(f"line {i} of the shared block\n" for i in range(400))
+
+
+@pytest.fixture
+def store(run_dirs):
+    return ArtifactStore(mode="cas")
+
+
+def run_dir(name: str | None = None):
+    return cfg.RESULTS_DIR / (name or cfg.get_timestamp())
+
+
+def test_split_chunks_round_trip():
+    text = BLOCK + "x" * 70000  # 줄바꿈 없는 긴 줄도 MAX_CHUNK 단위로 자름
+    assert b"".join(split_chunks(text)).decode("utf-8") == text
+
+
+def test_put_get_dedups_shared_blocks(store):
+    run = run_dir()
+    a, b = run / "explain" / "in" / "a.txt", run / "explain" / "in" / "b.txt"
+    store.write_text(a, "prompt A\n" + BLOCK)
+    chunks = store.stats()["chunks"]
+    store.write_text(b, "prompt B 는 다름\n" + BLOCK)
+
+    assert store.read_text(a) == "prompt A\n" + BLOCK
+    assert store.read_text(b) == "prompt B 는 다름\n" + BLOCK
+    assert store.stats()["chunks"] < 2 * chunks  # 공통 블록 chunk 는 한 번만 저장
+    assert not a.exists() and store.exists(a)  # 평문 파일 대신 manifest
+    assert set(load_manifest(run)) == {"explain/in/a.txt", "explain/in/b.txt"}
+
+    fresh = ArtifactStore(mode="cas")  # 다른 프로세스도 manifest 로 복원
+    assert fresh.read_text(b).startswith("prompt B")
+
+
+def test_rewrite_uses_latest_entry(store):
+    path = run_dir() / "out.txt"
+    store.write_text(path, "first")
+    store.write_text(path, "second")
+    assert ArtifactStore(mode="cas").read_text(path) == "second"
+
+
+def test_plain_files_mode_and_outside_results(run_dirs, tmp_path):
+    path = run_dir() / "explain" / "out" / "a.txt"
+    files = ArtifactStore(mode="files")
+    files.write_text(path, "평문")
+    assert path.read_text(encoding="utf-8") == "평문"
+    assert not (run_dir() / MANIFEST_NAME).exists()
+
+    outside = tmp_path / "elsewhere" / "note.txt"
+    ArtifactStore(mode="cas").write_text(outside, "밖")
+    assert outside.read_text(encoding="utf-8") == "밖"
+    assert ArtifactStore(mode="cas").read_text(path) == "평문"  # 이전 방식 결과도 그대로 읽힘
+
+
+def test_default_mode_is_files(run_dirs, user_config):
+    user_config.pop("artifacts", None)
+    assert ArtifactStore().mode == "files"
+
+
+def old_and_new_runs(store):
+    old, new = run_dir("240101_0900"), run_dir()
+    store.write_text(old / "only_old.txt", "old only\n" + "o" * 2000)
+    store.write_text(new / "new.txt", "new\n" + BLOCK)
+    (old / "df").mkdir()
+    (old / "df" / "out_df.parquet").write_bytes(b"x")
+    (cfg.LOGS_DIR / old.name).mkdir(parents=True)
+    for chunk in (store.root / "chunks").rglob("*.z*"):
+        os.utime(chunk, (0, 0))  # 유예 시간(GC_GRACE_SEC) 이전에 쓴 chunk
+    return old, new
+
+
+def test_gc_removes_manifest_only_by_default(store):
+    old, new = old_and_new_runs(store)
+    runs, chunks = store.gc(keep_days=30, log_func=lambda msg: None)
+
+    assert runs == 1 and chunks >= 1
+    assert not (old / MANIFEST_NAME).exists()
+    assert (old / "df" / "out_df.parquet").exists() and (cfg.LOGS_DIR / old.name).exists()
+    assert store.read_text(new / "new.txt") == "new\n" + BLOCK  # 남은 실행의 chunk 는 보존
+
+
+def test_gc_prune_runs_deletes_run_and_logs(store):
+    old, new = old_and_new_runs(store)
+    store.gc(keep_days=30, prune_runs=True, log_func=lambda msg: None)
+    assert not old.exists() and not (cfg.LOGS_DIR / old.name).exists()
+    assert new.exists()
+
+
+def test_gc_dry_run_keeps_everything(store):
+    old, _ = old_and_new_runs(store)
+    before = store.stats()
+    runs, chunks = store.gc(keep_days=30, dry_run=True, log_func=lambda msg: None)
+    assert runs == 1 and chunks >= 1
+    assert (old / MANIFEST_NAME).exists() and store.stats() == before
+
+
+def test_gc_keeps_recent_unreferenced_chunks(store):
+    store.write_text(run_dir("240101_0900") / "a.txt", "x" * 2000)
+    assert store.gc(keep_days=30, log_func=lambda msg: None) == (1, 0)  # 막 쓴 chunk 는 유예
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from utils import exchange
+from utils.cfg import cfg
+from scripts import budget
+from scripts.budget import BudgetGovernor, cheaper_config, LEVEL_KEYWORD_ONLY, LEVEL_CHEAP_MODEL, LEVEL_SKIP_LOW
+
+
+@pytest.fixture
+def governor(run_dirs, user_config):
+    def make(**conf):
+        user_config["budget"] = conf
+        return BudgetGovernor("260101_0000")
+    return make
+
+
+def test_disabled_without_caps(governor):
+    gov = governor()
+    assert not gov.enabled
+    assert gov.reserve(1e9)
+    assert gov.level(1e9) == 0
+
+
+def test_month_cap_subtracts_spent(governor, monkeypatch):
+    monkeypatch.setattr(budget, "load_month_spent", lambda ts, exclude=None: 900.0)
+    assert governor(run_krw=500, month_krw=1000).limit == 100.0
+    assert governor(month_krw=800).limit == 0.0
+
+
+def test_reserve_rejects_over_limit(governor):
+    gov = governor(run_krw=100)
+    assert gov.reserve(60)
+    gov.settle(60, 70)  # 실제 비용이 예약보다 큼
+    assert gov.spent == 70 and gov.reserved == 0
+    assert not gov.reserve(40)  # 진행 중 예약 없이 실제 사용액만으로도 초과 → 즉시 거부
+    assert gov.reserve(30)
+
+
+def test_reserve_waits_for_in_flight_settle(governor):
+    gov = governor(run_krw=100)
+    assert gov.reserve(80)
+    result = {}
+    waiter = threading.Thread(target=lambda: result.setdefault("ok", gov.reserve(50)))
+    waiter.start()
+    time.sleep(0.05)
+    assert "ok" not in result  # 예약 80 이 정산될 때까지 대기
+    gov.settle(80, 20)
+    waiter.join(timeout=2)
+    assert result["ok"] and gov.reserved == 50 and gov.spent == 20
+
+
+def test_level_thresholds(governor):
+    gov = governor(run_krw=100, degrade_at=[0.5, 0.7, 0.85])
+    assert gov.level(10) == 0
+    assert gov.level(50) == LEVEL_KEYWORD_ONLY
+    gov.settle(0, 60)
+    assert gov.level(10) == LEVEL_CHEAP_MODEL
+    assert gov.level(30) == LEVEL_SKIP_LOW
+
+
+def test_worst_case_uses_reserve_rate(governor, monkeypatch):
+    gov = governor(run_krw=100)
+    monkeypatch.setattr(exchange, "reserve_rate", lambda: 2000.0)
+    usd = cfg.calc_cost("gpt-4o", 1000, "input") + cfg.calc_cost("gpt-4o", 500, "output")
+    assert gov.worst_case_krw("gpt-4o", 1000, 500) == pytest.approx(usd * 2000.0)
+
+
+def test_cheaper_config_keeps_fallback_chain():
+    config = {"provider": ["openai", "fireworks"], "model": ["gpt-4o", "llama4-maverick-instruct-basic"],
+              "max_tokens": 100}
+    cheap = cheaper_config(config)
+    cheapest = min(cfg.MODEL_RATES, key=lambda m: cfg.MODEL_RATES[m]["output"])
+    assert cheap["model"] == [cheapest, "gpt-4o", "llama4-maverick-instruct-basic"]
+    assert cheap["provider"] == [cfg.MODEL_PROVIDER[cheapest], "openai", "fireworks"]
+    assert cheap["max_tokens"] == 100
+    assert config["model"] == ["gpt-4o", "llama4-maverick-instruct-basic"]  # 원본 설정은 그대로
+
+
+def test_cheaper_config_already_cheapest():
+    cheapest = min(cfg.MODEL_RATES, key=lambda m: cfg.MODEL_RATES[m]["output"])
+    config = {"provider": [cfg.MODEL_PROVIDER[cheapest]], "model": [cheapest]}
+    assert cheaper_config(config) is config
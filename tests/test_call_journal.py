@@ -0,0 +1,101 @@
+import pytest
+
+from utils import exchange
+from utils.cfg import cfg
+from scripts.budget import BudgetGovernor
+from scripts.call_journal import CallJournal
+from scripts.call_ledger import CallLedger, CallRecord
+from scripts.cost_ledger import CostLedger
+from scripts.dataframe import load_df
+from scripts.llm_mng import LLMManager
+
+
+def record(tag: str, cost_in: float = 0.001, cost_out: float = 0.002) -> dict:
+    return CallRecord(tag, "gpt-4o", f"explain:{tag}", "explain_result", 100, 50,
+                      cost_in, cost_out, tag, None, file=f"{tag}.py")._asdict()
+
+
+def test_key_depends_on_stage_tag_and_prompt():
+    key = CallJournal.key("explain", "a", "prompt")
+    assert key.startswith("explain:a:")
+    assert key == CallJournal.key("explain", "a", "prompt")
+    assert key != CallJournal.key("explain", "a", "prompt 2")
+    assert key != CallJournal.key("mk_msg", "a", "prompt")
+
+
+def test_replay_after_restart(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CallJournal(path)
+    key = CallJournal.key("explain", "a", "p")
+    journal.record(key, "응답 A", {"completion_tokens": 50}, record("a"))
+
+    reloaded = CallJournal(path)
+    assert len(reloaded) == 1
+    assert reloaded.lookup(key)["response"] == "응답 A"
+    assert reloaded.lookup(CallJournal.key("explain", "a", "other")) is None
+
+
+def test_unsaved_calls_are_carried_once_per_stage(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CallJournal(path)
+    saved, unsaved, other = (CallJournal.key(stage, tag, "p")
+                             for stage, tag in (("explain", "a"), ("explain", "b"), ("mk_msg", "c")))
+    for key in (saved, unsaved, other):
+        journal.record(key, "r", {}, record(key.split(":")[1]))
+    journal.mark_saved([saved])
+
+    # 재시작: 장부에 저장되기 전에 중단된 호출만 비용 이월 대상
+    reloaded = CallJournal(path)
+    assert reloaded.is_saved(saved) and not reloaded.is_saved(unsaved)
+    carried = reloaded.take_carried("explain")
+    assert [entry["key"] for entry in carried] == [unsaved]
+    assert reloaded.take_carried("explain") == []  # 한 번만 꺼냄
+    assert [entry["key"] for entry in reloaded.take_carried("mk_msg")] == [other]
+
+    # 이월 기록으로 비용 복원 (save_all 에서 장부/예산에 반영하는 값)
+    restored = CallRecord(**carried[0]["record"])
+    assert restored.cost_in + restored.cost_out == pytest.approx(0.003)
+    assert restored.file == "b.py"
+
+    reloaded.mark_saved([unsaved])
+    assert CallJournal(path).take_carried("explain") == []
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CallJournal(path)
+    key = CallJournal.key("explain", "a", "p")
+    journal.record(key, "r", {}, record("a"))
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"type": "call", "key": "explain:b')  # 기록 도중 종료
+    reloaded = CallJournal(path)
+    assert len(reloaded) == 1 and reloaded.lookup(key) is not None
+
+
+def test_save_all_books_carried_costs_once(run_dirs, user_config, monkeypatch):
+    user_config["budget"] = {"run_krw": 1000}
+    monkeypatch.setattr(exchange, "get_rate", lambda log_func=None: 1000.0)
+    timestamp = "260101_0900"
+    paths = cfg.get_results_path(timestamp, base_dir=cfg.RESULTS_DIR)
+    previous = CallJournal(paths["journal"])
+    key = CallJournal.key("explain", "a", "p")
+    previous.record(key, "r", {}, record("a", 0.01, 0.02))  # 장부 저장 전에 중단된 호출
+
+    # save_all 이 쓰는 부분만 채운 LLMManager (provider 호출 없음)
+    llm = LLMManager.__new__(LLMManager)
+    llm.stage, llm.model, llm.timestamp, llm.log_file = "explain", "gpt-4o", timestamp, None
+    llm.paths = paths
+    llm.journal = CallJournal(paths["journal"])
+    llm.ledger, llm.cost_ledger = CallLedger(), CostLedger()
+    llm.budget = BudgetGovernor(timestamp)
+    llm._journal_pending, llm._replayed = [], 0
+
+    llm.save_all()
+    assert llm.budget.spent == pytest.approx(30.0)  # (0.01 + 0.02) USD × 1000
+    assert load_df(paths["out"])["cost(krw)"].sum() == pytest.approx(20.0)
+    assert CostLedger().run_totals(timestamp)["cost_krw"] == pytest.approx(30.0)
+
+    llm.save_all()  # 다시 저장해도 이월 비용은 한 번만 반영
+    assert llm.budget.spent == pytest.approx(30.0)
+    assert CallJournal(paths["journal"]).is_saved(key)
+    assert CostLedger().run_totals(timestamp)["cost_krw"] == pytest.approx(30.0)
@@ -0,0 +1,101 @@
+import subprocess
+
+import pytest
+
+from scripts.checkpoint import RunCheckpoint, find_resumable, git_snapshot, STAGES
+from scripts.precheck import changed_files
+
+
+def git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+# 🧪 변경 파일이 있는 임시 git 레포 (cwd 기준으로 git 을 부르므로 chdir)
+@pytest.fixture
+def repo(tmp_path, run_dirs, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.name", "test")
+    git(repo, "config", "user.email", "test@example.com")
+    (repo / "a.py").write_text("a = 1\n", encoding="utf-8")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "init")
+    (repo / "a.py").write_text("a = 2\n", encoding="utf-8")
+    monkeypatch.chdir(repo)
+    return repo
+
+
+def start_run(timestamp: str) -> RunCheckpoint:
+    checkpoint = RunCheckpoint(timestamp)
+    checkpoint.reset(git_snapshot())
+    return checkpoint
+
+
+def test_snapshot_matches_precheck_for_untracked_folders(repo):
+    (repo / "new").mkdir()
+    (repo / "new" / "b.py").write_text("b = 1\n", encoding="utf-8")
+    (repo / "new" / "notes.txt").write_text("x\n", encoding="utf-8")
+    _, changed = changed_files()
+    assert sorted(path for _, path in changed) == ["a.py", "new/b.py"]
+    assert sorted(git_snapshot()["files"]) == ["a.py", "new/b.py"]
+
+
+def test_inputs_match_same_tree(repo):
+    checkpoint = start_run("260101_0900")
+    assert checkpoint.inputs_match(git_snapshot())
+
+
+def test_inputs_match_detects_edit_and_new_file(repo):
+    checkpoint = start_run("260101_0900")
+    (repo / "a.py").write_text("a = 3\n", encoding="utf-8")
+    assert not checkpoint.inputs_match(git_snapshot())
+
+    (repo / "a.py").write_text("a = 2\n", encoding="utf-8")
+    (repo / "c.py").write_text("c = 1\n", encoding="utf-8")
+    assert not checkpoint.inputs_match(git_snapshot())
+
+
+def test_inputs_match_moved_head_only_after_upload_started(repo):
+    checkpoint = start_run("260101_0900")
+    (repo / "other.txt").write_text("x\n", encoding="utf-8")
+    git(repo, "add", "other.txt")
+    git(repo, "commit", "-q", "-m", "unrelated")
+    assert not checkpoint.inputs_match(git_snapshot())
+
+    checkpoint.begin("upload")  # 업로드 도중 중단 → 일부 파일이 이미 커밋됐을 수 있음
+    assert checkpoint.inputs_match(git_snapshot())
+
+
+def test_find_resumable_newest_unfinished(repo, run_dirs):
+    start_run("260101_0900")
+    (run_dirs / "results" / "260101_1000").mkdir(parents=True)  # 체크포인트 없는 실행(변경 없음 등)은 건너뜀
+    (run_dirs / "results" / "260101_1100_dry").mkdir(parents=True)
+    assert find_resumable(git_snapshot()) == "260101_0900"
+
+
+def test_find_resumable_stops_at_finished_run(repo):
+    start_run("260101_0900")
+    newest = start_run("260101_1000")
+    for stage in STAGES:
+        newest.mark_done(stage)
+    assert find_resumable(git_snapshot()) is None
+
+
+def test_find_resumable_stops_at_mismatched_run(repo):
+    start_run("260101_0900")
+    (repo / "a.py").write_text("a = 9\n", encoding="utf-8")
+    start_run("260101_1000")
+    (repo / "a.py").write_text("a = 2\n", encoding="utf-8")
+    # 가장 최근 실행의 입력이 다르면 더 오래된(입력이 같은) 실행으로 되돌아가지 않음
+    assert find_resumable(git_snapshot()) is None
+
+
+def test_stage_markers_follow_fingerprint(repo, user_config):
+    checkpoint = start_run("260101_0900")
+    assert not checkpoint.begin("extract")
+    checkpoint.mark_done("extract")
+    assert checkpoint.is_done("extract")
+
+    user_config["change detection"] = {**user_config["change detection"], "max_files": 1}
+    assert not RunCheckpoint("260101_0900").is_done("extract")  # 단계 설정이 바뀌면 완료 표시 무효
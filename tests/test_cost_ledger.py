@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from utils.cfg import cfg
+from scripts.call_ledger import CallRecord
+from scripts.cost_ledger import CostLedger, month_key
+
+RUN, OTHER = "260101_0900", "260102_0900"
+
+
+def record(tag: str, model: str = "gpt-4o", cost_in: float = 0.001, cost_out: float = 0.002,
+           stage: str = "explain") -> CallRecord:
+    return CallRecord(tag, model, f"{stage}:{tag}", f"{stage}_result", 100, 50,
+                      cost_in, cost_out, tag, None, file=f"{tag}.py")
+
+
+@pytest.fixture
+def ledger(run_dirs):
+    return CostLedger()
+
+
+def test_month_key():
+    assert month_key("250518_1034") == "25_05"
+
+
+def test_append_updates_rollup(ledger):
+    ledger.append(RUN, "explain", [record("a"), record("b", model="gpt-4o-mini")], 1000.0)
+    ledger.append(RUN, "mk_msg", [record("c", cost_in=0.01, cost_out=0.0, stage="mk_msg")], 1000.0)
+    ledger.append(OTHER, "explain", [record("d")], 1000.0)
+
+    rollup = ledger.rollup("26_01")
+    assert rollup["total"]["calls"] == 4
+    assert rollup["total"]["cost_krw"] == pytest.approx(19.0)
+    assert rollup["by_stage"]["explain"]["calls"] == 3
+    assert rollup["by_model"]["gpt-4o-mini"]["cost_krw"] == pytest.approx(3.0)
+    assert rollup["by_run_stage"][RUN] == pytest.approx({"explain": 6.0, "mk_msg": 10.0})
+    assert len(rollup["parts"]) == 3
+
+    totals = ledger.run_totals(RUN)
+    assert totals["cost_krw"] == pytest.approx(16.0) and totals["calls"] == 3
+    assert totals["stages"] == pytest.approx({"explain": 6.0, "mk_msg": 10.0})
+    assert ledger.run_totals("260103_0900") is None
+    assert ledger.month_spent("26_01") == pytest.approx(19.0)
+    assert ledger.month_spent("26_01", exclude=RUN) == pytest.approx(3.0)
+
+
+def test_rollup_folds_in_missing_parts(ledger):
+    ledger.append(RUN, "explain", [record("a")], 1000.0)
+    rollup_path = cfg.COST_DIR / "rollup" / "26_01.json"
+    stale = rollup_path.read_text(encoding="utf-8")
+    ledger.append(OTHER, "explain", [record("b")], 1000.0)
+    rollup_path.write_text(stale, encoding="utf-8")  # 다른 프로세스가 추가한 part 가 아직 반영 안 된 상태
+
+    rollup = ledger.rollup("26_01")
+    assert rollup["total"]["calls"] == 2
+    assert ledger.rollup("26_01")["total"]["calls"] == 2  # 한 번만 반영
+    assert ledger.rebuild("26_01")["total"] == pytest.approx(rollup["total"])
+
+
+def test_legacy_txt_imported_once(ledger):
+    cfg.COST_DIR.mkdir(parents=True)
+    (cfg.COST_DIR / "26_01.txt").write_text(f"251231_0900\t500\n{RUN}\t999\n깨진 줄\n", encoding="utf-8")
+    ledger.append(RUN, "explain", [record("a")], 1000.0)
+
+    rollup = ledger.rollup("26_01")
+    assert rollup["by_run"]["251231_0900"] == {"cost_krw": 500.0, "legacy": 1}
+    assert rollup["by_run"][RUN]["cost_krw"] == pytest.approx(3.0)  # 장부에 있는 실행은 장부 기준
+    assert ledger.month_spent("26_01") == pytest.approx(503.0)
+
+
+def test_dry_run_writes_nothing(ledger, monkeypatch):
+    monkeypatch.setattr(cfg, "DRY_RUN", True)
+    assert ledger.append(RUN, "explain", [record("a")], 1000.0) is None
+    assert ledger.month_spent("26_01") == 0.0
+    assert not cfg.COST_DIR.exists()
+
+
+def test_rollup_file_is_json(ledger):
+    ledger.append(RUN, "explain", [record("a")], 1000.0)
+    saved = json.loads((cfg.COST_DIR / "rollup" / "26_01.json").read_text(encoding="utf-8"))
+    assert saved == ledger.rollup("26_01")
@@ -0,0 +1,136 @@
+import pandas as pd
+import pytest
+
+from scripts import fx_elab
+from scripts.budget import BudgetGovernor
+from scripts.fx_elab import parse_packed_response, pack_sections, build_packed_prompt
+from tests.conftest import FakeEncoding
+
+
+def test_parse_packed_response_blocks():
+    response = (
+        "<<<FILE id=a1>>>\n첫 번째 요약\n<<<END>>>\n"
+        "설명 밖 잡음\n"
+        "<<<FILE id=b2>>>  두 번째\n요약  <<<END>>>"
+    )
+    assert parse_packed_response(response) == {"a1": "첫 번째 요약", "b2": "두 번째\n요약"}
+
+
+@pytest.mark.parametrize("response", ["", None, "[ERROR] 429", "형식 없는 응답"])
+def test_parse_packed_response_unusable(response):
+    assert parse_packed_response(response) == {}
+
+
+def _section(id_, words, readme="R", packable=True):
+    return {"id": id_, "section": " ".join(["w"] * words), "readme": readme, "packable": packable,
+            "out_path": None, "importance": 5}
+
+
+def test_pack_sections_budget_and_readme(monkeypatch):
+    monkeypatch.setattr(fx_elab, "get_encoding", lambda model: FakeEncoding())
+    sections = [
+        _section("a", 40), _section("b", 40), _section("c", 40),  # 100 토큰 예산 → a,b / c 는 단독(단건 호출)
+        _section("big", 60),                                       # 예산 절반 초과 → 묶지 않음
+        _section("kw", 5, packable=False),                         # keyword_only 등 → 묶지 않음
+        _section("d", 5, readme="other"), _section("e", 5, readme="other"),
+    ]
+    packs = pack_sections(sections, 100, "gpt-4o")
+    assert [[s["id"] for s in pack] for pack in packs] == [["a", "b"], ["d", "e"]]
+    prompt = build_packed_prompt(packs[0], "tree")
+    assert "### FILE id=a" in prompt and "### FILE id=b" in prompt
+
+
+class FakeWriter:
+    def __init__(self):
+        self.written = {}
+
+    def write(self, path, text):
+        self.written[str(path)] = text
+
+
+class FakeLLM:
+    """LLMManager 대용: call_all 호출을 기록하고 준비된 응답 반환"""
+    calls: list = []
+    respond = None
+
+    def __init__(self, stage, repo_df, df_for_call=None, ctx=None):
+        self.config = {"pack_budget": 1000}
+        self.writer = FakeWriter()
+        FakeLLM.instance = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def call_all(self, prompts, tags, priorities=None, stop_when=None):
+        FakeLLM.calls.append(list(tags))
+        return [FakeLLM.respond(tag, prompt) for tag, prompt in zip(tags, prompts)]
+
+    def save_all(self):
+        pass
+
+
+class FakeCtx:
+    log_file = None
+    tree_structure = "repo/\n  a.py"
+    resuming: set = set()
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def frame(self, name):
+        return self.frames[name]
+
+    def put(self, name, df):
+        self.frames[name] = df
+
+
+@pytest.fixture
+def explain_inputs(tmp_path, run_dirs, user_config, monkeypatch):
+    user_config["budget"] = {}  # 예산 한도 없음 → 절감 단계 미적용
+    monkeypatch.setattr(fx_elab, "get_encoding", lambda model: FakeEncoding())
+    monkeypatch.setattr(fx_elab, "get_governor", lambda log_func=None: BudgetGovernor("260101_0000"))
+    monkeypatch.setattr(fx_elab, "LLMManager", FakeLLM)
+    FakeLLM.calls = []
+
+    files = ["a.py", "b.py", "c.py"]
+    for name in files:
+        (tmp_path / name).write_text(f"def {name[0]}():\n    return 1\n", encoding="utf-8")
+    out_dir = tmp_path / "out"
+    repo_df = pd.DataFrame({"Root path": [str(tmp_path)]})
+    info_df = pd.DataFrame({"file": files, "path": [str(tmp_path)] * 3, "5 latest commit": [["fix"]] * 3})
+    strategy_df = pd.DataFrame({
+        "id": [f"id_{n[0]}" for n in files], "File": files, "File strategy": ["full_pass"] * 3,
+        "Num of extract file": [1] * 3, "Component Type": ["util"] * 3, "Importance": [8, 6, 4],
+        "Most Related Files": [[] for _ in files], "Readme strategy": [[False, "x"]] * 3,
+        "name4save": [n[0] for n in files],
+        "save_path": [["", str(out_dir / f"in_{n[0]}.txt"), str(out_dir / f"out_{n[0]}.txt")] for n in files],
+    })
+    return FakeCtx({"repo": repo_df, "info": info_df, "strategy": strategy_df}), out_dir
+
+
+def test_pack_parse_failure_falls_back_to_single_calls(explain_inputs):
+    ctx, out_dir = explain_inputs
+
+    def respond(tag, prompt):
+        if tag == "pack_1":  # 묶음 응답에서 id_b 블록 누락
+            return "<<<FILE id=id_a>>>\nA 요약\n<<<END>>>\n<<<FILE id=id_c>>>\nC 요약\n<<<END>>>"
+        return f"단건 {tag}"
+    FakeLLM.respond = staticmethod(respond)
+
+    fx_elab.fx_elab_main(ctx)
+
+    assert FakeLLM.calls == [["pack_1"], ["id_b"]]
+    written = FakeLLM.instance.writer.written
+    assert written == {str(out_dir / "out_a.txt"): "A 요약", str(out_dir / "out_c.txt"): "C 요약"}
+
+
+def test_pack_error_retries_every_file(explain_inputs):
+    ctx, _ = explain_inputs
+    FakeLLM.respond = staticmethod(lambda tag, prompt: "[ERROR] 500" if tag == "pack_1" else "ok")
+
+    fx_elab.fx_elab_main(ctx)
+
+    assert FakeLLM.calls == [["pack_1"], ["id_a", "id_b", "id_c"]]
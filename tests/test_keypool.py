@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from llm import _keypool
+from llm._keypool import KeyPool, MAX_RATE_LIMITED
+
+
+def test_lease_prefers_least_busy_key():
+    pool = KeyPool("test", ["k1", "k2"], per_key_concurrency=2, min_interval_s=0.0)
+    assert pool.capacity == 4
+    with pool.lease() as first, pool.lease() as second:
+        assert {first.key, second.key} == {"k1", "k2"}
+        assert first.in_flight == second.in_flight == 1
+    assert all(k.in_flight == 0 for k in pool.keys)
+    assert sum(k.calls for k in pool.keys) == 2
+
+
+def test_lease_blocks_at_per_key_concurrency():
+    pool = KeyPool("test", ["k1"], per_key_concurrency=1, min_interval_s=0.0)
+    acquired = threading.Event()
+
+    def take():
+        with pool.lease():
+            acquired.set()
+
+    with pool.lease():
+        waiter = threading.Thread(target=take)
+        waiter.start()
+        time.sleep(0.05)
+        assert not acquired.is_set()  # 슬롯이 비기 전에는 배정되지 않음
+    waiter.join(timeout=2)
+    assert acquired.is_set()
+
+
+def test_min_interval_between_calls_on_same_key():
+    pool = KeyPool("test", ["k1"], per_key_concurrency=5, min_interval_s=0.2)
+    starts = []
+    for _ in range(3):
+        with pool.lease():
+            starts.append(time.monotonic())
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.19 for gap in gaps)
+    assert pool.pacing_sec() == pytest.approx(0.2)
+
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_auth_failure_drains_key(status):
+    pool = KeyPool("test", ["bad1", "good"], per_key_concurrency=1, min_interval_s=0.0)
+    logs = []
+    bad = pool.keys[0]
+    pool.report(bad, status, log=logs.append)
+    assert bad.drained and str(status) in bad.drained
+    assert pool.capacity == 1
+    assert logs and "제외" in logs[0]
+    for _ in range(3):
+        with pool.lease() as state:
+            assert state.key == "good"
+
+
+def test_rate_limit_cools_down_then_drains(monkeypatch):
+    monkeypatch.setattr(_keypool, "BASE_COOLDOWN_S", 0.1)
+    pool = KeyPool("test", ["k1", "k2"], per_key_concurrency=1, min_interval_s=0.0)
+    key = pool.keys[0]
+    pool.report(key, 429)
+    assert key.rate_limited == 1 and not key.drained
+    assert key.cooldown_until > time.monotonic()
+    with pool.lease() as state:
+        assert state.key == "k2"  # 쉬는 동안 다른 키로 배정
+
+    pool.report(key, None)  # 성공하면 연속 횟수 초기화
+    assert key.rate_limited == 0
+    for _ in range(MAX_RATE_LIMITED):
+        pool.report(key, 429)
+    assert key.drained and "429" in key.drained
+    assert pool.capacity == 1
+
+
+def test_no_keys_left_raises():
+    pool = KeyPool("test", ["k1"], per_key_concurrency=1, min_interval_s=0.0)
+    pool.report(pool.keys[0], 401)
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
+
+
+def test_report_without_log_is_silent(capsys):
+    pool = KeyPool("test", ["k1"], per_key_concurrency=1, min_interval_s=0.0)
+    pool.report(pool.keys[0], 429)
+    assert capsys.readouterr().out == ""
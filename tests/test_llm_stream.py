@@ -0,0 +1,86 @@
+import pytest
+
+from scripts import llm_mng
+from scripts.llm_mng import LLMManager, DeadlineExceeded, json_array_closed
+
+
+class FakeStream:
+    """stream_llm 대용: (kind, payload) 이벤트를 순서대로 내보내고 close 여부 기록"""
+
+    def __init__(self, events):
+        self.events = events
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            self.sent += 1
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+def make_manager() -> LLMManager:
+    # _consume_stream 은 stage/log 만 사용 → 설정/키 풀 초기화 없이 생성
+    llm = LLMManager.__new__(LLMManager)
+    llm.stage, llm.log_file = "strategy", None
+    llm._call_log = lambda m: None
+    return llm
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    holder = {}
+
+    def fake_stream_llm(prompt, config, log=None, route=None):
+        return holder["stream"]
+
+    def use(events):
+        holder["stream"] = FakeStream(events)
+        return holder["stream"]
+
+    monkeypatch.setattr(llm_mng, "stream_llm", fake_stream_llm)
+    return use
+
+
+def test_json_array_closed_ignores_brackets_in_strings():
+    assert not json_array_closed('[{"a": "]"')
+    assert not json_array_closed('[[1, 2]')
+    assert json_array_closed('```json\n[{"a": "x]"}, [1]]')
+    assert json_array_closed('[{"a": "\\"]"}]')
+
+
+def test_consume_stream_stops_when_array_closed(stream):
+    fake = stream([("text", '[{"id": "a", "v": "]"'), ("text", "}"), ("text", "]"),
+                   ("text", " trailing"), ("usage", {"completion_tokens": 9})])
+    usage, parts = {}, []
+    text, ttft = make_manager()._consume_stream("p", {}, "tag", 0.0, json_array_closed, None, usage, {},
+                                                parts=parts)
+
+    assert text == '[{"id": "a", "v": "]"}]'
+    assert fake.sent == 3  # 닫는 ']' 이후 delta 는 받지 않음
+    assert fake.closed
+    assert ttft is not None
+    assert parts == ['[{"id": "a", "v": "]"', "}", "]"]
+    assert usage == {}
+
+
+def test_consume_stream_collects_usage_and_deltas(stream):
+    stream([("text", "안녕"), ("text", "하세요"), ("usage", {"prompt_tokens": 3, "completion_tokens": 2})])
+    deltas, usage = [], {}
+    text, _ = make_manager()._consume_stream("p", {}, "tag", 0.0, None, deltas.append, usage, {})
+
+    assert text == "안녕하세요"
+    assert deltas == ["안녕", "하세요"]
+    assert usage == {"prompt_tokens": 3, "completion_tokens": 2}
+
+
+def test_consume_stream_deadline_keeps_partial(stream):
+    fake = stream([("text", "part"), ("text", "never")])
+    parts = []
+    with pytest.raises(DeadlineExceeded):
+        make_manager()._consume_stream("p", {}, "tag", 0.0, None, None, {}, {}, cancel_at=0.0, parts=parts)
+
+    assert parts == ["part"]  # 중단 전까지 받은 출력은 과금 계산용으로 남음
+    assert fake.closed
@@ -0,0 +1,14 @@
+from scripts.prompt_layout import order_by_prefix
+
+
+def test_groups_keep_first_seen_order():
+    keys = ["r1", "r2", "r1", "r3", "r2"]
+    assert order_by_prefix(keys) == [0, 2, 1, 4, 3]
+
+
+def test_priorities_keep_groups_within_band(user_config):
+    user_config["schedule"] = {"must_finish_importance": 7}
+    keys = ["r1", "r2", "r1", "r2", "r1"]
+    priorities = [3, 9, 8, 5, None]
+    # 마감 후에도 끝낼 묶음(7 이상)을 먼저, 각 묶음 안에서는 prefix 그룹 단위로 연속 배치
+    assert order_by_prefix(keys, priorities) == [2, 1, 0, 4, 3]
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from scripts import run_store
+from scripts.call_ledger import IN_COLUMNS, OUT_COLUMNS, COST_COLUMNS
+from scripts.run_store import SCHEMAS
+
+SAMPLES = {
+    "str": ["a", None], "int": [3, 7], "float": [0.5, None], "bool": [True, False],
+    "list": [["x", "y"], []], "json": [{"md": 2, "py": 5}, [False, "요약"]],
+}
+
+
+def sample_frame(table: str) -> pd.DataFrame:
+    return pd.DataFrame({col: SAMPLES[kind] for col, kind in SCHEMAS[table].items()})
+
+
+@pytest.mark.parametrize("table, stem", [
+    ("repo", "repo_df"), ("info", "info_df"), ("strategy", "strategy_df"),
+    ("in", "in_df"), ("out", "out_prompt_df"), ("cost", "part"),
+])
+def test_round_trip_per_schema(tmp_path, table, stem):
+    df = sample_frame(table)
+    path = tmp_path / "df" / f"{stem}.parquet"
+    run_store.write(df, path, table=table if stem == "part" else None)
+    loaded = run_store.read(path)
+
+    assert list(loaded.columns) == list(df.columns)
+    for col, kind in SCHEMAS[table].items():
+        values = [None if kind == "float" and pd.isna(v) else v for v in loaded[col]]
+        assert values == SAMPLES[kind], col
+        if kind in ("str", "list", "json"):
+            assert loaded[col].dtype == object  # 결측은 None (기존 pickle 과 동일)
+
+
+def test_ledger_schemas_cover_columns():
+    assert set(SCHEMAS["in"]) == {"id", *IN_COLUMNS}
+    assert set(SCHEMAS["out"]) == {"id", *OUT_COLUMNS}
+    assert list(SCHEMAS["cost"]) == COST_COLUMNS
+
+
+def test_partially_missing_int_column_is_nullable(tmp_path):
+    df = sample_frame("strategy")
+    df["Importance"] = [8, None]
+    path = tmp_path / "strategy_df.parquet"
+    run_store.write(df, path)
+    importance = run_store.read(path)["Importance"]
+    assert str(importance.dtype) == "Int64"
+    assert importance[0] == 8 and importance[0] > 3 and pd.isna(importance[1])
+    assert str(run_store.read(path)["Recommended length"].dtype) == "int64"  # 결측 없으면 그대로
+
+
+def test_columns_subset_and_index(tmp_path):
+    df = sample_frame("info").iloc[[1, 0]]
+    df.index = [10, 4]
+    path = tmp_path / "info_df.parquet"
+    run_store.write(df, path)
+    loaded = run_store.read(path, columns=["file", "save_path", "없는 컬럼"])
+    assert list(loaded.columns) == ["file", "save_path"]
+    assert loaded.index.tolist() == [10, 4]
+    assert loaded.loc[4, "save_path"] == ["x", "y"]
+
+
+def test_undeclared_columns_fall_back_to_json(tmp_path):
+    df = pd.DataFrame({"mixed": [{"a": 1}, "text"], "n": [1, 2]})
+    path = tmp_path / "extra.parquet"
+    run_store.write(df, path)
+    loaded = run_store.read(path)
+    assert loaded["mixed"].tolist() == [{"a": 1}, "text"]
+    assert loaded["n"].tolist() == [1, 2]
+
+
+def test_read_missing_returns_none(tmp_path):
+    assert run_store.read(tmp_path / "repo_df.parquet") is None
@@ -0,0 +1,323 @@
+"""
+프롬프트/응답/diff 아티팩트 저장소 (content-addressed chunk, artifacts/chunks/)
+- 텍스트를 줄 단위 content-defined chunk 로 나눠 sha256 으로 저장 → 폴더 구조, README 처럼
+  프롬프트마다/실행마다 반복되는 큰 블록은 한 번만 저장
+- chunk 는 zstd 압축 (zstandard 없으면 zlib)
+- 실행별 manifest (results/<ts>/manifest.jsonl): 기존 파일 경로 → chunk 목록
+- read_text / exists: manifest 에 있으면 chunk 로 복원, 없으면 기존 평문 파일 (이전 실행 결과 호환)
+
+사용:
+    python -m utils.artifacts cat results/<ts>/explain/out/<name>.txt
+    python -m utils.artifacts export <ts> [--out 폴더]     # 평문 파일로 복원
+    python -m utils.artifacts stats
+    python -m utils.artifacts gc --keep-days 30 [--dry-run] [--prune-runs]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # zstandard 없으면 zlib 로 압축
+    zstandard = None
+
+from utils.cfg import cfg
+
+MIN_CHUNK = 512
+MAX_CHUNK = 32 * 1024
+BOUNDARY_MASK = 0xF  # 줄 해시 하위 4비트가 0 인 줄 뒤에서 자름 (평균 16줄)
+MANIFEST_NAME = "manifest.jsonl"
+GC_GRACE_SEC = 3600  # 실행 중인 프로세스가 막 쓴(아직 manifest 에 없는) chunk 는 보존
+
+
+def split_chunks(text: str) -> list[bytes]:
+    """줄 내용으로 경계를 정함 → 앞부분이 달라도 같은 블록은 같은 chunk 로 다시 맞춰짐"""
+    chunks, current, size = [], [], 0
+    for line in text.encode("utf-8").splitlines(keepends=True):
+        while len(line) > MAX_CHUNK:  # 줄바꿈 없는 긴 텍스트
+            if current:
+                chunks.append(b"".join(current))
+                current, size = [], 0
+            chunks.append(line[:MAX_CHUNK])
+            line = line[MAX_CHUNK:]
+        current.append(line)
+        size += len(line)
+        if size >= MAX_CHUNK or (size >= MIN_CHUNK and zlib.crc32(line) & BOUNDARY_MASK == 0):
+            chunks.append(b"".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(b"".join(current))
+    return chunks
+
+
+class _Codec:
+    def __init__(self):
+        if zstandard is not None:
+            self.ext = ".zst"
+            self._compressor = zstandard.ZstdCompressor(level=3)
+        else:
+            self.ext = ".zz"
+
+    def compress(self, data: bytes) -> bytes:
+        if zstandard is not None:
+            return self._compressor.compress(data)
+        return zlib.compress(data, 6)
+
+    @staticmethod
+    def decompress(path: Path) -> bytes:
+        data = path.read_bytes()
+        if path.suffix == ".zz":
+            return zlib.decompress(data)
+        if zstandard is None:
+            raise RuntimeError(f"zstandard 미설치 → {path.name} 복원 불가")
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class ArtifactStore:
+    """
+    결과 폴더(results/) 아래 텍스트 아티팩트의 읽기/쓰기 진입점
+    - store: "cas" → chunk 저장소 + manifest, "files" → 기존처럼 평문 파일
+    - 여러 스레드에서 동시에 써도 안전 (manifest 추가는 lock)
+    """
+
+    def __init__(self, root: Path | None = None, results_dir: Path | None = None, mode: str | None = None):
+        self.root = Path(root or cfg.ARTIFACT_DIR)
+        self.results_dir = Path(results_dir or cfg.RESULTS_DIR)
+        self.mode = mode or cfg.get_artifact_config()["store"]
+        self.codec = _Codec()
+        self._lock = threading.Lock()
+        self._manifests: dict[Path, dict[str, dict]] = {}
+        self._known: set[str] = set()
+        self._made_dirs: set[Path] = set()
+
+    # 📍 경로 → (실행 폴더, 실행 폴더 기준 상대 경로), results/ 밖이면 None
+    def _locate(self, path: Path) -> tuple[Path, str] | None:
+        try:
+            rel = Path(path).resolve().relative_to(self.results_dir.resolve())
+        except ValueError:
+            return None
+        if len(rel.parts) < 2:
+            return None
+        return self.results_dir / rel.parts[0], Path(*rel.parts[1:]).as_posix()
+
+    def chunk_path(self, digest: str) -> Path | None:
+        for ext in (".zst", ".zz"):
+            path = self.root / "chunks" / digest[:2] / f"{digest}{ext}"
+            if path.exists():
+                return path
+        return None
+
+    def _mkdir(self, path: Path):
+        if path not in self._made_dirs:
+            path.mkdir(parents=True, exist_ok=True)
+            self._made_dirs.add(path)
+
+    def _put_chunk(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        if digest in self._known or self.chunk_path(digest):
+            self._known.add(digest)
+            return digest
+        folder = self.root / "chunks" / digest[:2]
+        self._mkdir(folder)
+        path = folder / f"{digest}{self.codec.ext}"
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(self.codec.compress(data))
+        os.replace(tmp, path)
+        self._known.add(digest)
+        return digest
+
+    def _manifest(self, run_dir: Path) -> dict[str, dict]:
+        with self._lock:
+            if run_dir not in self._manifests:
+                self._manifests[run_dir] = load_manifest(run_dir)
+            return self._manifests[run_dir]
+
+    def write_text(self, path: Path, text: str):
+        path = Path(path)
+        located = self._locate(path) if self.mode == "cas" else None
+        if located is None:
+            self._mkdir(path.parent)
+            path.write_text(text, encoding="utf-8")
+            return
+        run_dir, rel = located
+        entry = {"path": rel, "size": len(text), "chunks": [self._put_chunk(c) for c in split_chunks(text)]}
+        manifest = self._manifest(run_dir)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._mkdir(run_dir)
+            with (run_dir / MANIFEST_NAME).open("a", encoding="utf-8") as f:
+                f.write(line)
+            manifest[rel] = entry
+        # 같은 경로의 이전 평문 파일(이전 방식 실행)은 manifest 가 대체
+        path.unlink(missing_ok=True)
+
+    def _entry(self, path: Path) -> dict | None:
+        located = self._locate(path)
+        if located is None:
+            return None
+        run_dir, rel = located
+        return self._manifest(run_dir).get(rel)
+
+    def read_text(self, path: Path) -> str:
+        entry = self._entry(path)
+        if entry is None:
+            return Path(path).read_text(encoding="utf-8")
+        parts = []
+        for digest in entry["chunks"]:
+            chunk = self.chunk_path(digest)
+            if chunk is None:
+                raise FileNotFoundError(f"{path}: chunk {digest} 없음")
+            parts.append(self.codec.decompress(chunk))
+        return b"".join(parts).decode("utf-8")
+
+    def exists(self, path: Path) -> bool:
+        return self._entry(path) is not None or Path(path).exists()
+
+    # 📤 실행 하나를 평문 파일로 복원 (검토/공유용)
+    def export(self, timestamp: str, out_dir: Path) -> int:
+        run_dir = self.results_dir / timestamp
+        count = 0
+        for rel in self._manifest(run_dir):
+            target = out_dir / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(self.read_text(run_dir / rel), encoding="utf-8")
+            count += 1
+        return count
+
+    def stats(self) -> dict:
+        chunk_files = list((self.root / "chunks").rglob("*.z*")) if (self.root / "chunks").exists() else []
+        stored = sum(p.stat().st_size for p in chunk_files)
+        logical = 0
+        runs = 0
+        if self.results_dir.exists():
+            for run_dir in self.results_dir.iterdir():
+                if (run_dir / MANIFEST_NAME).exists():
+                    runs += 1
+                    logical += sum(e["size"] for e in load_manifest(run_dir).values())
+        return {"runs": runs, "chunks": len(chunk_files), "stored_bytes": stored, "logical_chars": logical}
+
+    # 🧹 보존 기간이 지난 실행의 manifest 삭제 → 남은 manifest 가 참조하지 않는 chunk 삭제
+    # - df/ 체크포인트 / logs/ 는 남김 (실행 이력 카탈로그, 비용 장부 재계산에 필요)
+    # - prune_runs: 실행 폴더와 로그까지 통째로 삭제 (명시적으로 요청한 경우만)
+    def gc(self, keep_days: float, dry_run: bool = False, prune_runs: bool = False,
+           log_func=print) -> tuple[int, int]:
+        cutoff = time.time() - keep_days * 86400
+        removed_runs = 0
+        if self.results_dir.exists():
+            for run_dir in sorted(self.results_dir.iterdir()):
+                started = run_started(run_dir.name)
+                if not run_dir.is_dir() or started is None or started >= cutoff:
+                    continue
+                if prune_runs:
+                    log_func(f"🧹 실행 삭제: {run_dir.name}")
+                    if not dry_run:
+                        shutil.rmtree(run_dir, ignore_errors=True)
+                        log_dir = cfg.LOGS_DIR / run_dir.name
+                        if log_dir.is_dir():
+                            shutil.rmtree(log_dir, ignore_errors=True)
+                elif (run_dir / MANIFEST_NAME).exists():
+                    log_func(f"🧹 아티팩트 manifest 삭제: {run_dir.name}")
+                    if not dry_run:
+                        (run_dir / MANIFEST_NAME).unlink(missing_ok=True)
+                else:
+                    continue
+                removed_runs += 1
+
+        live: set[str] = set()
+        if self.results_dir.exists():
+            for run_dir in self.results_dir.iterdir():
+                if dry_run and run_started(run_dir.name) is not None and run_started(run_dir.name) < cutoff:
+                    continue
+                for entry in load_manifest(run_dir).values():
+                    live.update(entry["chunks"])
+
+        removed_chunks = 0
+        chunk_root = self.root / "chunks"
+        if chunk_root.exists():
+            grace = time.time() - GC_GRACE_SEC
+            for chunk in chunk_root.rglob("*.z*"):
+                if chunk.name.split(".")[0] in live or chunk.stat().st_mtime > grace:
+                    continue
+                if not dry_run:
+                    chunk.unlink(missing_ok=True)
+                removed_chunks += 1
+        with self._lock:
+            self._manifests.clear()
+            self._known.clear()
+        return removed_runs, removed_chunks
+
+
+def load_manifest(run_dir: Path) -> dict[str, dict]:
+    """같은 경로가 여러 번 기록됐으면 마지막 기록 사용, 기록 도중 종료된 마지막 줄은 무시"""
+    path = run_dir / MANIFEST_NAME
+    manifest = {}
+    if not path.exists():
+        return manifest
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        manifest[entry["path"]] = entry
+    return manifest
+
+
+def run_started(name: str) -> float | None:
+    started = cfg.parse_timestamp(name)
+    return started.timestamp() if started else None
+
+
+_store: ArtifactStore | None = None
+_store_lock = threading.Lock()
+
+
+# ✅ 프로세스 단위 공용 저장소
+def get_store() -> ArtifactStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="아티팩트 저장소")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    cat = sub.add_parser("cat", help="아티팩트 내용 출력")
+    cat.add_argument("path", type=Path)
+    exp = sub.add_parser("export", help="실행 하나를 평문 파일로 복원")
+    exp.add_argument("run")
+    exp.add_argument("--out", type=Path)
+    sub.add_parser("stats", help="chunk 수 / 저장 용량")
+    gc = sub.add_parser("gc", help="오래된 실행의 manifest 삭제 + 참조 없는 chunk 정리")
+    gc.add_argument("--keep-days", type=float, help="보존 기간(일), 기본: artifacts.keep_days")
+    gc.add_argument("--dry-run", action="store_true")
+    gc.add_argument("--prune-runs", action="store_true", help="오래된 실행 폴더(df/체크포인트)와 로그까지 삭제")
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.cmd == "cat":
+        print(store.read_text(args.path.resolve()))
+    elif args.cmd == "export":
+        out_dir = args.out or Path(f"{args.run}_export")
+        print(f"📤 {store.export(args.run, out_dir)}개 파일 복원 → {out_dir}")
+    elif args.cmd == "stats":
+        s = store.stats()
+        ratio = s["stored_bytes"] / s["logical_chars"] if s["logical_chars"] else 0
+        print(f"📦 실행 {s['runs']}개 / chunk {s['chunks']}개 / 저장 {s['stored_bytes']:,}B "
+              f"(원문 {s['logical_chars']:,}자, {ratio:.1%})")
+    else:
+        keep_days = args.keep_days if args.keep_days is not None else cfg.get_artifact_config()["keep_days"]
+        runs, chunks = store.gc(keep_days, dry_run=args.dry_run, prune_runs=args.prune_runs)
+        print(f"🧹 {'(dry-run) ' if args.dry_run else ''}{'실행' if args.prune_runs else 'manifest'} {runs}개, "
+              f"chunk {chunks}개 삭제")
+
+
+if __name__ == "__main__":
+    main()
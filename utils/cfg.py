@@ -1,9 +1,9 @@
+import os
 from pathlib import Path
-from datetime import datetime, timedelta
-import pytz
-import yaml
-import requests
-from bs4 import BeautifulSoup
+from datetime import datetime
+from utils.logger import get_sink, infer_level
+
+# pytz / yaml / requests / bs4 는 사용하는 함수 안에서 import (변경 없는 실행의 시작 비용 절감)
 
 class cfg:
     # 📁 기본 경로
@@ -13,14 +13,22 @@ class cfg:
     PROMPT_DIR = BASE_DIR / "prompt"
     USER_CONFIG_PATH = BASE_DIR / "config/user_config.yml"
     EXCHANGE_RATE_CACHE = BASE_DIR / "utils/ex_rate.txt"
+    METRICS_DB = LOGS_DIR / "metrics.sqlite"
+    CATALOG_DB = LOGS_DIR / "catalog.sqlite"
+    ARTIFACT_DIR = BASE_DIR / "artifacts"
+    COST_DIR = BASE_DIR / "cost"
     EXCHANGE_RATE_FALLBACK = 1400.0
+    DRY_RUN = False  # runall.py --dry-run: LLM 호출 없이 견적만 산출
+    RUN_DEADLINE: float | None = None  # time.monotonic() 기준 실행 마감 (runall.py 에서 설정)
 
     _user_config_cache = None  # ✅ 캐시 추가
+    _log_sink = None  # utils.logger.LogSink (첫 로그 기록 시 생성)
 
     # ✅ 사용자 config 캐싱 로딩
     @staticmethod
     def get_user_config() -> dict:
         if cfg._user_config_cache is None:
+            import yaml
             with cfg.USER_CONFIG_PATH.open(encoding="utf-8") as f:
                 cfg._user_config_cache = yaml.safe_load(f)
         return cfg._user_config_cache
@@ -40,32 +48,93 @@ class cfg:
             log_func(f"⚠️ 확장자 설정 로딩 실패: {e}")
             return []
 
+    # ✅ 한 번에 처리할 최대 변경 파일 수
+    @staticmethod
+    def get_max_changed_files(default: int = 60) -> int:
+        try:
+            return int(cfg.get_user_config().get("change detection", {}).get("max_files", default))
+        except Exception:
+            return default
+
+    # ⏰ 실행 마감 설정 (deadline_min: 0 이면 무제한, must_finish_importance 이상은 마감 후에도 완료)
+    @staticmethod
+    def get_schedule_config() -> dict:
+        conf = cfg.get_user_config().get("schedule") or {}
+        return {
+            "deadline_min": float(conf.get("deadline_min") or 0),
+            "must_finish_importance": float(conf.get("must_finish_importance", 7)),
+        }
+
+    # 📦 아티팩트 저장 방식 (store: files → 평문 파일(기본), cas → chunk 저장소) / 보존 기간
+    @staticmethod
+    def get_artifact_config() -> dict:
+        conf = cfg.get_user_config().get("artifacts") or {}
+        store = conf.get("store", "files")
+        return {
+            "store": store if store in ("cas", "files") else "files",
+            "keep_days": float(conf.get("keep_days") or 30),
+        }
+
     # ✅ LLM 설정
     @staticmethod
     def get_llm_config(stage: str) -> dict:
         LLM_PARAM = {
-            "strategy": {"temperature": 0.5, "top_p": 0.8, "top_k": 40, "max_tokens": 8000},
-            "explain": {"temperature": 0.8, "top_p": 0.9, "top_k": 80, "max_tokens": 8000},
-            "mk_msg": {"temperature": 0.8, "top_p": 0.8, "top_k": 60, "max_tokens": 4096},
+            "strategy": {"temperature": 0.5, "top_p": 0.8, "top_k": 40, "max_tokens": 8000, "stream": True},
+            "explain": {"temperature": 0.8, "top_p": 0.9, "top_k": 80, "max_tokens": 8000, "stream": True,
+                        "pack_budget": 3000},
+            "mk_msg": {"temperature": 0.8, "top_p": 0.8, "top_k": 60, "max_tokens": 4096, "stream": True},
         }
         user_conf = cfg.get_user_config()
         user_llm = user_conf["llm"][stage]
         return {
             **LLM_PARAM[stage],
+            "stream": user_llm.get("stream", LLM_PARAM[stage]["stream"]),
+            "pack_budget": user_llm.get("pack_budget", LLM_PARAM[stage].get("pack_budget", 0)),
             "provider": user_llm["provider"],
             "model": user_llm["model"]
         }
 
+    # ✅ LLM 엔드포인트 (mock 서버 전환 스위치: LLM_MOCK_URL 환경변수 > user_config 'mock llm')
+    PROVIDER_BASE_URL = {
+        "fireworks": "https://api.fireworks.ai/inference/v1",
+        "openai": "https://api.openai.com/v1",
+    }
+    PROVIDER_MOCK_PATH = {"fireworks": "/inference/v1", "openai": "/v1"}
+
+    @staticmethod
+    def get_mock_llm_url() -> str | None:
+        env_url = os.getenv("LLM_MOCK_URL")
+        if env_url:
+            return env_url.rstrip("/")
+        mock_conf = cfg.get_user_config().get("mock llm") or {}
+        if mock_conf.get("enabled"):
+            return str(mock_conf.get("base_url", "http://127.0.0.1:8765")).rstrip("/")
+        return None
+
+    @staticmethod
+    def get_llm_base_url(provider: str) -> str:
+        mock_url = cfg.get_mock_llm_url()
+        if mock_url:
+            return mock_url + cfg.PROVIDER_MOCK_PATH[provider]
+        return cfg.PROVIDER_BASE_URL[provider]
+
+    # 💲 모델 레지스트리: 1K 토큰당 USD 단가 (cached: provider prefix cache 적중 입력 토큰 단가)
+    MODEL_RATES = {
+        "gpt-4o": {"input": 0.0025, "cached": 0.00125, "output": 0.01},
+        "llama4-maverick-instruct-basic": {"input": 0.00022, "cached": 0.00011, "output": 0.00088},
+        "llama4-scout-instruct-basic": {"input": 0.00015, "cached": 0.000075, "output": 0.0006},
+    }
+    MODEL_PROVIDER = {
+        "gpt-4o": "openai",
+        "llama4-maverick-instruct-basic": "fireworks",
+        "llama4-scout-instruct-basic": "fireworks",
+    }
+
     @staticmethod
     def calc_cost(llm_name: str, tokens: int, direction: str) -> float:
-        rate_map = {
-            "gpt-4o": {"input": 0.0025, "output": 0.01},
-            "llama4-maverick-instruct-basic": {"input": 0.00022, "output": 0.00088},
-            "llama4-scout-instruct-basic": {"input": 0.00015, "output": 0.0006},
-        }
-        if llm_name not in rate_map:
+        if llm_name not in cfg.MODEL_RATES:
             return 0.0
-        rate = rate_map[llm_name][direction]
+        rate = cfg.MODEL_RATES[llm_name][direction]
         return round(tokens * rate / 1000, 6)
 
     # ✅ 타임존 기반 현재 시간
@@ -73,6 +142,7 @@ class cfg:
     def get_now(source: str = "commit") -> datetime:
         user_conf = cfg.get_user_config()
         tz_str = user_conf.get("timezone", {}).get(source, "UTC")
+        import pytz
         tz = pytz.timezone(tz_str)
         return datetime.now(tz)
 
@@ -81,12 +151,13 @@ class cfg:
     def get_results_path(timestamp: str, base_dir: Path = RESULTS_DIR) -> dict:
         base = base_dir / timestamp
         return {
-            "repo": base / "df/repo_df.pkl",
-            "info": base / "df/info_df.pkl",
-            "strategy": base / "df/strategy_df.pkl",
-            "prompt": base / "df/prompt_df.pkl",
-            "in": base / "df/in_df.pkl",
-            "out": base / "df/out_df.pkl",
+            "repo": base / "df/repo_df.parquet",
+            "info": base / "df/info_df.parquet",
+            "strategy": base / "df/strategy_df.parquet",
+            "prompt": base / "df/prompt_df.parquet",
+            "in": base / "df/in_df.parquet",
+            "out": base / "df/out_df.parquet",
+            "journal": base / "journal.jsonl",
             "strategy_in": base / "strategy",
             "strategy_out": base / "strategy",
             "explain_in": base / "explain/in",
@@ -96,15 +167,32 @@ class cfg:
             "diff": base / "diff"
         }
 
-    # ✅ 로그 기록 + stdout 출력 옵션 추가
+    # ✅ 로그 기록 (백그라운드 기록기에 적재) + stdout 출력 옵션
+    # level 생략 시 메시지 표시로 추정(❌ error, ⚠️ warning), 추가 키워드(file_id, latency, tokens 등)는 events.jsonl 필드
+    @staticmethod
+    def log(message: str, log_file: Path | None = None, echo: bool = False, level: str | None = None, **fields):
+        if log_file is not None:
+            if cfg._log_sink is None:
+                cfg._log_sink = get_sink(cfg.get_log_level())
+            cfg._log_sink.emit(log_file, message, level or infer_level(message), fields)
+        if echo or log_file is None:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+
+    # 📝 로그 level (환경변수 LOG_LEVEL > user_config logging.level > info)
+    @staticmethod
+    def get_log_level() -> str:
+        level = os.getenv("LOG_LEVEL")
+        if not level:
+            try:
+                level = (cfg.get_user_config().get("logging") or {}).get("level")
+            except Exception:
+                level = None
+        return str(level or "info").lower()
+
     @staticmethod
-    def log(message: str, log_file: Path, echo: bool = False):
-        time_str = datetime.now().strftime("%H:%M:%S")
-        formatted = f"[{time_str}] {message}"
-        if echo:
-            print(formatted)
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(formatted + "\n")
+    def flush_log():
+        if cfg._log_sink is not None:
+            cfg._log_sink.flush()
 
     @staticmethod
     def init_log_file(timestamp: str, base_log_dir: Path = LOGS_DIR) -> Path:
@@ -112,33 +200,11 @@ class cfg:
         log_dir.mkdir(parents=True, exist_ok=True)
         return log_dir / "for_debug.log"
 
-    # ✅ 환율 로딩
+    # ✅ 환율 로딩 (utils.exchange: 프로세스 단위 1회 조회, 결과까지 대기)
     @staticmethod
     def get_usd_exchange_rate(log_func=None) -> float:
-        log_func = log_func or cfg.log
-        try:
-            if cfg.EXCHANGE_RATE_CACHE.exists():
-                last_modified = datetime.fromtimestamp(cfg.EXCHANGE_RATE_CACHE.stat().st_mtime)
-                if datetime.now() - last_modified < timedelta(hours=24):
-                    cached = cfg.EXCHANGE_RATE_CACHE.read_text(encoding="utf-8").strip()
-                    if cached:
-                        rate = float(cached)
-                        log_func(f"💱 환율 캐시 사용: {rate}원")
-                        return rate
-            log_func("🌐 환율 정보 새로 요청 중...")
-            html = requests.get("https://finance.naver.com/marketindex/", timeout=5).text
-            soup = BeautifulSoup(html, "html.parser")
-            value_el = soup.select_one("div.head_info > span.value")
-            if not value_el:
-                raise ValueError("환율 파싱 실패: selector 결과 없음")
-            rate = float(value_el.text.replace(",", ""))
-            cfg.EXCHANGE_RATE_CACHE.parent.mkdir(parents=True, exist_ok=True)
-            cfg.EXCHANGE_RATE_CACHE.write_text(str(rate), encoding="utf-8")
-            log_func(f"✅ 환율 정보 갱신 완료: {rate}원")
-            return rate
-        except Exception as e:
-            log_func(f"⚠️ 환율 정보 가져오기 실패: {e} → fallback {cfg.EXCHANGE_RATE_FALLBACK}")
-            return cfg.EXCHANGE_RATE_FALLBACK
+        from utils import exchange
+        return exchange.get_rate(log_func=log_func or cfg.log)
 
     # ⏱ 고정 타임스탬프
     TIMESTAMP_FORMAT = "%y%m%d_%H%M"
@@ -146,6 +212,14 @@ class cfg:
     TIMESTAMP = _timestamp_fixed.strftime(TIMESTAMP_FORMAT)
     get_timestamp = staticmethod(lambda: cfg.TIMESTAMP)
 
+    # ✅ 실행 폴더명(타임스탬프) → 실행 시작 시각 (형식이 다르면 None)
+    @staticmethod
+    def parse_timestamp(name: str) -> datetime | None:
+        try:
+            return datetime.strptime(name[:11], cfg.TIMESTAMP_FORMAT)
+        except ValueError:
+            return None
+
     # 📁 파일 구조 정리
     @staticmethod
     def build_llm_file_structure(base_path: Path, valid_ext={".py", ".sh", ".js", ".ts", ".html", ".css"}) -> tuple[list[str], list[str]]:
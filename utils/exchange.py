@@ -0,0 +1,154 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+from utils.cfg import cfg
+
+# 💱 USD → KRW 환율 (프로세스 단위 1회 조회 + 메모이즈)
+# - prefetch(): 실행 시작 시 백그라운드로 조회 시작 (오프라인이어도 단계 시작이 막히지 않음)
+# - get_rate(): 비용 확정(장부/예산 정산) 시점에만 결과를 기다림
+# - current(): 기다리지 않는 값 (조회 전이면 캐시 파일 → fallback) → 견적 같은 추정용
+# - reserve_rate(): 예산 예약용, 확정 전이면 max(캐시, fallback) + 여유분 → 실제 환율이 더 높아도 예약이 모자라지 않음
+# - 조회 순서(naver): 24시간 이내 캐시(utils/ex_rate.txt) → source → 오래된 캐시 → fallback
+# - source: 환경변수 EXCHANGE_RATE_SOURCE → user_config "exchange rate.source" (naver / file / fixed), set_source() 로 교체 가능
+CACHE_TTL = timedelta(hours=24)
+RESERVE_MARGIN = 0.1  # 확정 전 예약 환율 여유분 (10%)
+
+
+def naver_source() -> float:
+    import requests
+    from bs4 import BeautifulSoup
+
+    html = requests.get("https://finance.naver.com/marketindex/", timeout=5).text
+    value_el = BeautifulSoup(html, "html.parser").select_one("div.head_info > span.value")
+    if not value_el:
+        raise ValueError("환율 파싱 실패: selector 결과 없음")
+    return float(value_el.text.replace(",", ""))
+
+
+def file_source() -> float:
+    conf = cfg.get_user_config().get("exchange rate") or {}
+    return float(cfg.BASE_DIR.joinpath(conf["path"]).read_text(encoding="utf-8").strip())
+
+
+def fixed_source() -> float:
+    conf = cfg.get_user_config().get("exchange rate") or {}
+    return float(conf["value"])
+
+
+SOURCES: dict[str, Callable[[], float]] = {"naver": naver_source, "file": file_source, "fixed": fixed_source}
+CACHED_SOURCES = {"naver"}
+
+
+def _read_cache(max_age: timedelta | None) -> float | None:
+    path = cfg.EXCHANGE_RATE_CACHE
+    try:
+        if max_age is not None and datetime.now() - datetime.fromtimestamp(path.stat().st_mtime) >= max_age:
+            return None
+        text = path.read_text(encoding="utf-8").strip()
+        return float(text) if text else None
+    except (OSError, ValueError):
+        return None
+
+
+class ExchangeRate:
+    def __init__(self, source: Callable[[], float] | None = None):
+        self._source = source
+        self._rate: float | None = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._log: Callable[[str], None] = lambda m: None
+
+    def source(self) -> tuple[str, Callable[[], float]]:
+        if self._source is not None:
+            return getattr(self._source, "__name__", "custom"), self._source
+        name = os.getenv("EXCHANGE_RATE_SOURCE") or (cfg.get_user_config().get("exchange rate") or {}).get("source", "naver")
+        if name not in SOURCES:
+            self._log(f"⚠️ 알 수 없는 환율 source '{name}' → naver")
+            name = "naver"
+        return name, SOURCES[name]
+
+    def set_source(self, source: Callable[[], float]):
+        """조회 방식 교체 (로컬 파일, 테스트용 고정값 등), 이미 구한 값은 버림"""
+        with self._lock:
+            self._source = source
+            self._rate, self._thread = None, None
+            self._done.clear()
+
+    def prefetch(self, log_func=None):
+        with self._lock:
+            if log_func:
+                self._log = log_func
+            if self._thread is not None or self._done.is_set():
+                return
+            self._thread = threading.Thread(target=self._resolve, name="exchange-rate", daemon=True)
+            self._thread.start()
+
+    def _resolve(self):
+        rate = None
+        try:
+            name, source = self.source()
+            cached = name in CACHED_SOURCES  # 로컬 파일/고정값/교체한 source 는 캐시를 거치지 않음
+            rate = _read_cache(CACHE_TTL) if cached else None
+            if rate is not None:
+                self._log(f"💱 환율 캐시 사용: {rate}원")
+            else:
+                self._log(f"🌐 환율 정보 새로 요청 중... ({name})")
+                rate = float(source())
+                if cached:
+                    cfg.EXCHANGE_RATE_CACHE.parent.mkdir(parents=True, exist_ok=True)
+                    cfg.EXCHANGE_RATE_CACHE.write_text(str(rate), encoding="utf-8")
+                self._log(f"✅ 환율 정보 갱신 완료: {rate}원")
+        except Exception as e:
+            rate = _read_cache(None)
+            fallback = f"이전 캐시 {rate}원" if rate is not None else f"fallback {cfg.EXCHANGE_RATE_FALLBACK}"
+            self._log(f"⚠️ 환율 정보 가져오기 실패: {e} → {fallback}")
+        finally:
+            self._rate = rate if rate is not None else cfg.EXCHANGE_RATE_FALLBACK
+            self._done.set()  # 실패해도 대기 중인 get() 이 멈추지 않도록
+
+    def get(self, log_func=None) -> float:
+        """확정 환율 (조회가 끝날 때까지 대기, 시작 전이면 지금 시작)"""
+        if not self._done.is_set():
+            self.prefetch(log_func)
+            self._done.wait()
+        return self._rate
+
+    def current(self) -> float:
+        """기다리지 않는 환율: 확정 전이면 캐시 파일(기한 무관) → fallback"""
+        if self._done.is_set():
+            return self._rate
+        cached = _read_cache(None)
+        return cached if cached is not None else cfg.EXCHANGE_RATE_FALLBACK
+
+    def reserve(self) -> float:
+        """기다리지 않는 예약용 환율: 확정 후엔 확정값, 전이면 높은 쪽 + 여유분"""
+        if self._done.is_set():
+            return self._rate
+        return max(self.current(), cfg.EXCHANGE_RATE_FALLBACK) * (1 + RESERVE_MARGIN)
+
+
+_exchange = ExchangeRate()
+
+
+# ✅ 프로세스 단위 공용 환율
+def prefetch(log_func=None):
+    _exchange.prefetch(log_func)
+
+
+def get_rate(log_func=None) -> float:
+    return _exchange.get(log_func)
+
+
+def current_rate() -> float:
+    return _exchange.current()
+
+
+def reserve_rate() -> float:
+    return _exchange.reserve()
+
+
+def set_source(source: Callable[[], float]):
+    _exchange.set_source(source)
@@ -0,0 +1,126 @@
+import atexit
+import json
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 📝 실행 로그 기록기 (cfg.log 의 실제 기록 경로)
+# - 호출 스레드는 큐에 적재만, 백그라운드 스레드가 파일별로 한 번 연 핸들에 모아서 기록
+# - 사람이 읽는 로그(for_debug.log) + 같은 폴더의 구조화 로그(events.jsonl: level, stage, 추가 필드)
+# - level 미만 기록은 버림 (운영 시 파일 단위 상세 로그 끄기)
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+EVENTS_NAME = "events.jsonl"
+_STAGE_PREFIX = re.compile(r"^\[([^\]]+)\]")
+
+
+def infer_level(message: str) -> str:
+    """level 을 지정하지 않은 기존 호출: 메시지 표시로 추정"""
+    if "❌" in message:
+        return "error"
+    if "⚠️" in message or "🛑" in message:
+        return "warning"
+    return "info"
+
+
+class LogSink:
+    FLUSH_INTERVAL = 0.2  # 초, 이 주기로 파일 버퍼를 디스크에 반영
+
+    def __init__(self, level: str = "info"):
+        self.threshold = LEVELS.get(level, LEVELS["info"])
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._handles: dict[Path, object] = {}
+        self._thread = threading.Thread(target=self._worker, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, log_file: Path, message: str, level: str, fields: dict) -> bool:
+        """호출 스레드에서는 시각만 찍어 적재, 문자열/JSON 변환은 기록 스레드에서"""
+        if LEVELS.get(level, LEVELS["info"]) < self.threshold:
+            return False
+        self._queue.put((log_file, time.time(), message, level, fields))
+        return True
+
+    def flush(self, timeout: float | None = 5.0):
+        """적재된 기록이 모두 파일에 반영될 때까지 대기"""
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        self.flush()
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+
+    def _handle(self, path: Path):
+        handle = self._handles.get(path)
+        if handle is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handle = self._handles[path] = path.open("a", encoding="utf-8")
+        return handle
+
+    def _flush_handles(self):
+        for handle in self._handles.values():
+            try:
+                handle.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _write(self, log_file: Path, ts: float, message: str, level: str, fields: dict):
+        now = datetime.fromtimestamp(ts)
+        record = {"ts": now.isoformat(timespec="milliseconds"), "level": level}
+        stage = fields.pop("stage", None)
+        if stage is None:
+            match = _STAGE_PREFIX.match(message)
+            stage = match.group(1) if match else None
+        if stage:
+            record["stage"] = stage
+        record["msg"] = message
+        record.update(fields)
+        self._handle(log_file).write(f"[{now.strftime('%H:%M:%S')}] {message}\n")
+        self._handle(log_file.with_name(EVENTS_NAME)).write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def _worker(self):
+        dirty = False
+        deadline = None
+        while True:
+            try:
+                timeout = None if not dirty else max(deadline - time.monotonic(), 0)
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush_handles()
+                dirty = False
+                continue
+            if isinstance(item, threading.Event):
+                self._flush_handles()
+                dirty = False
+                item.set()
+                continue
+            log_file, ts, message, level, fields = item
+            try:
+                self._write(Path(log_file), ts, message, level, fields)
+            except OSError:
+                continue
+            if level == "error":  # 오류는 바로 디스크에 반영 (직후 종료되어도 남도록)
+                self._flush_handles()
+                dirty = False
+            elif not dirty:
+                dirty, deadline = True, time.monotonic() + self.FLUSH_INTERVAL
+
+
+_sink: LogSink | None = None
+_sink_lock = threading.Lock()
+
+
+# ✅ 프로세스 단위 공용 기록기
+def get_sink(level: str = "info") -> LogSink:
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = LogSink(level)
+        return _sink
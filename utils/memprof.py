@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+# 🧠 메모리 프로파일링 (runall.py --memprofile 일 때만 활성화)
+# - checkpoint(): 단계 경계마다 tracemalloc 스냅샷 + RSS 기록
+# - note(): 단계 안에서 큰 객체(DataFrame, 프롬프트 리스트) 크기를 기록 → 다음 checkpoint 에 포함
+_enabled = False
+_records: list[dict] = []
+_notes: dict[str, int] = {}
+_prev_snapshot: tracemalloc.Snapshot | None = None
+TOP_N = 10
+
+
+def start(frames: int = 1):
+    global _enabled, _prev_snapshot
+    tracemalloc.start(frames)
+    _enabled = True
+    _prev_snapshot = _take_snapshot()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def note(name: str, obj):
+    """비활성 상태에서는 크기 계산도 하지 않음 (호출 비용 0에 가깝게)"""
+    if _enabled:
+        _notes[name] = sizeof(obj)
+
+
+def sizeof(obj) -> int:
+    if hasattr(obj, "memory_usage"):  # DataFrame / Series
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(x) for x in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+def current_rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 2**20 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+
+def _format_stat(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+        **({"size_diff_kb": round(stat.size_diff / 1024, 1)} if hasattr(stat, "size_diff") else {}),
+    }
+
+
+def checkpoint(stage: str) -> dict | None:
+    """단계 종료 시점 기록: 현재/최대 traced 메모리, RSS, 상위 할당 위치, 직전 단계 대비 증가분"""
+    global _prev_snapshot
+    if not _enabled:
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = _take_snapshot()
+    record = {
+        "stage": stage,
+        "traced_mb": round(current / 2**20, 2),
+        "traced_peak_mb": round(peak / 2**20, 2),
+        "rss_mb": current_rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+        "objects_kb": {k: round(v / 1024, 1) for k, v in _notes.items()},
+        "top": [_format_stat(s) for s in snapshot.statistics("lineno")[:TOP_N]],
+        "growth": [_format_stat(s) for s in snapshot.compare_to(_prev_snapshot, "lineno")[:TOP_N]
+                   if s.size_diff > 0],
+    }
+    _records.append(record)
+    _notes.clear()
+    _prev_snapshot = snapshot
+    tracemalloc.reset_peak()  # 단계별 peak 를 따로 보기 위해
+    return record
+
+
+def summary_lines(record: dict) -> list[str]:
+    lines = [f"🧠 [{record['stage']}] traced {record['traced_mb']}MB (peak {record['traced_peak_mb']}MB), "
+             f"RSS {record['rss_mb']}MB (peak {record['peak_rss_mb']}MB)"]
+    for name, kb in record["objects_kb"].items():
+        lines.append(f"   · {name}: {kb}KB")
+    for stat in record["top"][:3]:
+        lines.append(f"   · {stat['site']} → {stat['size_kb']}KB ({stat['count']}개)")
+    return lines
+
+
+def export(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"stages": _records}, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,172 @@
+"""
+LLM 호출 지표 저장소 (SQLite)
+
+리포트:
+    python -m utils.metrics report --since 7d
+    python -m utils.metrics report --since 24h --stage explain
+"""
+import argparse
+import sqlite3
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from utils.cfg import cfg
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    ts REAL NOT NULL,
+    run TEXT,
+    stage TEXT,
+    provider TEXT,
+    model TEXT,
+    tag TEXT,
+    latency REAL,
+    ttft REAL,
+    tokens_in INTEGER,
+    tokens_out INTEGER,
+    cached INTEGER,
+    retries INTEGER,
+    outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_key ON llm_calls (provider, model, stage, ts);
+"""
+COLUMNS = ["ts", "run", "stage", "provider", "model", "tag", "latency", "ttft",
+           "tokens_in", "tokens_out", "cached", "retries", "outcome"]
+
+
+class MetricsStore:
+    """
+    호출 단위 지표 저장소
+    - record()는 메모리에 적재만, flush()에서 한 번에 INSERT (호출 경로에서 DB I/O 제거)
+    - 여러 워커 스레드에서 동시에 record 해도 안전 (lock)
+    """
+
+    def __init__(self, db_path: Path | None = None):
+        self.db_path = Path(db_path or cfg.METRICS_DB)
+        self._pending: list[tuple] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """트랜잭션(commit/rollback) 후 연결까지 닫음 (sqlite3 연결의 with 는 commit 만 함)"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, **fields):
+        fields.setdefault("ts", time.time())
+        with self._lock:
+            self._pending.append(tuple(fields.get(c) for c in COLUMNS))
+
+    def flush(self) -> int:
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany(f"INSERT INTO llm_calls ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        return len(rows)
+
+    # 📈 기간 내 provider/model/stage 별 통계
+    def stats(self, since_sec: float, stage: str | None = None,
+              provider: str | None = None, model: str | None = None) -> list[dict]:
+        if not self.db_path.exists():
+            return []
+        query = "SELECT provider, model, stage, latency, tokens_out, ttft, outcome, retries FROM llm_calls WHERE ts >= ?"
+        params: list = [time.time() - since_sec]
+        for col, val in (("stage", stage), ("provider", provider), ("model", model)):
+            if val:
+                query += f" AND {col} = ?"
+                params.append(val)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        groups: dict[tuple, list] = {}
+        for row in rows:
+            groups.setdefault(row[:3], []).append(row[3:])
+
+        report = []
+        for (prov, mdl, stg), items in sorted(groups.items(), key=lambda kv: tuple(map(str, kv[0]))):
+            ok = [r for r in items if r[3] == "ok" and r[0] is not None]
+            latencies = sorted(r[0] for r in ok)
+            tps = [r[1] / (r[0] - (r[2] or 0)) for r in ok if r[1] and r[0] - (r[2] or 0) > 0]
+            report.append({
+                "provider": prov, "model": mdl, "stage": stg,
+                "calls": len(items),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "tok/s": round(statistics.mean(tps), 1) if tps else None,
+                "avg tokens out": round(statistics.mean(r[1] for r in ok if r[1])) if any(r[1] for r in ok) else None,
+                "error rate": round(1 - len(ok) / len(items), 3),
+                "rate limited": sum(1 for r in items if r[3] == "rate_limited"),
+                "retries": sum(max((r[4] or 1) - 1, 0) for r in items),
+            })
+        return report
+
+    # 🔧 최근 이력 기반 동시 실행 수 조정 (429 비율이 높으면 절반으로)
+    def suggest_workers(self, provider: str, model: str, default: int, since_sec: float = 86400) -> int:
+        try:
+            rows = self.stats(since_sec, provider=provider, model=model)
+        except sqlite3.Error:
+            return default
+        calls = sum(r["calls"] for r in rows)
+        limited = sum(r["rate limited"] for r in rows)
+        if calls >= 20 and limited / calls > 0.05:
+            return max(1, default // 2)
+        return default
+
+
+def percentile(sorted_values: list[float], pct: int) -> float | None:
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return round(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo), 3)
+
+
+def parse_window(text: str) -> float:
+    units = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 호출 지표 리포트")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rep = sub.add_parser("report", help="p50/p95/p99 지연, tok/s, 오류율")
+    rep.add_argument("--since", default="7d", help="조회 기간 (예: 30m, 24h, 7d, 2w)")
+    rep.add_argument("--stage")
+    rep.add_argument("--provider")
+    rep.add_argument("--model")
+    rep.add_argument("--db", type=Path)
+    args = parser.parse_args()
+
+    rows = MetricsStore(args.db).stats(parse_window(args.since), args.stage, args.provider, args.model)
+    if not rows:
+        print("⚠️ 해당 기간 기록 없음")
+        return
+    header = f"{'provider':<10} {'model':<32} {'stage':<9} {'calls':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'tok/s':>7} {'err':>6} {'429':>5} {'retry':>5}"
+    print(header)
+    for r in rows:
+        print(f"{str(r['provider']):<10} {str(r['model']):<32} {str(r['stage']):<9} {r['calls']:>6} "
+              f"{fmt(r['p50']):>7} {fmt(r['p95']):>7} {fmt(r['p99']):>7} {fmt(r['tok/s']):>7} "
+              f"{r['error rate']:>6.1%} {r['rate limited']:>5} {r['retries']:>5}")
+
+
+def fmt(value) -> str:
+    return "-" if value is None else str(value)
+
+
+if __name__ == "__main__":
+    main()
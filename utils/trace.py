@@ -0,0 +1,52 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# ⏱ 경량 트레이싱 (Chrome trace event format)
+# - span()은 with 블록 구간을 complete event("ph": "X")로 기록
+# - 같은 스레드 안에서 시간 구간이 겹치면 chrome://tracing / Perfetto 에서 중첩으로 표시
+_events: list[dict] = []
+_lock = threading.Lock()
+_thread_names: dict[int, str] = {}
+_PID = os.getpid()
+_T0 = time.perf_counter()
+
+
+def add_span(name: str, cat: str, start: float, end: float, **args):
+    """perf_counter() 기준 start/end(초)로 이미 측정된 구간 기록"""
+    tid = threading.get_ident()
+    event = {
+        "name": name, "cat": cat, "ph": "X", "pid": _PID, "tid": tid,
+        "ts": round((start - _T0) * 1_000_000, 1),
+        "dur": round(max(end - start, 0) * 1_000_000, 1),
+        "args": args,
+    }
+    with _lock:
+        _events.append(event)
+        _thread_names.setdefault(tid, threading.current_thread().name)
+
+
+@contextmanager
+def span(name: str, cat: str = "stage", **args):
+    start = time.perf_counter()
+    try:
+        yield args  # 블록 안에서 args에 값을 추가하면 함께 기록됨
+    finally:
+        add_span(name, cat, start, time.perf_counter(), **args)
+
+
+def export(path: Path) -> Path:
+    with _lock:
+        events = list(_events)
+        names = dict(_thread_names)
+    meta = [
+        {"name": "thread_name", "ph": "M", "pid": _PID, "tid": tid, "args": {"name": name}}
+        for tid, name in names.items()
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"traceEvents": meta + events, "displayTimeUnit": "ms"}, ensure_ascii=False),
+                    encoding="utf-8")
+    return path
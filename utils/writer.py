@@ -0,0 +1,70 @@
+import queue
+import threading
+from pathlib import Path
+from utils import trace
+from utils.artifacts import get_store
+
+
+class ArtifactWriter:
+    """
+    프롬프트/응답 아티팩트용 write-behind 파일 기록기
+    - write()는 큐에 적재만 하고 즉시 반환 (LLM 호출 경로에서 디스크 I/O 제거)
+    - 백그라운드 스레드가 큐를 모아서(batch) 한 번에 기록
+    - flush()는 적재된 모든 기록이 디스크에 반영될 때까지 대기
+    - 실제 기록은 ArtifactStore (results/ 아래는 chunk 저장소 + manifest)
+    """
+
+    BATCH_SIZE = 64
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._store = get_store()
+        self._errors: list[str] = []
+        self._errors_lock = threading.Lock()  # flush() 의 교체와 worker 의 추가가 겹쳐도 실패 기록이 빠지지 않도록
+        self._thread = threading.Thread(target=self._worker, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, path: Path, text: str):
+        self._queue.put((Path(path), text))
+
+    def flush(self) -> list[str]:
+        """적재된 기록을 모두 반영하고, 그 사이 발생한 실패 메시지를 반환"""
+        self._queue.join()
+        with self._errors_lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # 같은 경로에 대한 중복 기록은 마지막 내용만 반영
+            latest = {}
+            for path, text in batch:
+                latest[path] = text
+            with trace.span("write batch", "io", files=len(latest)):
+                for path, text in latest.items():
+                    try:
+                        self._store.write_text(path, text)
+                    except Exception as e:
+                        with self._errors_lock:
+                            self._errors.append(f"{path} 기록 실패: {e}")
+            for _ in batch:
+                self._queue.task_done()
+
+
+_writer: ArtifactWriter | None = None
+_writer_lock = threading.Lock()
+
+
+# ✅ 프로세스 단위 공용 writer
+def get_writer() -> ArtifactWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter()
+        return _writer